@@ -2,8 +2,18 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import pandas as pd
 import os
+import io
+import sys
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing
 import concurrent.futures
 
+excelExtensions = ('.xlsm', '.xlsb', '.xlxs')
+stringsToCombine = ["Summary", "Outward Supply", "Reverse Charges", "GST-TDS", "Inward Supplies (ITC)", "Debit & Credit Note"]
+
 # Function to open file dialog and select a CSV file
 def browseFile():
     filePath = filedialog.askopenfilename(
@@ -68,34 +78,75 @@ def generate5And18TaxColumns(workbook):
     workbook["18%"] = eighteenSlab
     return workbook
 
+# Writes each sheet of a unit's workbook as a CSV and returns them as {sheet: DataFrame}
 def separateExcelWorksheets(pathToFile):
     pathAsList = pathToFile.split("/")
     sheetsToUse = ["Summary", "01 Outward Supply", "02 Reverse Charges", "03 GST-TDS", "04 Inward Supplies (ITC)", "05 Debit & Credit Note"]
     # sheetsToUse = ["Summary", "01 Tax Invoice Outward", "02 Bill Of Supply Outward", "03 Reverse Charges", "04 GST-TDS", "05 Inward Supplies", "06 Debit & Credit Note"]
 
-    for sheet in sheetsToUse:
-        try:
-            df = pd.read_excel(pathToFile,sheet_name=sheet, skiprows=3)
-        except Exception as e:
-            messagebox.showerror("Error", f"Problem in processing File. \n{str(e)}")
-            return
+    # one pass over the workbook for all sheets
+    try:
+        workbookSheets = pd.read_excel(pathToFile, sheet_name=sheetsToUse, skiprows=3)
+    except Exception as e:
+        raise ValueError(f"Problem in processing File {pathToFile}. \n{str(e)}") from e
 
+    sheets = {}
+    for sheet in sheetsToUse:
+        df = workbookSheets[sheet]
         df = df.dropna(subset=[df.columns[0]])
         print(f"./Consolidated Files/{pathAsList[-1][:-5]}.{sheet}.csv")
         df = df.loc[:, ~df.columns.str.startswith('Unnamed')]
         df.to_csv(f"./Consolidated Files/{pathAsList[-1][:-5]}.{sheet}.csv", index=False)
+        sheets[sheet] = df
+    return sheets
 
-def listFilesRecursive(path):
-    pool = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()-1)
-    for entry in os.listdir(path):
+def listExcelFiles(path):
+    excelFiles = []
+    for entry in sorted(os.listdir(path)):
         fullPath = path + "/" + entry
         print(fullPath)
         if os.path.isdir(fullPath):
-            listFilesRecursive(fullPath)
-        else:
-            if fullPath[-5:] == '.xlsm' or fullPath[-5:] == '.xlsb' or fullPath[-5:] == '.xlxs':
-                pool.submit(separateExcelWorksheets, fullPath)
-    pool.shutdown(wait=True)
+            excelFiles.extend(listExcelFiles(fullPath))
+        elif fullPath.endswith(excelExtensions):
+            excelFiles.append(fullPath)
+    return excelFiles
+
+# Splits every unit workbook under `path` in parallel; returns [(file, {sheet: DataFrame})] in file order
+def listFilesRecursive(path):
+    excelFiles = listExcelFiles(path)
+    # spawn, as on Windows: forking while the month-end pipeline's threads hold locks can hang the workers
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max(1, os.cpu_count()-1), mp_context=context) as pool:
+        return list(zip(excelFiles, pool.map(separateExcelWorksheets, excelFiles)))
+
+# Combined CSV per sheet type, written to Consolidated Files; returns {string: DataFrame}
+def combineUnitSheets(unitSheets):
+    combined = {}
+    for string in stringsToCombine:
+        frames = [df for _, sheets in unitSheets for sheet, df in sheets.items() if sheet.endswith(string)]
+        text = pd.concat(frames, ignore_index=True).to_csv(index=False)
+        with open(f"./Consolidated Files/Combined {string}.csv", "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        # parsed back from the CSV text, so later steps see what reading the file would give
+        combined[string] = pd.read_csv(io.StringIO(text))
+    return combined
+
+def consolidateUnits(directoryPath):
+    os.makedirs("./Consolidated Files", exist_ok=True)
+    return combineUnitSheets(listFilesRecursive(directoryPath))
+
+def loadCombinedFiles():
+    return {string: pd.read_csv(f"./Consolidated Files/Combined {string}.csv") for string in stringsToCombine}
+
+def reverseChargesReports(workbook):
+    os.makedirs("./Reverse Charges Files", exist_ok=True)
+
+    workbook = workbook.drop(['B-Name of Firm', 'C-Invoice Number Generate By Unit', 'D-Invoice date', 'E-Date of Payment'], axis=1)
+    workbook = generate5And18TaxColumns(workbook)
+
+    prepareTotalByUnitName(workbook)
+    prepareTotalByUnitNameAndService(workbook)
+    prepareTotalByUnitNameAndServiceWithSubtotal(workbook)
 
 def reverseChargesFile():
     browseFile()
@@ -105,15 +156,7 @@ def reverseChargesFile():
         return
 
     try:
-        os.makedirs("./Reverse Charges Files", exist_ok=True)
-
-        workbook = pd.read_csv(filePath)
-        workbook = workbook.drop(['B-Name of Firm', 'C-Invoice Number Generate By Unit', 'D-Invoice date', 'E-Date of Payment'], axis=1)
-        workbook = generate5And18TaxColumns(workbook)
-
-        prepareTotalByUnitName(workbook)
-        prepareTotalByUnitNameAndService(workbook)
-        prepareTotalByUnitNameAndServiceWithSubtotal(workbook)
+        reverseChargesReports(pd.read_csv(filePath))
 
         print("Success")
         messagebox.showinfo("Success", "Required CSVs have been generated and are in the Reverse Charges Files folder")
@@ -121,6 +164,30 @@ def reverseChargesFile():
     except Exception as e:
         messagebox.showerror("Error", f"Problem in processing File. \n{str(e)}")
 
+def GSTReports(dfGST):
+    os.makedirs("./GST-TDS Consolidation Files", exist_ok=True)
+
+    dfGST = dfGST.drop('D-Date of Payment', axis=1)
+    dfGST['B-GST No of Supplier'] = dfGST['B-GST No of Supplier'].str.strip()
+
+    columnsToFloat = ['E-Taxable Amount Paid', 'F-TDS-IGST', 'G-TDS-CGST', 'H-TDS-SGST', 'I-Total']
+    for columns in columnsToFloat:
+        dfGST[columns] = dfGST[columns].replace('NIL', '0', regex=True)
+        dfGST[columns] = dfGST[columns].astype('float')
+
+    aggregationFunction = {
+        col: ('first' if (col == 'C-Name of Supplier' or col == 'A-Unit Name') else 'sum')
+        for col in dfGST.columns if col != 'B-GST No of Supplier'
+    }
+
+    dfByGSTAndName = dfGST.groupby(['A-Unit Name','B-GST No of Supplier'], as_index=False).agg(aggregationFunction)
+    dfByGSTAndName = dfByGSTAndName.sort_values(by='A-Unit Name')
+    dfByGSTAndName.to_csv("./GST-TDS Consolidation Files/GST-TDSandName.csv", index=False)
+
+    dfByGST = dfGST.groupby(['B-GST No of Supplier'], as_index=False).agg(aggregationFunction)
+    dfByGST = dfByGST.drop('A-Unit Name', axis=1)
+    dfByGST.to_csv("./GST-TDS Consolidation Files/GST-TDSOnly.csv", index=False)
+
 def GSTConsolidation():
     browseFile()
     filePath = filePathVariable.get()
@@ -129,35 +196,43 @@ def GSTConsolidation():
         return
 
     try:
-        os.makedirs("./GST-TDS Consolidation Files", exist_ok=True)
+        GSTReports(pd.read_csv(filePath))
 
-        dfGST = pd.read_csv(filePath)
-        dfGST = dfGST.drop('D-Date of Payment', axis=1)
-        dfGST['B-GST No of Supplier'] = dfGST['B-GST No of Supplier'].str.strip()
+        print("Success")
+        messagebox.showinfo("Success", "Required CSVs have been generated and are in the GST Consolidation Files folder")
 
-        columnsToFloat = ['E-Taxable Amount Paid', 'F-TDS-IGST', 'G-TDS-CGST', 'H-TDS-SGST', 'I-Total']
-        for columns in columnsToFloat:
-            dfGST[columns] = dfGST[columns].replace('NIL', '0', regex=True)
-            dfGST[columns] = dfGST[columns].astype('float')
+    except Exception as e:
+        messagebox.showerror("Error", f"Problem in processing File. \n{str(e)}")
 
-        aggregationFunction = {
-            col: ('first' if (col == 'C-Name of Supplier' or col == 'A-Unit Name') else 'sum')
-            for col in dfGST.columns if col != 'B-GST No of Supplier'
-        }
+def load2BFile(filePath2B):
+    df2B = pd.read_excel(filePath2B, sheet_name="B2B", skiprows=4)
+    df2B.rename(columns={'Invoice Details': 'Invoice Number', 'Unnamed: 3': 'Invoice Type', 'Unnamed: 4': 'Invoice Date', 'Unnamed: 5': 'Invoice Value', 'Tax Amount': 'Integrated Tax', 'Unnamed: 10': 'Central Tax', 'Unnamed: 11' : 'State/UT Tax', 'Unnamed: 12' : 'Cess'}, inplace=True)
+    df2B.drop(index=0, inplace=True)
+    df2B['Taxable Value (₹)'] = df2B['Taxable Value (₹)'].astype('float64')
+    df2B['Invoice Number'] = df2B['Invoice Number'].astype('string')
+    return df2B
 
-        dfByGSTAndName = dfGST.groupby(['A-Unit Name','B-GST No of Supplier'], as_index=False).agg(aggregationFunction)
-        dfByGSTAndName = dfByGSTAndName.sort_values(by='A-Unit Name')
-        dfByGSTAndName.to_csv("./GST-TDS Consolidation Files/GST-TDSandName.csv", index=False)
+def prepareInwardSupply(csvInwardSupply):
+    csvInwardSupply['D-Invoice No.'] = csvInwardSupply['D-Invoice No.'].astype('string')
+    csvInwardSupply['G-Taxable Value'] = csvInwardSupply['G-Taxable Value'].astype('float64')
+    return csvInwardSupply
 
-        dfByGST = dfGST.groupby(['B-GST No of Supplier'], as_index=False).agg(aggregationFunction)
-        dfByGST = dfByGST.drop('A-Unit Name', axis=1)
-        dfByGST.to_csv("./GST-TDS Consolidation Files/GST-TDSOnly.csv", index=False)
+def inwardInvoiceReports(df2B, csvInwardSupply):
+    os.makedirs("./ITC Files", exist_ok=True)
 
-        print("Success")
-        messagebox.showinfo("Success", "Required CSVs have been generated and are in the GST Consolidation Files folder")
+    dfInvoiceAmount = pd.merge(df2B, csvInwardSupply, left_on=['Invoice Number', 'Taxable Value (₹)'], right_on=['D-Invoice No.','G-Taxable Value'], how='inner')
+    dfInvoiceAmount = dfInvoiceAmount[['GSTIN of supplier', 'Trade/Legal name', 'Invoice Number', 'D-Invoice No.', 'Taxable Value (₹)', 'G-Taxable Value', 'A-Unit Name']]
+    dfInvoiceAmount.to_csv('./ITC Files/ITCInvoiceAndAmountMatched.csv', index=False)
 
-    except Exception as e:
-        messagebox.showerror("Error", f"Problem in processing File. \n{str(e)}")
+    dfInvoice = pd.merge(df2B, csvInwardSupply, left_on=['Invoice Number'], right_on=['D-Invoice No.'], how='outer', indicator=True)
+    dfInvoice = dfInvoice[['GSTIN of supplier', 'Trade/Legal name', 'Invoice Number', 'D-Invoice No.', 'Taxable Value (₹)', 'G-Taxable Value', 'A-Unit Name', '_merge']]
+    dfInvoice[dfInvoice['_merge'] == 'left_only'].to_csv('./ITC Files/ITC2BOnlyInvoice.csv', index=False)
+    dfInvoice[dfInvoice['_merge'] == 'right_only'].to_csv('./ITC Files/ITCDivisionOnlyInvoice.csv', index=False)
+
+    InvoiceOnlyArray = dfInvoiceAmount['D-Invoice No.'].to_numpy()
+    dfInvoice = dfInvoice.query("`D-Invoice No.` not in @InvoiceOnlyArray")
+    dfInvoice = dfInvoice.dropna(subset=['D-Invoice No.'])
+    dfInvoice.to_csv("./ITC Files/ITCInvoiceMatchAmountMismatch.csv",index=False)
 
 def inwardInvoiceMatching():
     messagebox.showinfo("Locate File (Excel Worksheet Format)", "Locate the 2B File")
@@ -168,11 +243,7 @@ def inwardInvoiceMatching():
         return
 
     try:
-        df2B = pd.read_excel(filePath2B, sheet_name="B2B", skiprows=4)
-        df2B.rename(columns={'Invoice Details': 'Invoice Number', 'Unnamed: 3': 'Invoice Type', 'Unnamed: 4': 'Invoice Date', 'Unnamed: 5': 'Invoice Value', 'Tax Amount': 'Integrated Tax', 'Unnamed: 10': 'Central Tax', 'Unnamed: 11' : 'State/UT Tax', 'Unnamed: 12' : 'Cess'}, inplace=True)
-        df2B.drop(index=0, inplace=True)
-        df2B['Taxable Value (₹)'] = df2B['Taxable Value (₹)'].astype('float64')
-        df2B['Invoice Number'] = df2B['Invoice Number'].astype('string')
+        df2B = load2BFile(filePath2B)
 
     except Exception as e:
         messagebox.showerror("Error", f"Problem in processing 2B File. \n{str(e)}")
@@ -186,30 +257,14 @@ def inwardInvoiceMatching():
         return
 
     try:
-        csvInwardSupply = pd.read_csv(filePathInwardSupply)
-        csvInwardSupply['D-Invoice No.'] = csvInwardSupply['D-Invoice No.'].astype('string')
-        csvInwardSupply['G-Taxable Value'] = csvInwardSupply['G-Taxable Value'].astype('float64')
+        csvInwardSupply = prepareInwardSupply(pd.read_csv(filePathInwardSupply))
 
     except Exception as e:
         messagebox.showerror("Error", f"Problem in processing Inward Supply File. \n{str(e)}")
         return
 
     try:
-        os.makedirs("./ITC Files", exist_ok=True)
-
-        dfInvoiceAmount = pd.merge(df2B, csvInwardSupply, left_on=['Invoice Number', 'Taxable Value (₹)'], right_on=['D-Invoice No.','G-Taxable Value'], how='inner')
-        dfInvoiceAmount = dfInvoiceAmount[['GSTIN of supplier', 'Trade/Legal name', 'Invoice Number', 'D-Invoice No.', 'Taxable Value (₹)', 'G-Taxable Value', 'A-Unit Name']]
-        dfInvoiceAmount.to_csv('./ITC Files/ITCInvoiceAndAmountMatched.csv', index=False)
-
-        dfInvoice = pd.merge(df2B, csvInwardSupply, left_on=['Invoice Number'], right_on=['D-Invoice No.'], how='outer', indicator=True)
-        dfInvoice = dfInvoice[['GSTIN of supplier', 'Trade/Legal name', 'Invoice Number', 'D-Invoice No.', 'Taxable Value (₹)', 'G-Taxable Value', 'A-Unit Name', '_merge']]
-        dfInvoice[dfInvoice['_merge'] == 'left_only'].to_csv('./ITC Files/ITC2BOnlyInvoice.csv', index=False)
-        dfInvoice[dfInvoice['_merge'] == 'right_only'].to_csv('./ITC Files/ITCDivisionOnlyInvoice.csv', index=False)
-
-        InvoiceOnlyArray = dfInvoiceAmount['D-Invoice No.'].to_numpy()
-        dfInvoice = dfInvoice.query("`D-Invoice No.` not in @InvoiceOnlyArray")
-        dfInvoice = dfInvoice.dropna(subset=['D-Invoice No.'])
-        dfInvoice.to_csv("./ITC Files/ITCInvoiceMatchAmountMismatch.csv",index=False)
+        inwardInvoiceReports(df2B, csvInwardSupply)
 
         print("Success")
         messagebox.showinfo("Success", "Required CSVs have been generated and are in the Invoice Matching Files folder")
@@ -228,15 +283,7 @@ def unitConsolidation():
         return
 
     try:
-        os.makedirs("./Consolidated Files", exist_ok=True)
-
-        listFilesRecursive(directoryPath)
-
-        stringsToCombine = ["Summary", "Outward Supply", "Reverse Charges", "GST-TDS", "Inward Supplies (ITC)", "Debit & Credit Note"]
-        for string in stringsToCombine:
-            # os.system("copy " + string + "\".csv" + " \"Combined " + string + "\".csv")
-            print("copy \".\\Consolidated Files\\*" + string + ".csv\" \".\\Consolidated Files\\Combined " + string + ".csv\"")
-            os.system("copy \".\\Consolidated Files\\*" + string + ".csv\" \".\\Consolidated Files\\Combined " + string + ".csv\"")
+        consolidateUnits(directoryPath)
 
         print("Success")
         messagebox.showinfo("Success", "Required CSVs have been generated and are in the Consolidated Files folder")
@@ -244,57 +291,58 @@ def unitConsolidation():
     except Exception as e:
         messagebox.showerror("Error", f"Problem in matching data. \n{str(e)}")
 
-def outwardSupplyProcessing():
-    browseFile()
-    filePath = filePathVariable.get()
-    if not filePath:
-        messagebox.showerror("Error", "Please select a file first.")
-        return
+def outwardSupplyReports(dfAll):
+    os.makedirs("./Outward Supply Files", exist_ok=True)
 
-    try:
-        os.makedirs("./Outward Supply Files", exist_ok=True)
+    columnsToFloat = ['J-Taxable Value included Mandi & Excluded TCS', 'K-IGST', 'L-CGST', 'M-SGST', 'N-Total Tax']
+    for columns in columnsToFloat:
+        dfAll[columns] = dfAll[columns].replace('NIL', '0', regex=True)
+        dfAll[columns] = dfAll[columns].replace('-', '0', regex=True)
+        dfAll[columns] = dfAll[columns].astype('float')
 
-        dfAll = pd.read_csv(filePath)
+    dfB2B = dfAll.loc[dfAll['B-GSTIN/UIN of Recipient'].str.len() == 15]
+    dfB2BTaxable = dfB2B.loc[dfB2B['N-Total Tax']>0]
+    dfB2BNil = dfB2B.loc[dfB2B['N-Total Tax']==0]
+    dfB2BTaxable.to_csv("./Outward Supply Files/OSB2BTaxable.csv", index=False)
+    dfB2BNil.to_csv("./Outward Supply Files/OSB2BNil.csv", index=False)
 
-        columnsToFloat = ['J-Taxable Value included Mandi & Excluded TCS', 'K-IGST', 'L-CGST', 'M-SGST', 'N-Total Tax']
-        for columns in columnsToFloat:
-            dfAll[columns] = dfAll[columns].replace('NIL', '0', regex=True)
-            dfAll[columns] = dfAll[columns].replace('-', '0', regex=True)
-            dfAll[columns] = dfAll[columns].astype('float')
+    dfB2C = dfAll.loc[dfAll['B-GSTIN/UIN of Recipient'].str.len() != 15]
+    dfB2CTaxable = dfB2C.loc[dfB2C['N-Total Tax']>0]
+    dfB2CNil = dfB2C.loc[dfB2C['N-Total Tax']==0]
+    dfB2CTaxable.to_csv("./Outward Supply Files/OSB2CTaxable.csv", index=False)
+    dfB2CNil.to_csv("./Outward Supply Files/OSB2CNil.csv", index=False)
+    dfB2CNilByGroup = dfB2CNil.groupby('A-UNIT NAME', as_index=False).sum()
+    dfB2CNilByGroup.to_csv("./Outward Supply Files/OSB2CNilByGroup.csv", index=False)
 
-        dfB2B = dfAll.loc[dfAll['B-GSTIN/UIN of Recipient'].str.len() == 15]
-        dfB2BTaxable = dfB2B.loc[dfB2B['N-Total Tax']>0]
-        dfB2BNil = dfB2B.loc[dfB2B['N-Total Tax']==0]
-        dfB2BTaxable.to_csv("./Outward Supply Files/OSB2BTaxable.csv", index=False)
-        dfB2BNil.to_csv("./Outward Supply Files/OSB2BNil.csv", index=False)
+    dfNil = pd.concat([dfB2BNil, dfB2CNil], axis=0, ignore_index=True)
 
-        dfB2C = dfAll.loc[dfAll['B-GSTIN/UIN of Recipient'].str.len() != 15]
-        dfB2CTaxable = dfB2C.loc[dfB2C['N-Total Tax']>0]
-        dfB2CNil = dfB2C.loc[dfB2C['N-Total Tax']==0]
-        dfB2CTaxable.to_csv("./Outward Supply Files/OSB2CTaxable.csv", index=False)
-        dfB2CNil.to_csv("./Outward Supply Files/OSB2CNil.csv", index=False)
-        dfB2CNilByGroup = dfB2CNil.groupby('A-UNIT NAME', as_index=False).sum()
-        dfB2CNilByGroup.to_csv("./Outward Supply Files/OSB2CNilByGroup.csv", index=False)
+    dfB2BTaxable = dfB2BTaxable.drop(['B-GSTIN/UIN of Recipient', 'C-Receiver Name', 'D-Invoice Number', 'E-Item wise Description  of Goods', 'F-Invoice date', 'G-Invoice Value', 'H-HSN Code', 'I- Rate'], axis=1)
+    dfB2CTaxable = dfB2CTaxable.drop(['B-GSTIN/UIN of Recipient', 'C-Receiver Name', 'D-Invoice Number', 'E-Item wise Description  of Goods', 'F-Invoice date', 'G-Invoice Value', 'H-HSN Code', 'I- Rate'], axis=1)
+    dfNil = dfNil.drop(['B-GSTIN/UIN of Recipient', 'C-Receiver Name', 'D-Invoice Number', 'E-Item wise Description  of Goods', 'F-Invoice date', 'G-Invoice Value', 'H-HSN Code', 'I- Rate'], axis=1)
 
-        dfNil = pd.concat([dfB2BNil, dfB2CNil], axis=0, ignore_index=True)
+    dfB2BTaxable = dfB2BTaxable.groupby('A-UNIT NAME', as_index=False).sum()
+    dfB2CTaxable = dfB2CTaxable.groupby('A-UNIT NAME', as_index=False).sum()
+    dfNil = dfNil.groupby('A-UNIT NAME', as_index=False).sum()
 
-        dfB2BTaxable = dfB2BTaxable.drop(['B-GSTIN/UIN of Recipient', 'C-Receiver Name', 'D-Invoice Number', 'E-Item wise Description  of Goods', 'F-Invoice date', 'G-Invoice Value', 'H-HSN Code', 'I- Rate'], axis=1)
-        dfB2CTaxable = dfB2CTaxable.drop(['B-GSTIN/UIN of Recipient', 'C-Receiver Name', 'D-Invoice Number', 'E-Item wise Description  of Goods', 'F-Invoice date', 'G-Invoice Value', 'H-HSN Code', 'I- Rate'], axis=1)
-        dfNil = dfNil.drop(['B-GSTIN/UIN of Recipient', 'C-Receiver Name', 'D-Invoice Number', 'E-Item wise Description  of Goods', 'F-Invoice date', 'G-Invoice Value', 'H-HSN Code', 'I- Rate'], axis=1)
+    dfB2BTaxable.rename(columns={'J-Taxable Value included Mandi & Excluded TCS': 'B2B'}, inplace=True)
+    dfB2CTaxable.rename(columns={'J-Taxable Value included Mandi & Excluded TCS': 'B2C'}, inplace=True)
+    dfNil.rename(columns={'J-Taxable Value included Mandi & Excluded TCS': 'Nil'}, inplace=True)
 
-        dfB2BTaxable = dfB2BTaxable.groupby('A-UNIT NAME', as_index=False).sum()
-        dfB2CTaxable = dfB2CTaxable.groupby('A-UNIT NAME', as_index=False).sum()
-        dfNil = dfNil.groupby('A-UNIT NAME', as_index=False).sum()
+    dfFinal = pd.concat([dfB2BTaxable, dfB2CTaxable, dfNil]).groupby(['A-UNIT NAME']).sum()
+    dfFinal['B2B+B2C Total'] = dfFinal['B2B'] + dfFinal['B2C']
+    dfFinal['B2B+B2C+Nil Total']= dfFinal['B2B+B2C Total'] + dfFinal['Nil']
 
-        dfB2BTaxable.rename(columns={'J-Taxable Value included Mandi & Excluded TCS': 'B2B'}, inplace=True)
-        dfB2CTaxable.rename(columns={'J-Taxable Value included Mandi & Excluded TCS': 'B2C'}, inplace=True)
-        dfNil.rename(columns={'J-Taxable Value included Mandi & Excluded TCS': 'Nil'}, inplace=True)
+    dfFinal.to_csv('./Outward Supply Files/OSAdvice.csv')
 
-        dfFinal = pd.concat([dfB2BTaxable, dfB2CTaxable, dfNil]).groupby(['A-UNIT NAME']).sum()
-        dfFinal['B2B+B2C Total'] = dfFinal['B2B'] + dfFinal['B2C']
-        dfFinal['B2B+B2C+Nil Total']= dfFinal['B2B+B2C Total'] + dfFinal['Nil']
+def outwardSupplyProcessing():
+    browseFile()
+    filePath = filePathVariable.get()
+    if not filePath:
+        messagebox.showerror("Error", "Please select a file first.")
+        return
 
-        dfFinal.to_csv('./Outward Supply Files/OSAdvice.csv')
+    try:
+        outwardSupplyReports(pd.read_csv(filePath))
 
         print("Success")
         messagebox.showinfo("Success", "Required CSVs have been generated and are in the Invoice Matching Files folder")
@@ -302,6 +350,31 @@ def outwardSupplyProcessing():
     except Exception as e:
         messagebox.showerror("Error", f"Problem in matching data. \n{str(e)}")
 
+def loadUKSoftFile(UKSoftFilePath):
+    dfUKSoftFile = pd.read_excel(UKSoftFilePath, sheet_name="Sheet1", skiprows=4)
+    dfUKSoftFile['Taxable Value'] = dfUKSoftFile['Total Amount Which Tax will be Calculated'].astype('float64')
+    dfUKSoftFile['Invoice No.'] = dfUKSoftFile['Invoice No.'].astype('string')
+    columnsToFloat = ['Taxable Value']
+    for columns in columnsToFloat:
+        dfUKSoftFile[columns] = dfUKSoftFile[columns].replace('NIL', '0', regex=True)
+        dfUKSoftFile[columns] = dfUKSoftFile[columns].replace('-', '0', regex=True)
+        dfUKSoftFile[columns] = dfUKSoftFile[columns].astype('float')
+    return dfUKSoftFile
+
+def outwardSupplyMatchReports(dfUKSoftFile, dfOS):
+    os.makedirs("./Outward Supply Matched Files", exist_ok=True)
+    columnsToFloat = ['J-Taxable Value included Mandi & Excluded TCS', 'K-IGST', 'L-CGST', 'M-SGST', 'N-Total Tax']
+    for columns in columnsToFloat:
+        dfOS[columns] = dfOS[columns].replace('NIL', '0', regex=True)
+        dfOS[columns] = dfOS[columns].replace('-', '0', regex=True)
+        dfOS[columns] = dfOS[columns].astype('float')
+
+    dfInvNoAndValueMatch = pd.merge(dfUKSoftFile, dfOS, left_on=['Invoice No.', 'Taxable Value'], right_on=['D-Invoice Number','J-Taxable Value included Mandi & Excluded TCS'], how='outer', indicator=True)
+    dfInvNoAndValueMatch = dfInvNoAndValueMatch[['B-GSTIN/UIN of Recipient', 'C-Receiver Name', 'Invoice No.', 'D-Invoice Number', 'Taxable Value', 'J-Taxable Value included Mandi & Excluded TCS', 'A-UNIT NAME' , 'K-IGST', 'L-CGST', 'M-SGST', 'N-Total Tax', '_merge']]
+    dfInvNoAndValueMatch[dfInvNoAndValueMatch['_merge'] == 'left_only'].to_csv("./Outward Supply Matched Files/UKSoftOnly.csv")
+    dfInvNoAndValueMatch[dfInvNoAndValueMatch['_merge'] == 'right_only'].to_csv("./Outward Supply Matched Files/CombinedOSOnly.csv")
+    dfInvNoAndValueMatch[dfInvNoAndValueMatch['_merge'] == 'both'].to_csv("./Outward Supply Matched Files/CommonOSUKSoft.csv")
+
 def outwardSupplyMatching():
     messagebox.showinfo("Locate File (Excel Worksheet Format)", "Locate the UKFDC Software File")
     browseFile()
@@ -310,14 +383,7 @@ def outwardSupplyMatching():
         messagebox.showerror("Error", "Please select a file first.")
         return
     try:
-        dfUKSoftFile = pd.read_excel(UKSoftFilePath, sheet_name="Sheet1", skiprows=4)
-        dfUKSoftFile['Taxable Value'] = dfUKSoftFile['Total Amount Which Tax will be Calculated'].astype('float64')
-        dfUKSoftFile['Invoice No.'] = dfUKSoftFile['Invoice No.'].astype('string')
-        columnsToFloat = ['Taxable Value']
-        for columns in columnsToFloat:
-            dfUKSoftFile[columns] = dfUKSoftFile[columns].replace('NIL', '0', regex=True)
-            dfUKSoftFile[columns] = dfUKSoftFile[columns].replace('-', '0', regex=True)
-            dfUKSoftFile[columns] = dfUKSoftFile[columns].astype('float')
+        dfUKSoftFile = loadUKSoftFile(UKSoftFilePath)
 
     except Exception as e:
         messagebox.showerror("Error", f"Problem in processing 2B File. \n{str(e)}")
@@ -331,19 +397,7 @@ def outwardSupplyMatching():
         return
 
     try:
-        os.makedirs("./Outward Supply Matched Files", exist_ok=True)
-        dfOS = pd.read_csv(filePathOutwardSupply)
-        columnsToFloat = ['J-Taxable Value included Mandi & Excluded TCS', 'K-IGST', 'L-CGST', 'M-SGST', 'N-Total Tax']
-        for columns in columnsToFloat:
-            dfOS[columns] = dfOS[columns].replace('NIL', '0', regex=True)
-            dfOS[columns] = dfOS[columns].replace('-', '0', regex=True)
-            dfOS[columns] = dfOS[columns].astype('float')
-
-        dfInvNoAndValueMatch = pd.merge(dfUKSoftFile, dfOS, left_on=['Invoice No.', 'Taxable Value'], right_on=['D-Invoice Number','J-Taxable Value included Mandi & Excluded TCS'], how='outer', indicator=True)
-        dfInvNoAndValueMatch = dfInvNoAndValueMatch[['B-GSTIN/UIN of Recipient', 'C-Receiver Name', 'Invoice No.', 'D-Invoice Number', 'Taxable Value', 'J-Taxable Value included Mandi & Excluded TCS', 'A-UNIT NAME' , 'K-IGST', 'L-CGST', 'M-SGST', 'N-Total Tax', '_merge']]
-        dfInvNoAndValueMatch[dfInvNoAndValueMatch['_merge'] == 'left_only'].to_csv("./Outward Supply Matched Files/UKSoftOnly.csv")
-        dfInvNoAndValueMatch[dfInvNoAndValueMatch['_merge'] == 'right_only'].to_csv("./Outward Supply Matched Files/CombinedOSOnly.csv")
-        dfInvNoAndValueMatch[dfInvNoAndValueMatch['_merge'] == 'both'].to_csv("./Outward Supply Matched Files/CommonOSUKSoft.csv")
+        outwardSupplyMatchReports(dfUKSoftFile, pd.read_csv(filePathOutwardSupply))
 
         # dfInvoice = pd.merge(df2B, csvInwardSupply, left_on=['Invoice Number'], right_on=['D-Invoice No.'], how='outer', indicator=True)
         # dfInvoice = dfInvoice[['GSTIN of supplier', 'Trade/Legal name', 'Invoice Number', 'D-Invoice No.', 'Taxable Value (₹)', 'G-Taxable Value', 'A-Unit Name', '_merge']]
@@ -360,11 +414,223 @@ def outwardSupplyMatching():
 
     except Exception as e:
         messagebox.showerror("Error", f"Problem in matching data. \n{str(e)}")
+
+# ---- Month-end pipeline ---- #
+# The six steps as one dependency graph: steps whose inputs are ready run at the
+# same time on threads, so they share the frames already loaded (the combined unit
+# files are parsed once and handed to every step that needs them). A step is skipped
+# when its source file(s), the steps it needs and this script are unchanged since its
+# last successful run and its output files still exist (see monthEndStateFile).
+monthEndStateFile = "./Month-End State.json"
+
+def runConsolidationStep(inputs, sources):
+    return consolidateUnits(sources["directory"])
+
+def loadConsolidationStep(inputs, sources):
+    return loadCombinedFiles()
+
+def run2BFileStep(inputs, sources):
+    return load2BFile(sources["2B"])
+
+def runUKSoftFileStep(inputs, sources):
+    return loadUKSoftFile(sources["UKSoft"])
+
+# steps running at the same time share the combined frames: copy one before changing it
+def runReverseChargesStep(inputs, sources):
+    reverseChargesReports(inputs["Consolidate Excels"]["Reverse Charges"])
+
+def runGSTStep(inputs, sources):
+    GSTReports(inputs["Consolidate Excels"]["GST-TDS"])
+
+def runOutwardSupplyStep(inputs, sources):
+    outwardSupplyReports(inputs["Consolidate Excels"]["Outward Supply"].copy())
+
+def runInwardInvoiceStep(inputs, sources):
+    csvInwardSupply = prepareInwardSupply(inputs["Consolidate Excels"]["Inward Supplies (ITC)"].copy())
+    inwardInvoiceReports(inputs["2B File"], csvInwardSupply)
+
+def runOutwardMatchingStep(inputs, sources):
+    outwardSupplyMatchReports(inputs["UKFDC Software File"], inputs["Consolidate Excels"]["Outward Supply"].copy())
+
+# step -> (run, load its saved outputs instead, steps it needs, source it reads, files it writes); in dependency order
+monthEndSteps = {
+    "Consolidate Excels": (runConsolidationStep, loadConsolidationStep, [], "directory",
+        [f"./Consolidated Files/Combined {string}.csv" for string in stringsToCombine]),
+    "2B File": (run2BFileStep, None, [], "2B", []),
+    "UKFDC Software File": (runUKSoftFileStep, None, [], "UKSoft", []),
+    "Reverse Charges Sheets": (runReverseChargesStep, None, ["Consolidate Excels"], None,
+        ["./Reverse Charges Files/RCMTotalOnly.csv", "./Reverse Charges Files/RCMTotalyByService.csv", "./Reverse Charges Files/RCMTotalyByServiceWithSubtotal.csv"]),
+    "GST Consolidation": (runGSTStep, None, ["Consolidate Excels"], None,
+        ["./GST-TDS Consolidation Files/GST-TDSandName.csv", "./GST-TDS Consolidation Files/GST-TDSOnly.csv"]),
+    "Outward Supply Processing": (runOutwardSupplyStep, None, ["Consolidate Excels"], None,
+        [f"./Outward Supply Files/{name}.csv" for name in ["OSB2BTaxable", "OSB2BNil", "OSB2CTaxable", "OSB2CNil", "OSB2CNilByGroup", "OSAdvice"]]),
+    "Inward Invoice": (runInwardInvoiceStep, None, ["Consolidate Excels", "2B File"], None,
+        [f"./ITC Files/{name}.csv" for name in ["ITCInvoiceAndAmountMatched", "ITC2BOnlyInvoice", "ITCDivisionOnlyInvoice", "ITCInvoiceMatchAmountMismatch"]]),
+    "Outward Supply Matching": (runOutwardMatchingStep, None, ["Consolidate Excels", "UKFDC Software File"], None,
+        [f"./Outward Supply Matched Files/{name}.csv" for name in ["UKSoftOnly", "CombinedOSOnly", "CommonOSUKSoft"]]),
+}
+
+# Path, size and modification time of a file, or of every unit workbook in a folder
+def sourceFingerprint(path):
+    if not os.path.isdir(path):
+        status = os.stat(path)
+        return [os.path.abspath(path), status.st_size, status.st_mtime_ns]
+    fingerprint = []
+    for folder, _, files in os.walk(path):
+        for name in sorted(files):
+            if name.endswith(excelExtensions):
+                status = os.stat(os.path.join(folder, name))
+                fingerprint.append([os.path.relpath(os.path.join(folder, name), path), status.st_size, status.st_mtime_ns])
+    return [os.path.abspath(path), sorted(fingerprint)]
+
+def monthEndKeys(sources):
+    with open(os.path.abspath(__file__), "rb") as f:
+        scriptHash = hashlib.sha256(f.read()).hexdigest()
+    keys = {}
+    for name, (run, load, needs, source, outputs) in monthEndSteps.items():
+        fingerprint = sourceFingerprint(sources[source]) if source else None
+        keyText = json.dumps([scriptHash, name, fingerprint, [keys[need] for need in needs]])
+        keys[name] = hashlib.sha256(keyText.encode("utf-8")).hexdigest()
+    return keys
+
+def readMonthEndState():
+    try:
+        with open(monthEndStateFile, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def timedStep(step, inputs, sources):
+    startTime = time.perf_counter()
+    value = step(inputs, sources)
+    return value, time.perf_counter() - startTime
+
+# Runs the whole month-end close; returns {step: (status, seconds)} with status ran / loaded / skipped / blocked / failed: <error>
+def runMonthEnd(directoryPath, filePath2B, UKSoftFilePath, workers=None, force=False):
+    sources = {"directory": directoryPath, "2B": filePath2B, "UKSoft": UKSoftFilePath}
+    for source, path in sources.items():
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"Input not found ({source}): {path}")
+
+    keys = monthEndKeys(sources)
+    state = readMonthEndState()
+
+    # steps with changed inputs or missing outputs, and everything that depends on them
+    stepsToRun = []
+    for name, (run, load, needs, source, outputs) in monthEndSteps.items():
+        changed = force or state.get(name) != keys[name] or not all(os.path.exists(output) for output in outputs)
+        if (outputs and changed) or any(need in stepsToRun for need in needs):
+            stepsToRun.append(name)
+
+    # a skipped step another step needs only loads what it produced before
+    actions = {}
+    for name in reversed(list(monthEndSteps)):
+        run, load, needs, source, outputs = monthEndSteps[name]
+        if name in stepsToRun:
+            actions[name] = run
+        elif any(name in monthEndSteps[other][2] for other in actions):
+            actions[name] = load or run
+
+    report = {name: ("skipped", 0.0) for name in monthEndSteps if name not in actions}
+    results = {}
+    failed = set()
+    pending = [name for name in monthEndSteps if name in actions]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers or len(monthEndSteps)) as pool:
+        running = {}
+        while pending or running:
+            for name in list(pending):
+                needs = monthEndSteps[name][2]
+                if any(need in failed for need in needs):
+                    pending.remove(name)
+                    failed.add(name)
+                    report[name] = ("blocked", 0.0)
+                elif all(need in results for need in needs):
+                    pending.remove(name)
+                    inputs = {need: results[need] for need in needs}
+                    running[pool.submit(timedStep, actions[name], inputs, sources)] = name
+            if not running:
+                break
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name], seconds = future.result()
+                    report[name] = ("ran" if name in stepsToRun else "loaded", seconds)
+                    print(f"{name}: {report[name][0]} in {seconds:.2f}s")
+                except Exception as e:
+                    failed.add(name)
+                    report[name] = (f"failed: {e}", 0.0)
+                    print(f"{name}: failed: {e}")
+
+    for name in stepsToRun:
+        if name in failed:
+            state.pop(name, None)
+        else:
+            state[name] = keys[name]
+    with open(monthEndStateFile, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    return {name: report[name] for name in monthEndSteps}
+
+def formatMonthEndReport(report):
+    return "\n".join(f"{name}: {status}" + (f" ({seconds:.1f}s)" if seconds else "") for name, (status, seconds) in report.items())
+
+def monthEndClose():
+    messagebox.showinfo("Locate Folder", "Locate the folder with the unit workbooks")
+    browseDirectory()
+    directoryPath = directoryPathVariable.get()
+    if not directoryPath:
+        messagebox.showerror("Error", "Please select a folder first.")
+        return
+
+    messagebox.showinfo("Locate File (Excel Worksheet Format)", "Locate the 2B File")
+    browseFile()
+    filePath2B = filePathVariable.get()
+    if not filePath2B:
+        messagebox.showerror("Error", "Please select a file first.")
+        return
+
+    messagebox.showinfo("Locate File (Excel Worksheet Format)", "Locate the UKFDC Software File")
+    browseFile()
+    UKSoftFilePath = filePathVariable.get()
+    if not UKSoftFilePath:
+        messagebox.showerror("Error", "Please select a file first.")
+        return
+
+    try:
+        report = runMonthEnd(directoryPath, filePath2B, UKSoftFilePath)
+    except Exception as e:
+        messagebox.showerror("Error", f"Problem in month-end close. \n{str(e)}")
+        return
+
+    if any(status.startswith("failed") or status == "blocked" for status, _ in report.values()):
+        messagebox.showerror("Error", f"Some steps did not finish.\n\n{formatMonthEndReport(report)}")
+    else:
+        print("Success")
+        messagebox.showinfo("Success", f"Month-end close finished.\n\n{formatMonthEndReport(report)}")
+
+def parseArguments(arguments):
+    parser = argparse.ArgumentParser(description="GST month-end close. Without --month-end the window opens.")
+    parser.add_argument("--month-end", dest="directoryPath", metavar="FOLDER", help="folder with the unit workbooks")
+    parser.add_argument("--file-2b", dest="filePath2B", metavar="FILE", help="2B Excel file")
+    parser.add_argument("--uksoft", dest="UKSoftFilePath", metavar="FILE", help="UKFDC Software Excel file")
+    parser.add_argument("--workers", type=int, help="steps run at the same time (default: all that are ready)")
+    parser.add_argument("--force", action="store_true", help="run every step, even if its inputs are unchanged")
+    parsed = parser.parse_args(arguments)
+    if parsed.directoryPath and not (parsed.filePath2B and parsed.UKSoftFilePath):
+        parser.error("--month-end needs --file-2b and --uksoft")
+    return parsed
+
 def closeApp():
     root.quit()
 
 if __name__ == '__main__':
 
+    arguments = parseArguments(sys.argv[1:])
+    if arguments.directoryPath:
+        report = runMonthEnd(arguments.directoryPath, arguments.filePath2B, arguments.UKSoftFilePath, arguments.workers, arguments.force)
+        print(formatMonthEndReport(report))
+        sys.exit(1 if any(status.startswith("failed") or status == "blocked" for status, _ in report.values()) else 0)
+
     root = tk.Tk()
     root.title("GST, Reverse Charge, Inward Invoice, Full Consolidation")
     root.geometry("600x500")
@@ -390,6 +656,9 @@ if __name__ == '__main__':
     outwardSupplyButton = tk.Button(root, text="Outward Supply Matching", command=outwardSupplyMatching)
     outwardSupplyButton.pack(pady=5)
 
+    monthEndButton = tk.Button(root, text="Month-End Close (all steps)", command=monthEndClose)
+    monthEndButton.pack(pady=5)
+
     closeButton = tk.Button(root, text="Close", command=closeApp)
     closeButton.pack(pady=5)
 
@@ -1,53 +1,119 @@
 """
 
 - user inputs:
-  Symbol, Timeframe (daily/intraday), CSV (optional), Start, End, Cash, Commission
+  Symbol, Timeframe (daily/intraday or resampled 5m/15m/1h/4h), CSV (optional), Start, End, Cash, Commission
 - Has a Strategy Prompt box
-- Has a Strategy Code box
-- Displays Metrics and Trades and a final interactive chart (plotted via backtest.py)
+- Has a Strategy Code box, checked in the background while typing (syntax, `Strategy`
+  class, `init`/`next`); broken code is rejected before a run starts
+- Backtests run in a warm worker process (workerpool.py), so the window stays responsive
+  and a crashing or hanging strategy only costs that worker, which is restarted
+- Metrics tab can add Monte Carlo confidence intervals for return, drawdown and Sharpe:
+  the run's trades or daily returns are resampled thousands of times without re-running
+  the strategy (robustness.py)
+- Displays Metrics and Trades; the interactive chart (plotted via backtest.py) is rendered
+  on demand in the background, optionally downsampled, and shown in the Chart tab
 - If CSV is provided, it is loaded to a DataFrame; else it tries `backtesting.test.<SYMBOL>`
   (e.g., GOOG). If not found, falls back to GOOG.
+- Batch tab runs the same strategy over many symbols / a folder of CSVs in parallel
+  processes (per-run timeout) and combines the metrics into one comparison table
+- Optimize tab sweeps strategy class attributes (grid / random / SAMBO) on a process
+  pool and streams results into a sortable table, with an optional heatmap
+- Walk-Forward tab optimises on rolling (or anchored) training windows and trades the
+  winner on the next out-of-sample window, folds in parallel processes (walkforward.py);
+  shows per-fold results, stitched out-of-sample metrics and the equity curve
+- Portfolio tab runs one strategy (its `signals()`) over several assets with shared cash,
+  a per-asset weight cap and optional periodic rebalancing (portfolio.py); shows portfolio
+  metrics, per-asset contribution, trades and the equity curve
+- Replay tab feeds bars one at a time (the loaded data at a set pace, a CSV another
+  process appends to, or a local socket feed) into the strategy for paper trading
+  (replay.py): indicators update incrementally, so each bar costs the same whatever the
+  history length; orders, equity, position and trades update live
+- Engine selector: strategies with a `signals()` method can run on the vectorized
+  engine (vectorized.py), which is much faster for runs and sweeps
+- Every run is recorded in a local history (runstore.py: SQLite + columnar blobs); an
+  identical config (fields, strategy source, CSV version) is served from it instantly, and
+  the History tab lists, reloads, compares and deletes past runs
+- Each run's time per phase (compile, load, smoke test, run, metrics, tables, chart) is
+  written to the Logs tab and can be exported as CSV (File > Export Timings)
+- Starts fast: the window is built from Qt alone and painted first; pandas, backtesting.py
+  and the worker process load in the background right after (see startup_bench.py)
+- Runs, sweeps and batches report progress (bars / combinations / runs, elapsed, ETA)
+  in the status bar and can be stopped with Cancel (Esc)
 
 TODO :
 - currently only working with GOOG, trying to get a custom ticker working
-- add a code validator to perform a "pre-check" if the code will run or fail
-- backtesting.py is the backend, so there are more options to add such as optimisation for a given metric
 - other features as I learn and explore the backtesting.py libary
 """
 
 from __future__ import annotations
 
+import os
 import sys
-import types
-import traceback
-import pandas as pd
-from backtesting import Backtest
-from backtesting import Strategy as BTStrategy
-import backtesting.test
-from dataclasses import dataclass
-from typing import Optional, Tuple
+import time
+import statistics
+import collections
+import importlib
+import threading
+import numbers
+from typing import TYPE_CHECKING, Optional
+
+# Only Qt and plain option lists load before the window paints. pandas,
+# backtesting.py (and with it Bokeh) and the sample datasets take about a second;
+# they are imported in the handlers that need them and warmed up in the
+# background after the first paint (WarmUpWorker).
+from choices import (
+    DEFAULT_STRATEGY_CODE,
+    ENGINES,
+    METHODS,
+    METRIC_KEYS,
+    PLOT_RESAMPLE,
+    REBALANCE,
+    REPLAY_SOURCES,
+    ROBUSTNESS_METHODS,
+    TARGET_METRICS,
+    TIMEFRAMES,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    from core import RunConfig, RunResult
+    from optimizer import OptimizeConfig
+    from portfolio import PortfolioConfig
+    from robustness import RobustnessConfig
+    from runstore import RunStore
+    from walkforward import WalkForwardConfig
+    from workerpool import WorkerPool
 
 from PyQt6.QtCore import (
     Qt,
+    QAbstractTableModel,
+    QModelIndex,
     QDate,
     QSettings,
     QThread,
+    QTimer,
+    QUrl,
     pyqtSignal,
     QRegularExpression,
 )
 from PyQt6.QtGui import (
     QAction,
     QColor,
+    QDesktopServices,
     QFont,
     QSyntaxHighlighter,
     QTextCharFormat,
     QTextOption,
 )
 from PyQt6.QtWidgets import (
+    QAbstractItemView,
     QApplication,
+    QCheckBox,
     QFileDialog,
     QFormLayout,
     QHBoxLayout,
+    QHeaderView,
     QLabel,
     QLineEdit,
     QMainWindow,
@@ -58,6 +124,7 @@ from PyQt6.QtWidgets import (
     QSplitter,
     QStatusBar,
     QTabWidget,
+    QTableView,
     QTableWidget,
     QTableWidgetItem,
     QToolBar,
@@ -65,184 +132,26 @@ from PyQt6.QtWidgets import (
     QWidget,
     QDateEdit,
     QComboBox,
+    QDoubleSpinBox,
+    QSpinBox,
 )
 
+try:  # optional: embeds charts in the window instead of a browser
+    from PyQt6.QtWebEngineWidgets import QWebEngineView
+except ImportError:
+    QWebEngineView = None
 
-# --------------------------- Config model --------------------------- #
-@dataclass
-class RunConfig:
-    symbol: str
-    timeframe: str
-    csv_path: Optional[str]
-    start_date_iso: str
-    end_date_iso: str
-    cash: float
-    commission: float
-    strategy_code: str
-
-
-# --------------------------- Strategy loader ------------------------ #
-
+# Imported by WarmUpWorker once the window is up, slowest first
+WARM_UP_MODULES = ["core", "backtesting.test", "optimizer", "walkforward", "batch", "portfolio", "replay", "robustness", "workerpool"]
 
-# TODO add the libraries so that they are imported implicityly and need not be mentioned in the strategy dialogbox
-class RunError(Exception):
-    pass
 
-
-def load_strategy_from_source(source: str):
-    """
-    Execute user-supplied code and return the Strategy class.
-    The code must define: class Strategy(backtesting.Strategy): ...
-    """
-    module = types.ModuleType("user_strategy")
+def __getattr__(name: str):
+    """Names GUI.py used to re-export from core (`from GUI import runBackTest`), loaded on use."""
+    core = importlib.import_module("core")
     try:
-        exec(source, module.__dict__)  # noqa: S102 (intentional: local execution)
-    except Exception as exc:  # bubble error with traceback
-        raise RunError(f"Strategy code error:\n{traceback.format_exc()}") from exc
-
-    Strategy = getattr(module, "Strategy", None)
-    if Strategy is None or not isinstance(Strategy, type):
-        raise RunError(
-            "No class named 'Strategy' found.\n"
-            "Please define: `class Strategy(backtesting.Strategy): ...`"
-        )
-    # Optional: sanity check that it subclasses BTStrategy
-    if not issubclass(Strategy, BTStrategy):
-        raise RunError("`Strategy` must subclass backtesting.Strategy.")
-    return Strategy
-
-
-# --------------------------- Data loading --------------------------- #
-def load_data_frame(cfg: RunConfig) -> pd.DataFrame:
-    """
-    Load OHLCV dataframe with DateTimeIndex and columns: Open, High, Low, Close, Volume.
-    - If csv_path is provided, read CSV and normalize.
-    - Else, attempt to load from backtesting.test by symbol (uppercased).
-    - Finally, fallback to bt_test.GOOG.
-    """
-    print(f"{cfg.csv_path=}")
-    if cfg.csv_path:
-        df = pd.read_csv(cfg.csv_path)
-        # Identify datetime column
-        for dt_col in ("Date", "Datetime", "date", "timestamp", "Timestamp"):
-            if dt_col in df.columns:
-                df[dt_col] = pd.to_datetime(df[dt_col])
-                df = df.set_index(dt_col)
-                break
-        if not isinstance(df.index, pd.DatetimeIndex):
-            raise RunError(
-                "CSV must include a Date/Datetime column to use as the index."
-            )
-
-        # Normalize columns to expected names
-        colmap_lower = {c.lower(): c for c in df.columns}
-
-        def pick(*names):
-            for n in names:
-                if n in df.columns:
-                    return n
-                if n.lower() in colmap_lower:
-                    return colmap_lower[n.lower()]
-            return None
-
-        req = {
-            "Open": pick("Open"),
-            "High": pick("High"),
-            "Low": pick("Low"),
-            "Close": pick("Close", "Adj Close", "AdjClose"),
-            "Volume": pick("Volume", "Vol"),
-        }
-        missing = [k for k, v in req.items() if v is None]
-        if missing:
-            raise RunError(f"CSV missing required columns: {', '.join(missing)}")
-
-        df = df[
-            [req["Open"], req["High"], req["Low"], req["Close"], req["Volume"]]
-        ].copy()
-        df.columns = ["Open", "High", "Low", "Close", "Volume"]
-
-    else:
-        # Try dynamic dataset from backtesting.test
-        sym = (cfg.symbol or "GOOG").strip()
-        df = getattr(backtesting.test, sym)
-        print(f"{df=}")
-        return df
-
-    # Date filter (if possible)
-    try:
-        df = df.loc[cfg.start_date_iso : cfg.end_date_iso]
-    except Exception:
-        pass
-    try:
-        # Ensure required columns exist
-        expected_cols = {"Open", "High", "Low", "Close", "Volume"}
-        if expected_cols.issubset(set(df.columns)):
-            return df
-    except Exception:
-        print("Error generating test dataframe")
-    return None
-
-
-# --------------------------- Backtest runner ------------------------ #
-def runBackTest(cfg: RunConfig) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    """
-    Run a backtest with Backtesting.py.
-    Returns:
-      metrics_df: a 2-col DataFrame [Metric, Value]
-      trades_df:  a DataFrame built from output._trades (if available)
-    """
-    # Compile strategy
-    Strategy = load_strategy_from_source(cfg.strategy_code)
-
-    # Load data
-    data = load_data_frame(cfg)
-    print(f"{data=}")
-    # TODO if data is empty switch to using bt_test
-    # Backtesting
-    # print(backtesting.test.GOOG)
-    bt = Backtest(
-        data,
-        # backtesting.test.GOOG,
-        Strategy,
-        cash=cfg.cash,
-        commission=cfg.commission,  # e.g., 0.001 means 0.1%
-        exclusive_orders=True,
-        # finalize_trades=True,
-    )
-
-    output = bt.run()
-    bt.plot(open_browser=True)
-
-    # Build metrics DataFrame for display
-    metrics_items = []
-    for key in [
-        "Equity Final [$]",
-        "Equity Peak [$]",
-        "Return [%]",
-        "Buy & Hold Return [%]",
-        "# Trades",
-        "Win Rate [%]",
-        "Best Trade [%]",
-        "Worst Trade [%]",
-        "Avg. Trade [%]",
-        "Max. Drawdown [%]",
-        "Sharpe Ratio",
-        "Sortino Ratio",
-    ]:
-        if key in output:
-            metrics_items.append((key, output[key]))
-    metrics_df = pd.DataFrame(metrics_items, columns=["Metric", "Value"])
-
-    # Trades DataFrame (if present)
-    if hasattr(output, "_trades") and isinstance(output._trades, pd.DataFrame):
-        trades_df = output._trades.copy()
-    else:
-        trades_df = pd.DataFrame(
-            columns=["EntryTime", "ExitTime", "EntryPrice", "ExitPrice", "PnL"]
-        )
-
-    return metrics_df, trades_df
-
+        return getattr(core, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
 
 # --------------------------- UI helpers ----------------------------- #
 class PythonHighlighter(QSyntaxHighlighter):
@@ -325,38 +234,491 @@ class PythonHighlighter(QSyntaxHighlighter):
                 self.setFormat(m.capturedStart(), m.capturedLength(), qfmt)
 
 
-def df_to_table(table: QTableWidget, df: pd.DataFrame) -> None:
+class DataFrameModel(QAbstractTableModel):
+    """
+    Read-only table model over a DataFrame for QTableView.
+
+    Cells are formatted only when the view asks for them (i.e. visible rows), so
+    frames of any length display instantly. Sorting and filtering reorder a
+    positional row index; the frame itself is never copied.
+    """
+
+    def __init__(self, df: Optional[pd.DataFrame] = None, columns: Optional[list] = None, parent=None):
+        super().__init__(parent)
+        self._df = None  # no frame yet: just the `columns` headers (no pandas needed)
+        self._columns: list = list(columns or [])
+        self._values: list = []  # one numpy array per column
+        self._text: Optional[list] = None  # lower-cased cell text, for filtering
+        self._order = range(0)  # visible row -> frame row (an array once there is a frame)
+        self._sort: Optional[tuple] = None
+        self._filter = ""
+        if df is not None:
+            self.set_frame(df)
+
+    def set_frame(self, df: pd.DataFrame) -> None:
+        self.beginResetModel()
+        self._df = df
+        self._columns = [str(c) for c in df.columns]
+        self._values = [df.iloc[:, c].to_numpy() for c in range(df.shape[1])]
+        self._text = None
+        self._sort = None
+        self._order = self._filtered_rows()
+        self.endResetModel()
+
+    def clear(self) -> None:
+        """Drop the frame, keeping the column headers."""
+        self.beginResetModel()
+        self._df = None
+        self._values = []
+        self._text = None
+        self._order = range(0)
+        self.endResetModel()
+
+    def frame(self) -> pd.DataFrame:
+        """The rows currently shown, in display order."""
+        import pandas as pd
+
+        if self._df is None:
+            return pd.DataFrame(columns=self._columns)
+        return self._df.iloc[self._order]
+
+    # ----- Qt model interface -----
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        val = self._values[index.column()][self._order[index.row()]]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return format_cell(val)
+        if role == Qt.ItemDataRole.TextAlignmentRole and isinstance(val, numbers.Number):
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._columns[section] if section < len(self._columns) else None
+        return str(section + 1)
+
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder) -> None:
+        if not 0 <= column < len(self._columns):
+            return
+        self.layoutAboutToBeChanged.emit()
+        self._sort = (column, order)
+        if self._df is not None:
+            self._order = self._sorted(self._order)
+        self.layoutChanged.emit()
+
+    # ----- filtering -----
+    def set_filter(self, text: str) -> None:
+        """Keep rows where any cell contains `text` (case-insensitive)."""
+        self.beginResetModel()
+        self._filter = text.strip().lower()
+        self._order = self._filtered_rows()
+        self.endResetModel()
+
+    def _filtered_rows(self) -> np.ndarray:
+        import numpy as np
+
+        rows = np.arange(0 if self._df is None else len(self._df))
+        if self._filter and len(rows):
+            if self._text is None:  # built on first filter, reused while typing
+                self._text = [
+                    np.char.lower(self._df.iloc[:, c].astype(str).to_numpy(dtype=str))
+                    for c in range(len(self._columns))
+                ]
+            mask = np.zeros(len(rows), dtype=bool)
+            for text in self._text:
+                mask |= np.char.find(text, self._filter) >= 0
+            rows = rows[mask]
+        return self._sorted(rows) if self._sort is not None else rows
+
+    def _sorted(self, rows: np.ndarray) -> np.ndarray:
+        import pandas as pd
+
+        column, order = self._sort
+        keys = pd.Series(self._values[column][rows])
+        ascending = order == Qt.SortOrder.AscendingOrder
+        try:
+            ranked = keys.sort_values(ascending=ascending, kind="stable", na_position="last")
+        except TypeError:  # mixed types: compare as text
+            ranked = keys.map(format_cell).sort_values(ascending=ascending, kind="stable")
+        return rows[ranked.index.to_numpy()]
+
+
+def format_cell(val) -> str:
+    import numpy as np
+    import pandas as pd  # loaded by the time there are cells to show
+
+    if val is None or (not isinstance(val, (str, bytes)) and np.ndim(val) == 0 and pd.isna(val)):
+        return ""
+    if isinstance(val, (float, np.floating)):
+        return f"{val:.6g}" if abs(val) < 1e6 else f"{val:,.2f}"
+    return str(val)
+
+
+def make_table_view(model: DataFrameModel) -> QTableView:
+    view = QTableView()
+    view.setModel(model)
+    view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+    view.setSortingEnabled(True)
+    view.horizontalHeader().setStretchLastSection(True)
+    view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+    view.verticalHeader().setDefaultSectionSize(22)
+    view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    view.setAlternatingRowColors(True)
+    return view
+
+
+def append_table_row(table: QTableWidget, columns: list, row: dict) -> None:
+    """Append one result row to a sortable table while results are streaming in."""
+    import pandas as pd
+
+    # sorting would move rows while we fill them, so pause it
+    table.setSortingEnabled(False)
+    r = table.rowCount()
+    table.insertRow(r)
+    for c, key in enumerate(columns):
+        val = row.get(key)
+        item = QTableWidgetItem()
+        if isinstance(val, (int, float)) and not pd.isna(val):
+            item.setData(Qt.ItemDataRole.DisplayRole, val)  # sorts numerically
+        else:
+            item.setText("" if val is None or pd.isna(val) else str(val))
+        table.setItem(r, c, item)
+    table.setSortingEnabled(True)
+
+
+def reset_table(table: QTableWidget, columns: list) -> None:
+    table.setSortingEnabled(False)
     table.clear()
-    # Set headers
-    table.setColumnCount(len(df.columns))
-    table.setRowCount(len(df))
-    table.setHorizontalHeaderLabels([str(c) for c in df.columns])
-    # Fill
-    for r in range(len(df)):
-        for c in range(len(df.columns)):
-            val = df.iat[r, c]
-            item = QTableWidgetItem("" if pd.isna(val) else str(val))
-            table.setItem(r, c, item)
-    table.resizeColumnsToContents()
-    table.horizontalHeader().setStretchLastSection(True)
+    table.setRowCount(0)
+    table.setColumnCount(len(columns))
+    table.setHorizontalHeaderLabels(columns)
 
 
 # --------------------------- Worker thread -------------------------- #
-class RunWorker(QThread):
-    done = pyqtSignal(pd.DataFrame, pd.DataFrame)  # metrics_df, trades_df
+def format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    h, rem = divmod(seconds, 3600)
+    return f"{h}:{rem // 60:02d}:{rem % 60:02d}" if h else f"{rem // 60}:{rem % 60:02d}"
+
+
+class JobWorker(QThread):
+    """Cancellable background job; subclasses implement `work()`."""
+
+    label = "Job"
+    unit = "steps"
+    progress = pyqtSignal(int, int)  # done, total (total 0 = unknown)
     errored = pyqtSignal(str)
+    cancelled = pyqtSignal()
 
-    def __init__(self, cfg: RunConfig):
+    def __init__(self):
         super().__init__()
-        self.cfg = cfg
+        self.cancel_event = threading.Event()
+        self.started_at = time.perf_counter()
+        self.first_report = None  # (time, done) of the first progress report, for the ETA
+
+    def cancel(self):
+        self.cancel_event.set()
 
     def run(self):
+        from core import RunCancelled
+
         try:
-            metrics_df, trades_df = runBackTest(self.cfg)
-            self.done.emit(metrics_df, trades_df)
+            self.work()
+        except RunCancelled:
+            self.cancelled.emit()
         except Exception as exc:
             self.errored.emit(str(exc))
 
+    def work(self):
+        raise NotImplementedError
+
+    def status_text(self, done: int, total: int) -> str:
+        now = time.perf_counter()
+        elapsed = format_duration(now - self.started_at)
+        if total <= 0:
+            return f"{self.label}: running · {elapsed} elapsed"
+        if self.first_report is None:
+            self.first_report = (now, done)
+        t0, d0 = self.first_report
+        eta = ""
+        if done > d0 and now > t0:
+            eta = f" · ETA {format_duration((total - done) * (now - t0) / (done - d0))}"
+        return f"{self.label}: {done:,}/{total:,} {self.unit} · {elapsed} elapsed{eta}"
+
+
+class RunWorker(JobWorker):
+    label = "Backtest"
+    unit = "bars"
+    done = pyqtSignal(object)  # RunResult (stats only; no chart)
+
+    def __init__(self, cfg: RunConfig, pool: WorkerPool, store: RunStore, reuse: bool = True):
+        super().__init__()
+        self.cfg = cfg
+        self.pool = pool
+        self.store = store
+        self.reuse = reuse
+        self.history_id = None
+        self.cached = False
+        self.store_error = None  # the run still counts if it cannot be recorded
+
+    def work(self):
+        if self.reuse:
+            hit = self.store.lookup(self.cfg)
+            if hit is not None:
+                self.history_id, result = hit
+                result.timings["history"] = time.perf_counter() - self.started_at
+                self.cached = True
+                self.done.emit(result)
+                return
+        # the backtest itself runs in a warm worker process, off the GUI's GIL
+        started = time.perf_counter()
+        result = self.pool.run(self.cfg, progress=self.progress.emit, cancel=self.cancel_event)
+        seconds = time.perf_counter() - started
+        # waiting for a (re)starting worker and moving the result over the pipe
+        result.timings["worker"] = max(0.0, seconds - sum(result.timings.values()))
+        try:
+            t0 = time.perf_counter()
+            self.history_id = self.store.record(self.cfg, result, seconds)
+            result.timings["history"] = time.perf_counter() - t0
+        except Exception as exc:
+            self.store_error = f"Run not saved to history: {type(exc).__name__}: {exc}"
+        self.done.emit(result)
+
+
+class RobustnessWorker(JobWorker):
+    label = "Monte Carlo"
+    unit = "samples"
+    done = pyqtSignal(object)  # RobustnessResult
+
+    def __init__(self, result: RunResult, rcfg: RobustnessConfig, cash: Optional[float]):
+        super().__init__()
+        self.result = result
+        self.rcfg = rcfg
+        self.cash = cash
+
+    def work(self):
+        from robustness import run_robustness
+
+        out = run_robustness(
+            self.result.equity,
+            self.result.trades_df,
+            self.rcfg,
+            cash=self.cash,
+            progress=self.progress.emit,
+            cancel=self.cancel_event,
+        )
+        self.done.emit(out)
+
+
+class PlotWorker(QThread):
+    done = pyqtSignal(str)  # path of the rendered HTML
+    errored = pyqtSignal(str)
+
+    def __init__(self, result: RunResult, resample: str, pool: WorkerPool, cfg: Optional[RunConfig] = None):
+        super().__init__()
+        self.result = result
+        self.resample = resample
+        self.pool = pool
+        self.cfg = cfg  # to re-run a result from history, which keeps no Backtest object
+
+    def run(self):
+        self.started_at = time.perf_counter()
+        try:
+            if self.result.run_id is None and self.result.bt is None and self.cfg is not None:
+                self.result.run_id = self.pool.run(self.cfg, smoke=False, frames=False).run_id
+            if self.result.run_id is not None:  # rendered by the worker holding the run
+                self.done.emit(self.pool.plot(self.result.run_id, resample=self.resample))
+            else:
+                from core import render_plot
+
+                self.done.emit(render_plot(self.result, resample=self.resample))
+        except Exception as exc:
+            self.errored.emit(f"{type(exc).__name__}: {exc}")
+
+
+class ValidateWorker(QThread):
+    checked = pyqtSignal(str, list)  # source, problems
+
+    def __init__(self, source: str):
+        super().__init__()
+        self.source = source
+
+    def run(self):
+        try:
+            from core import validate_strategy_source
+
+            problems = validate_strategy_source(self.source)
+        except Exception as exc:
+            problems = [f"{type(exc).__name__}: {exc}"]
+        self.checked.emit(self.source, problems)
+
+
+class OptimizeWorker(JobWorker):
+    label = "Optimization"
+    unit = "combinations"
+    row = pyqtSignal(dict)  # one evaluated parameter combination
+    done = pyqtSignal(object)  # DataFrame of all results, best first
+
+    def __init__(self, cfg: RunConfig, opt: OptimizeConfig):
+        super().__init__()
+        self.cfg = cfg
+        self.opt = opt
+
+    def work(self):
+        from optimizer import run_sweep
+
+        results = run_sweep(
+            self.cfg,
+            self.opt,
+            on_result=self.row.emit,
+            progress=self.progress.emit,
+            cancel=self.cancel_event,
+        )
+        self.done.emit(results)
+
+
+class BatchWorker(JobWorker):
+    label = "Batch"
+    unit = "runs"
+    row = pyqtSignal(dict)  # one finished symbol
+    done = pyqtSignal(object)  # DataFrame comparison table
+
+    def __init__(self, sources: list, workers: int, timeout: Optional[float]):
+        super().__init__()
+        self.sources = sources
+        self.workers = workers
+        self.timeout = timeout
+
+    def work(self):
+        from batch import run_batch
+
+        results = run_batch(
+            self.sources, self.workers, self.timeout, on_result=self.row.emit, cancel=self.cancel_event
+        )
+        self.done.emit(results)
+
+
+class WalkForwardWorker(JobWorker):
+    label = "Walk-forward"
+    unit = "folds"
+    fold = pyqtSignal(dict)  # one finished fold
+    done = pyqtSignal(object)  # WalkForwardResult
+
+    def __init__(self, cfg: RunConfig, opt: OptimizeConfig, wf: WalkForwardConfig):
+        super().__init__()
+        self.cfg = cfg
+        self.opt = opt
+        self.wf = wf
+
+    def work(self):
+        from walkforward import run_walk_forward
+
+        result = run_walk_forward(
+            self.cfg,
+            self.opt,
+            self.wf,
+            on_fold=self.fold.emit,
+            progress=self.progress.emit,
+            cancel=self.cancel_event,
+        )
+        self.done.emit(result)
+
+
+class PortfolioWorker(JobWorker):
+    label = "Portfolio"
+    unit = "asset steps"
+    done = pyqtSignal(object)  # PortfolioResult
+
+    def __init__(self, cfg: RunConfig, symbols: list, folder: Optional[str], pcfg: PortfolioConfig):
+        super().__init__()
+        self.cfg = cfg
+        self.symbols = symbols
+        self.folder = folder
+        self.pcfg = pcfg
+
+    def work(self):
+        from portfolio import run_portfolio
+
+        result = run_portfolio(
+            self.cfg, self.symbols, self.folder, self.pcfg, progress=self.progress.emit, cancel=self.cancel_event
+        )
+        self.done.emit(result)
+
+
+class ReplayWorker(JobWorker):
+    label = "Replay"
+    unit = "bars"
+    tick = pyqtSignal(object)  # session snapshot plus the trades closed since the last tick
+    done = pyqtSignal(object)  # ReplayResult
+
+    TICK_INTERVAL = 0.1  # seconds between GUI updates, however fast bars arrive
+
+    def __init__(self, cfg: RunConfig, source: str, target: Optional[str], history_bars: int, speed: float):
+        super().__init__()
+        self.cfg = cfg
+        self.source = source
+        self.target = target
+        self.history_bars = history_bars
+        self.speed = speed
+        self.session = None
+        self.sent_trades = 0
+        self.last_tick = 0.0
+        self.latencies = collections.deque(maxlen=500)
+
+    def work(self):
+        from replay import run_replay
+
+        result = run_replay(
+            self.cfg,
+            self.source,
+            self.target,
+            history_bars=self.history_bars,
+            speed=self.speed,
+            on_bar=self._on_bar,
+            cancel=self.cancel_event,
+        )
+        if self.session is not None:
+            self._emit_tick()
+        self.done.emit(result)
+
+    def _on_bar(self, session, seconds: float):
+        self.session = session
+        self.latencies.append(seconds)
+        if time.perf_counter() - self.last_tick >= self.TICK_INTERVAL:
+            self._emit_tick()
+
+    def _emit_tick(self):
+        self.last_tick = time.perf_counter()
+        snap = self.session.snapshot()
+        snap["new_trades"] = self.session.trade_rows(self.sent_trades)
+        snap["latency"] = statistics.median(self.latencies) if self.latencies else None
+        self.sent_trades = snap["closed"]
+        self.tick.emit(snap)
+        self.progress.emit(snap["bars"], 0)
+
+
+class WarmUpWorker(QThread):
+    """Imports the backtest side of the app in the background (see WARM_UP_MODULES)."""
+
+    errored = pyqtSignal(str)
+
+    def run(self):
+        for name in WARM_UP_MODULES:
+            try:
+                importlib.import_module(name)
+            except Exception as exc:
+                self.errored.emit(f"Background import of {name} failed: {type(exc).__name__}: {exc}")
+                return
+
 
 # --------------------------- Main Window ---------------------------- #
 class MainWindow(QMainWindow):
@@ -369,16 +731,59 @@ class MainWindow(QMainWindow):
         self.resize(1260, 840)
 
         self.settings = QSettings(self.ORG, self.APP)
+        self.last_result: Optional[RunResult] = None
+        self.plot_worker = None
+        self.plot_path = None
+        self.jobs = []  # running JobWorkers (Cancel stops them all)
+        self.replay_worker = None
+        self.pool: Optional[WorkerPool] = None  # started once the window is up (_warm_up)
+        self.store: Optional[RunStore] = None  # run history, opened on first use
+        self.last_cfg: Optional[RunConfig] = None
+        self.timing_rows = []  # (time, run, phase, seconds) for File > Export Timings
+        self.warmup: Optional[WarmUpWorker] = None
 
         self._build_menu_toolbar()
         self._build_statusbar()
         self._build_central()
         self._load_state()
 
+    # ----- start-up -----
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.warmup is None:
+            # queued behind the first paint, so the window appears before the heavy imports
+            QTimer.singleShot(0, self._warm_up)
+
+    def _warm_up(self):
+        if self.warmup is not None:
+            return
+        self.warmup = WarmUpWorker()
+        self.warmup.errored.connect(self.txt_log.appendPlainText)
+        self.warmup.finished.connect(self._ensure_pool)
+        self.warmup.start()
+
+    def _ensure_pool(self) -> WorkerPool:
+        """The backtest worker pool, started on first use (after warm-up, the import is free)."""
+        if self.pool is None:
+            from workerpool import WorkerPool
+
+            self.pool = WorkerPool(1)  # the worker imports in parallel, ready by the first run
+        return self.pool
+
+    def _ensure_store(self) -> RunStore:
+        if self.store is None:
+            from runstore import RunStore
+
+            self.store = RunStore()
+        return self.store
+
     # ----- UI construction -----
     def _build_menu_toolbar(self):
         menubar = self.menuBar()
         file_menu = menubar.addMenu("&File")
+        self.act_export_timings = QAction("Export Timings…", self)
+        file_menu.addAction(self.act_export_timings)
+        self.act_export_timings.triggered.connect(self._export_timings)
         self.act_quit = QAction("Quit", self)
         file_menu.addAction(self.act_quit)
         self.act_quit.triggered.connect(self.close)
@@ -392,6 +797,23 @@ class MainWindow(QMainWindow):
         tb.addAction(self.act_run)
         self.act_run.triggered.connect(self._on_run)
 
+        self.act_optimize = QAction("Optimize", self)
+        self.act_optimize.setShortcut("Ctrl+F5")
+        tb.addAction(self.act_optimize)
+        self.act_optimize.triggered.connect(self._on_optimize)
+
+        self.act_cancel = QAction("Cancel", self)
+        self.act_cancel.setShortcut("Esc")
+        self.act_cancel.setEnabled(False)
+        tb.addAction(self.act_cancel)
+        self.act_cancel.triggered.connect(self._on_cancel)
+
+        self.act_plot = QAction("Plot", self)
+        self.act_plot.setShortcut("Ctrl+P")
+        self.act_plot.setEnabled(False)
+        tb.addAction(self.act_plot)
+        self.act_plot.triggered.connect(self._on_plot)
+
         self.act_browse_csv = QAction("Choose CSV…", self)
         tb.addAction(self.act_browse_csv)
         self.act_browse_csv.triggered.connect(self._browse_csv)
@@ -419,7 +841,7 @@ class MainWindow(QMainWindow):
 
         self.inp_symbol = QLineEdit()
         self.cmb_timeframe = QComboBox()
-        self.cmb_timeframe.addItems(["Daily", "Intraday"])
+        self.cmb_timeframe.addItems(list(TIMEFRAMES))
 
         # Data Source: CSV only with browse
         self.cmb_datasource = QComboBox()
@@ -440,6 +862,12 @@ class MainWindow(QMainWindow):
 
         self.inp_cash = QLineEdit()
         self.inp_commission = QLineEdit()
+        self.cmb_engine = QComboBox()
+        self.cmb_engine.addItems(ENGINES)
+        self.cmb_engine.setToolTip(
+            "event: backtesting.py's bar-by-bar next() loop\n"
+            "vectorized: NumPy fills from Strategy.signals() (much faster; also used by sweeps)"
+        )
 
         form.addRow("Symbol:", self.inp_symbol)
         form.addRow("Timeframe:", self.cmb_timeframe)
@@ -449,6 +877,7 @@ class MainWindow(QMainWindow):
         form.addRow("End:", self.date_end)
         form.addRow("Cash:", self.inp_cash)
         form.addRow("Commission (fraction):", self.inp_commission)
+        form.addRow("Engine:", self.cmb_engine)
 
         left_lay.addLayout(form)
 
@@ -490,43 +919,467 @@ class MainWindow(QMainWindow):
         self.code_edit.setPlainText(DEFAULT_STRATEGY_CODE.strip())
         code_lay.addWidget(self.code_edit, 1)
 
+        # background pre-check while typing (debounced)
+        self.lbl_validation = QLabel()
+        code_lay.addWidget(self.lbl_validation)
+        self.validate_worker = None
+        self.validate_timer = QTimer(self)
+        self.validate_timer.setSingleShot(True)
+        self.validate_timer.setInterval(400)
+        self.validate_timer.timeout.connect(self._start_validation)
+        self.code_edit.textChanged.connect(self._schedule_validation)
+        self._schedule_validation()
+
         right.addWidget(code_wrap)
 
         # Tabs: Metrics, Trades, Logs
         self.tabs = QTabWidget()
-        self.tbl_metrics = QTableWidget(0, 2)
-        self.tbl_metrics.setHorizontalHeaderLabels(["Metric", "Value"])
-        self.tbl_metrics.horizontalHeader().setStretchLastSection(True)
+        # models over the result frames; only visible rows are formatted
+        self.metrics_model = DataFrameModel(columns=["Metric", "Value"])
+        self.tbl_metrics = make_table_view(self.metrics_model)
 
-        self.tbl_trades = QTableWidget(0, 5)
-        self.tbl_trades.setHorizontalHeaderLabels(
-            ["EntryTime", "ExitTime", "EntryPrice", "ExitPrice", "PnL"]
+        self.trades_model = DataFrameModel(
+            columns=["EntryTime", "ExitTime", "EntryPrice", "ExitPrice", "PnL"]
         )
-        self.tbl_trades.horizontalHeader().setStretchLastSection(True)
+        self.tbl_trades = make_table_view(self.trades_model)
+        self.txt_trades_filter = QLineEdit()
+        self.txt_trades_filter.setPlaceholderText("Filter trades…")
+        self.txt_trades_filter.setClearButtonEnabled(True)
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(250)
+        self._filter_timer.timeout.connect(
+            lambda: self.trades_model.set_filter(self.txt_trades_filter.text())
+        )
+        self.txt_trades_filter.textChanged.connect(self._filter_timer.start)
 
         self.txt_log = QPlainTextEdit()
         self.txt_log.setReadOnly(True)
         self.txt_log.setFont(QFont("Consolas", 10))
 
+        # Monte Carlo robustness of the shown result
+        self.cmb_mc_method = QComboBox()
+        self.cmb_mc_method.addItems(list(ROBUSTNESS_METHODS))
+        self.cmb_mc_method.setToolTip(
+            "Bootstrap trades: draw the closed trades with replacement\n"
+            "Shuffle trade order: same trades, random order (drawdown only)\n"
+            "Bootstrap daily returns: resample blocks of daily equity returns"
+        )
+        self.spn_mc_samples = QSpinBox()
+        self.spn_mc_samples.setRange(100, 1_000_000)
+        self.spn_mc_samples.setSingleStep(1000)
+        self.spn_mc_samples.setSuffix(" samples")
+        self.spn_mc_confidence = QDoubleSpinBox()
+        self.spn_mc_confidence.setRange(50.0, 99.9)
+        self.spn_mc_confidence.setDecimals(1)
+        self.spn_mc_confidence.setSuffix(" % CI")
+        self.btn_mc_run = QPushButton("Monte Carlo")
+        self.btn_mc_run.setEnabled(False)
+        self.btn_mc_run.clicked.connect(self._on_robustness)
+        self.robust_model = DataFrameModel(columns=["Metric", "Observed", "Median", "Low", "High"])
+        self.tbl_robust = make_table_view(self.robust_model)
+
         tab_metrics = QWidget()
         lay_m = QVBoxLayout(tab_metrics)
-        lay_m.addWidget(self.tbl_metrics)
+        mc_bar = QHBoxLayout()
+        mc_bar.addWidget(QLabel("Robustness:"))
+        mc_bar.addWidget(self.cmb_mc_method)
+        mc_bar.addWidget(self.spn_mc_samples)
+        mc_bar.addWidget(self.spn_mc_confidence)
+        mc_bar.addWidget(self.btn_mc_run)
+        mc_bar.addStretch(1)
+        metrics_split = QSplitter(Qt.Orientation.Vertical)
+        metrics_split.addWidget(self.tbl_metrics)
+        metrics_split.addWidget(self.tbl_robust)
+        metrics_split.setStretchFactor(0, 3)
+        metrics_split.setStretchFactor(1, 1)
+        lay_m.addWidget(metrics_split, 1)
+        lay_m.addLayout(mc_bar)
 
         tab_trades = QWidget()
         lay_t = QVBoxLayout(tab_trades)
+        lay_t.addWidget(self.txt_trades_filter)
         lay_t.addWidget(self.tbl_trades)
 
         self.tabs.addTab(tab_metrics, "Metrics")
         self.tabs.addTab(tab_trades, "Trades")
         self.tabs.addTab(self.txt_log, "Logs")
+        self.tab_chart = self._build_chart_tab()
+        self.tabs.addTab(self.tab_chart, "Chart")
+        self.tab_optimize = self._build_optimize_tab()
+        self.tabs.addTab(self.tab_optimize, "Optimize")
+        self.tab_walkforward = self._build_walkforward_tab()
+        self.tabs.addTab(self.tab_walkforward, "Walk-Forward")
+        self.tab_batch = self._build_batch_tab()
+        self.tabs.addTab(self.tab_batch, "Batch")
+        self.tab_portfolio = self._build_portfolio_tab()
+        self.tabs.addTab(self.tab_portfolio, "Portfolio")
+        self.tab_replay = self._build_replay_tab()
+        self.tabs.addTab(self.tab_replay, "Replay")
+        self.tab_history = self._build_history_tab()
+        self.tabs.addTab(self.tab_history, "History")
+        self.tabs.currentChanged.connect(self._on_tab_changed)
 
         right.addWidget(self.tabs)
 
+    def _build_chart_tab(self) -> QWidget:
+        tab = QWidget()
+        lay = QVBoxLayout(tab)
+
+        bar = QHBoxLayout()
+        self.cmb_plot_resample = QComboBox()
+        self.cmb_plot_resample.addItems(list(PLOT_RESAMPLE))
+        self.cmb_plot_resample.setToolTip(
+            "Auto caps the chart at ~10k candles; Off plots every bar; "
+            "a period aggregates candles to it."
+        )
+        self.btn_plot = QPushButton("Render Chart")
+        self.btn_plot.setEnabled(False)
+        self.btn_plot.clicked.connect(self._on_plot)
+        self.btn_plot_browser = QPushButton("Open in Browser")
+        self.btn_plot_browser.setEnabled(False)
+        self.btn_plot_browser.clicked.connect(self._open_plot_in_browser)
+        bar.addWidget(QLabel("Downsample:"))
+        bar.addWidget(self.cmb_plot_resample)
+        bar.addWidget(self.btn_plot)
+        bar.addWidget(self.btn_plot_browser)
+        bar.addStretch(1)
+        lay.addLayout(bar)
+
+        if QWebEngineView is not None:
+            self.chart_view = QWebEngineView()
+            lay.addWidget(self.chart_view, 1)
+        else:
+            self.chart_view = None
+            note = QLabel("Qt WebEngine is not installed; charts open in the browser.")
+            note.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            lay.addWidget(note, 1)
+        return tab
+
+    def _build_optimize_tab(self) -> QWidget:
+        tab = QWidget()
+        lay = QHBoxLayout(tab)
+
+        opts = QWidget()
+        form = QFormLayout(opts)
+        form.setContentsMargins(0, 0, 0, 0)
+        self.opt_params = QPlainTextEdit()
+        self.opt_params.setFont(QFont("Consolas", 10))
+        self.opt_params.setPlaceholderText(
+            "One strategy class attribute per line:\n"
+            "n_fast = range(5, 30, 5)\n"
+            "n_slow = 20, 40, 60"
+        )
+        self.opt_constraint = QLineEdit()
+        self.opt_constraint.setPlaceholderText("e.g. n_fast < n_slow")
+        self.cmb_opt_metric = QComboBox()
+        self.cmb_opt_metric.setEditable(True)
+        self.cmb_opt_metric.addItems(TARGET_METRICS)
+        self.cmb_opt_method = QComboBox()
+        self.cmb_opt_method.addItems(METHODS)
+        self.spn_opt_tries = QSpinBox()
+        self.spn_opt_tries.setRange(0, 1_000_000)
+        self.spn_opt_tries.setSpecialValueText("full grid")
+        self.spn_opt_workers = QSpinBox()
+        self.spn_opt_workers.setRange(1, os.cpu_count() or 1)
+        self.btn_opt_run = QPushButton("Run Optimization")
+        self.btn_opt_run.clicked.connect(self._on_optimize)
+        self.btn_opt_heatmap = QPushButton("Heatmap")
+        self.btn_opt_heatmap.setEnabled(False)
+        self.btn_opt_heatmap.clicked.connect(self._on_heatmap)
+
+        form.addRow("Parameters:", self.opt_params)
+        form.addRow("Constraint:", self.opt_constraint)
+        form.addRow("Maximize:", self.cmb_opt_metric)
+        form.addRow("Method:", self.cmb_opt_method)
+        form.addRow("Max tries:", self.spn_opt_tries)
+        form.addRow("Workers:", self.spn_opt_workers)
+        form.addRow(self.btn_opt_run)
+        form.addRow(self.btn_opt_heatmap)
+
+        self.tbl_optimize = QTableWidget(0, 0)
+        self.tbl_optimize.setSortingEnabled(True)
+        self.tbl_optimize.horizontalHeader().setStretchLastSection(True)
+
+        lay.addWidget(opts, 0)
+        lay.addWidget(self.tbl_optimize, 1)
+        return tab
+
+    def _build_walkforward_tab(self) -> QWidget:
+        tab = QWidget()
+        lay = QHBoxLayout(tab)
+
+        opts = QWidget()
+        form = QFormLayout(opts)
+        form.setContentsMargins(0, 0, 0, 0)
+        form.addRow(QLabel("Parameters, maximize, method\nand workers: Optimize tab"))
+        self.spn_wf_folds = QSpinBox()
+        self.spn_wf_folds.setRange(1, 100)
+        self.spn_wf_ratio = QDoubleSpinBox()
+        self.spn_wf_ratio.setRange(0.1, 50.0)
+        self.spn_wf_ratio.setSingleStep(0.5)
+        self.spn_wf_ratio.setToolTip("Training window length / test window length")
+        self.chk_wf_anchored = QCheckBox("Anchored (training grows from the first bar)")
+        self.btn_wf_run = QPushButton("Run Walk-Forward")
+        self.btn_wf_run.clicked.connect(self._on_walk_forward)
+        self.btn_wf_equity = QPushButton("Equity Chart")
+        self.btn_wf_equity.setEnabled(False)
+        self.btn_wf_equity.clicked.connect(self._on_walk_forward_equity)
+
+        form.addRow("Folds:", self.spn_wf_folds)
+        form.addRow("Train/test ratio:", self.spn_wf_ratio)
+        form.addRow(self.chk_wf_anchored)
+        form.addRow(self.btn_wf_run)
+        form.addRow(self.btn_wf_equity)
+
+        self.tbl_wf_folds = QTableWidget(0, 0)
+        self.tbl_wf_folds.setSortingEnabled(True)
+        self.tbl_wf_folds.horizontalHeader().setStretchLastSection(True)
+        self.wf_metrics_model = DataFrameModel(columns=["Metric", "Value"])
+        self.tbl_wf_metrics = make_table_view(self.wf_metrics_model)
+
+        results = QSplitter(Qt.Orientation.Vertical)
+        results.addWidget(self.tbl_wf_folds)
+        stitched = QWidget()
+        stitched_lay = QVBoxLayout(stitched)
+        stitched_lay.setContentsMargins(0, 0, 0, 0)
+        stitched_lay.addWidget(QLabel("Stitched out-of-sample metrics:"))
+        stitched_lay.addWidget(self.tbl_wf_metrics)
+        results.addWidget(stitched)
+
+        lay.addWidget(opts, 0)
+        lay.addWidget(results, 1)
+        return tab
+
+    def _build_batch_tab(self) -> QWidget:
+        tab = QWidget()
+        lay = QHBoxLayout(tab)
+
+        opts = QWidget()
+        form = QFormLayout(opts)
+        form.setContentsMargins(0, 0, 0, 0)
+        self.batch_symbols = QPlainTextEdit()
+        self.batch_symbols.setPlaceholderText(
+            "Symbols (comma/space/new line separated).\n"
+            "With a folder: <folder>/<SYMBOL>.csv; folder only: every CSV in it."
+        )
+        self.batch_folder = QLineEdit()
+        btn_folder = QPushButton("Browse…")
+        btn_folder.clicked.connect(self._browse_batch_folder)
+        folder_row = QWidget()
+        folder_lay = QHBoxLayout(folder_row)
+        folder_lay.setContentsMargins(0, 0, 0, 0)
+        folder_lay.addWidget(self.batch_folder, 1)
+        folder_lay.addWidget(btn_folder)
+        self.spn_batch_workers = QSpinBox()
+        self.spn_batch_workers.setRange(1, os.cpu_count() or 1)
+        self.spn_batch_timeout = QSpinBox()
+        self.spn_batch_timeout.setRange(0, 24 * 3600)
+        self.spn_batch_timeout.setSuffix(" s")
+        self.spn_batch_timeout.setSpecialValueText("no timeout")
+        self.btn_batch_run = QPushButton("Run Batch")
+        self.btn_batch_run.clicked.connect(self._on_batch)
+
+        form.addRow("Symbols:", self.batch_symbols)
+        form.addRow("CSV folder:", folder_row)
+        form.addRow("Workers:", self.spn_batch_workers)
+        form.addRow("Timeout per run:", self.spn_batch_timeout)
+        form.addRow(self.btn_batch_run)
+
+        self.tbl_batch = QTableWidget(0, 0)
+        self.tbl_batch.setSortingEnabled(True)
+        self.tbl_batch.horizontalHeader().setStretchLastSection(True)
+
+        lay.addWidget(opts, 0)
+        lay.addWidget(self.tbl_batch, 1)
+        return tab
+
+    def _build_portfolio_tab(self) -> QWidget:
+        tab = QWidget()
+        lay = QHBoxLayout(tab)
+
+        opts = QWidget()
+        form = QFormLayout(opts)
+        form.setContentsMargins(0, 0, 0, 0)
+        self.pf_symbols = QPlainTextEdit()
+        self.pf_symbols.setPlaceholderText(
+            "Symbols separated by commas or new lines\n(with a folder: <folder>/<SYMBOL>.csv)"
+        )
+        self.pf_folder = QLineEdit()
+        btn_folder = QPushButton("Browse…")
+        btn_folder.clicked.connect(self._browse_portfolio_folder)
+        folder_row = QWidget()
+        folder_lay = QHBoxLayout(folder_row)
+        folder_lay.setContentsMargins(0, 0, 0, 0)
+        folder_lay.addWidget(self.pf_folder, 1)
+        folder_lay.addWidget(btn_folder)
+        self.spn_pf_max_weight = QDoubleSpinBox()
+        self.spn_pf_max_weight.setRange(1.0, 100.0)
+        self.spn_pf_max_weight.setSuffix(" %")
+        self.spn_pf_max_weight.setToolTip("Largest share of equity one asset may take")
+        self.cmb_pf_rebalance = QComboBox()
+        self.cmb_pf_rebalance.addItems(list(REBALANCE))
+        self.cmb_pf_rebalance.setToolTip(
+            "On signal: trade only when a signal changes\n"
+            "A period: also reset all positions to their target weights at the start of each period"
+        )
+        self.chk_pf_long_only = QCheckBox("Long only (short signals go flat)")
+        self.btn_pf_run = QPushButton("Run Portfolio")
+        self.btn_pf_run.clicked.connect(self._on_portfolio)
+        self.btn_pf_equity = QPushButton("Equity Chart")
+        self.btn_pf_equity.setEnabled(False)
+        self.btn_pf_equity.clicked.connect(self._on_portfolio_equity)
+
+        form.addRow(QLabel("Strategy needs signals()\n(see the vectorized engine)"))
+        form.addRow("Symbols:", self.pf_symbols)
+        form.addRow("CSV folder:", folder_row)
+        form.addRow("Max weight per asset:", self.spn_pf_max_weight)
+        form.addRow("Rebalance:", self.cmb_pf_rebalance)
+        form.addRow(self.chk_pf_long_only)
+        form.addRow(self.btn_pf_run)
+        form.addRow(self.btn_pf_equity)
+
+        self.pf_metrics_model = DataFrameModel(columns=["Metric", "Value"])
+        self.tbl_pf_metrics = make_table_view(self.pf_metrics_model)
+        self.pf_assets_model = DataFrameModel(columns=["Asset", "# Trades", "PnL [$]", "Contribution [%]"])
+        self.tbl_pf_assets = make_table_view(self.pf_assets_model)
+        self.pf_trades_model = DataFrameModel(columns=["Asset", "EntryTime", "ExitTime", "Size", "PnL"])
+        self.tbl_pf_trades = make_table_view(self.pf_trades_model)
+
+        top = QSplitter(Qt.Orientation.Horizontal)
+        top.addWidget(self.tbl_pf_metrics)
+        top.addWidget(self.tbl_pf_assets)
+        results = QSplitter(Qt.Orientation.Vertical)
+        results.addWidget(top)
+        results.addWidget(self.tbl_pf_trades)
+
+        lay.addWidget(opts, 0)
+        lay.addWidget(results, 1)
+        return tab
+
+    def _build_replay_tab(self) -> QWidget:
+        tab = QWidget()
+        lay = QHBoxLayout(tab)
+
+        opts = QWidget()
+        form = QFormLayout(opts)
+        form.setContentsMargins(0, 0, 0, 0)
+        self.cmb_replay_source = QComboBox()
+        self.cmb_replay_source.addItems(list(REPLAY_SOURCES))
+        self.cmb_replay_source.setToolTip(
+            "Loaded data: the symbol / CSV above, fed bar by bar after the history bars\n"
+            "Follow CSV: rows present now are history; rows appended later are new bars\n"
+            "Socket feed: CSV lines (header first) from host:port; the loaded data is history"
+        )
+        self.inp_replay_target = QLineEdit()
+        self.inp_replay_target.setPlaceholderText("CSV path or host:port")
+        btn_target = QPushButton("Browse…")
+        btn_target.clicked.connect(self._browse_replay_csv)
+        target_row = QWidget()
+        target_lay = QHBoxLayout(target_row)
+        target_lay.setContentsMargins(0, 0, 0, 0)
+        target_lay.addWidget(self.inp_replay_target, 1)
+        target_lay.addWidget(btn_target)
+        self.spn_replay_history = QSpinBox()
+        self.spn_replay_history.setRange(1, 10_000_000)
+        self.spn_replay_history.setToolTip("Loaded data: bars given to init() before the feed starts")
+        self.spn_replay_speed = QDoubleSpinBox()
+        self.spn_replay_speed.setRange(0, 100_000)
+        self.spn_replay_speed.setSuffix(" bars/s")
+        self.spn_replay_speed.setSpecialValueText("As fast as possible")
+        self.btn_replay_start = QPushButton("Start Replay")
+        self.btn_replay_start.clicked.connect(self._on_replay)
+        self.btn_replay_stop = QPushButton("Stop")
+        self.btn_replay_stop.setEnabled(False)
+        self.btn_replay_stop.clicked.connect(self._on_replay_stop)
+        self.btn_replay_equity = QPushButton("Equity Chart")
+        self.btn_replay_equity.setEnabled(False)
+        self.btn_replay_equity.clicked.connect(self._on_replay_equity)
+
+        form.addRow("Feed:", self.cmb_replay_source)
+        form.addRow("CSV / address:", target_row)
+        form.addRow("History bars:", self.spn_replay_history)
+        form.addRow("Speed:", self.spn_replay_speed)
+        form.addRow(self.btn_replay_start)
+        form.addRow(self.btn_replay_stop)
+        form.addRow(self.btn_replay_equity)
+
+        self.lbl_replay = QLabel("Not running")
+        self.lbl_replay.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.replay_order_columns = ["Size", "Limit", "Stop", "SL", "TP", "Tag"]
+        self.replay_orders_model = DataFrameModel(columns=self.replay_order_columns)
+        self.tbl_replay_orders = make_table_view(self.replay_orders_model)
+        self.replay_trade_columns = ["EntryTime", "ExitTime", "Size", "EntryPrice", "ExitPrice", "PnL", "ReturnPct"]
+        self.tbl_replay_trades = QTableWidget(0, 0)
+        self.tbl_replay_trades.horizontalHeader().setStretchLastSection(True)
+        reset_table(self.tbl_replay_trades, self.replay_trade_columns)
+        self.replay_metrics_model = DataFrameModel(columns=["Metric", "Value"])
+        self.tbl_replay_metrics = make_table_view(self.replay_metrics_model)
+
+        orders = QWidget()
+        orders_lay = QVBoxLayout(orders)
+        orders_lay.setContentsMargins(0, 0, 0, 0)
+        orders_lay.addWidget(QLabel("Pending orders:"))
+        orders_lay.addWidget(self.tbl_replay_orders)
+        top = QSplitter(Qt.Orientation.Horizontal)
+        top.addWidget(orders)
+        top.addWidget(self.tbl_replay_metrics)
+        results = QSplitter(Qt.Orientation.Vertical)
+        results.addWidget(top)
+        results.addWidget(self.tbl_replay_trades)
+        right = QWidget()
+        right_lay = QVBoxLayout(right)
+        right_lay.setContentsMargins(0, 0, 0, 0)
+        right_lay.addWidget(self.lbl_replay)
+        right_lay.addWidget(results, 1)
+
+        lay.addWidget(opts, 0)
+        lay.addWidget(right, 1)
+        return tab
+
+    def _build_history_tab(self) -> QWidget:
+        tab = QWidget()
+        lay = QVBoxLayout(tab)
+
+        bar = QHBoxLayout()
+        self.chk_history_reuse = QCheckBox("Reuse stored results for identical runs")
+        self.chk_history_reuse.setToolTip(
+            "Same inputs, strategy source and CSV version: show the stored result instead of re-running"
+        )
+        btn_refresh = QPushButton("Refresh")
+        btn_refresh.clicked.connect(self._refresh_history)
+        btn_load = QPushButton("Load")
+        btn_load.setToolTip("Show the selected run in the Metrics and Trades tabs")
+        btn_load.clicked.connect(self._on_history_load)
+        btn_compare = QPushButton("Compare")
+        btn_compare.setToolTip("Metrics of the selected runs side by side")
+        btn_compare.clicked.connect(self._on_history_compare)
+        btn_delete = QPushButton("Delete")
+        btn_delete.clicked.connect(self._on_history_delete)
+        bar.addWidget(self.chk_history_reuse)
+        bar.addStretch(1)
+        for btn in (btn_refresh, btn_load, btn_compare, btn_delete):
+            bar.addWidget(btn)
+        lay.addLayout(bar)
+
+        self.history_model = DataFrameModel(columns=["Id", "Time", "Symbol", "Strategy", "Seconds"])
+        self.tbl_history = make_table_view(self.history_model)
+        self.tbl_history.doubleClicked.connect(self._on_history_load)
+        self.compare_model = DataFrameModel(columns=["Metric"])
+        self.tbl_compare = make_table_view(self.compare_model)
+
+        split = QSplitter(Qt.Orientation.Vertical)
+        split.addWidget(self.tbl_history)
+        split.addWidget(self.tbl_compare)
+        lay.addWidget(split, 1)
+        return tab
+
     # ----- state load/save -----
     def _load_state(self):
         s = self.settings
         self.inp_symbol.setText(s.value("symbol", "GOOG"))
         self.cmb_timeframe.setCurrentText(s.value("timeframe", "Daily"))
+        self.cmb_engine.setCurrentText(s.value("engine", "event"))
         self.inp_csv.setText(s.value("csv_path", ""))
 
         self.date_start.setDate(
@@ -546,15 +1399,77 @@ class MainWindow(QMainWindow):
         self.inp_cash.setText(s.value("cash", "100000"))
         self.inp_commission.setText(s.value("commission", "0.0005"))  # 5 bps default
 
+        self.opt_params.setPlainText(
+            s.value("opt_params", "n_fast = range(5, 30, 5)\nn_slow = range(20, 80, 10)")
+        )
+        self.opt_constraint.setText(s.value("opt_constraint", "n_fast < n_slow"))
+        self.cmb_opt_metric.setCurrentText(s.value("opt_metric", "Sharpe Ratio"))
+        self.cmb_opt_method.setCurrentText(s.value("opt_method", "grid"))
+        self.spn_opt_tries.setValue(int(s.value("opt_tries", 0)))
+        self.spn_opt_workers.setValue(
+            int(s.value("opt_workers", max(1, (os.cpu_count() or 2) - 1)))
+        )
+
+        self.spn_wf_folds.setValue(int(s.value("wf_folds", 5)))
+        self.spn_wf_ratio.setValue(float(s.value("wf_ratio", 3.0)))
+        self.chk_wf_anchored.setChecked(s.value("wf_anchored", "false") in (True, "true"))
+
+        self.batch_symbols.setPlainText(s.value("batch_symbols", "GOOG, BTCUSD, EURUSD"))
+        self.batch_folder.setText(s.value("batch_folder", ""))
+        self.spn_batch_workers.setValue(
+            int(s.value("batch_workers", max(1, (os.cpu_count() or 2) - 1)))
+        )
+        self.spn_batch_timeout.setValue(int(s.value("batch_timeout", 300)))
+        self.pf_symbols.setPlainText(s.value("pf_symbols", "GOOG, BTCUSD, EURUSD"))
+        self.pf_folder.setText(s.value("pf_folder", ""))
+        self.spn_pf_max_weight.setValue(float(s.value("pf_max_weight", 25.0)))
+        self.cmb_pf_rebalance.setCurrentText(s.value("pf_rebalance", "On signal"))
+        self.chk_pf_long_only.setChecked(s.value("pf_long_only", "false") in (True, "true"))
+        self.cmb_mc_method.setCurrentText(s.value("mc_method", "Bootstrap trades"))
+        self.spn_mc_samples.setValue(int(s.value("mc_samples", 5000)))
+        self.spn_mc_confidence.setValue(float(s.value("mc_confidence", 95.0)))
+        self.cmb_replay_source.setCurrentText(s.value("replay_source", "Loaded data"))
+        self.inp_replay_target.setText(s.value("replay_target", ""))
+        self.spn_replay_history.setValue(int(s.value("replay_history", 200)))
+        self.spn_replay_speed.setValue(float(s.value("replay_speed", 20.0)))
+        self.chk_history_reuse.setChecked(s.value("history_reuse", "true") in (True, "true"))
+
     def _save_state(self):
         s = self.settings
         s.setValue("symbol", self.inp_symbol.text().strip())
         s.setValue("timeframe", self.cmb_timeframe.currentText())
+        s.setValue("engine", self.cmb_engine.currentText())
         s.setValue("csv_path", self.inp_csv.text().strip())
         s.setValue("start", self.date_start.date().toString("yyyy-MM-dd"))
         s.setValue("end", self.date_end.date().toString("yyyy-MM-dd"))
         s.setValue("cash", self.inp_cash.text().strip())
         s.setValue("commission", self.inp_commission.text().strip())
+        s.setValue("opt_params", self.opt_params.toPlainText())
+        s.setValue("opt_constraint", self.opt_constraint.text().strip())
+        s.setValue("opt_metric", self.cmb_opt_metric.currentText())
+        s.setValue("opt_method", self.cmb_opt_method.currentText())
+        s.setValue("opt_tries", self.spn_opt_tries.value())
+        s.setValue("opt_workers", self.spn_opt_workers.value())
+        s.setValue("wf_folds", self.spn_wf_folds.value())
+        s.setValue("wf_ratio", self.spn_wf_ratio.value())
+        s.setValue("wf_anchored", self.chk_wf_anchored.isChecked())
+        s.setValue("batch_symbols", self.batch_symbols.toPlainText())
+        s.setValue("batch_folder", self.batch_folder.text().strip())
+        s.setValue("batch_workers", self.spn_batch_workers.value())
+        s.setValue("batch_timeout", self.spn_batch_timeout.value())
+        s.setValue("pf_symbols", self.pf_symbols.toPlainText())
+        s.setValue("pf_folder", self.pf_folder.text().strip())
+        s.setValue("pf_max_weight", self.spn_pf_max_weight.value())
+        s.setValue("pf_rebalance", self.cmb_pf_rebalance.currentText())
+        s.setValue("pf_long_only", self.chk_pf_long_only.isChecked())
+        s.setValue("mc_method", self.cmb_mc_method.currentText())
+        s.setValue("mc_samples", self.spn_mc_samples.value())
+        s.setValue("mc_confidence", self.spn_mc_confidence.value())
+        s.setValue("replay_source", self.cmb_replay_source.currentText())
+        s.setValue("replay_target", self.inp_replay_target.text().strip())
+        s.setValue("replay_history", self.spn_replay_history.value())
+        s.setValue("replay_speed", self.spn_replay_speed.value())
+        s.setValue("history_reuse", self.chk_history_reuse.isChecked())
 
     # ----- handlers -----
     def _browse_csv(self):
@@ -564,7 +1479,9 @@ class MainWindow(QMainWindow):
         if fn:
             self.inp_csv.setText(fn)
 
-    def _on_run(self):
+    def _collect_config(self) -> Optional[RunConfig]:
+        from core import RunConfig, validate_strategy_source
+
         try:
             cfg = RunConfig(
                 symbol=self.inp_symbol.text().strip() or "GOOG",
@@ -575,65 +1492,633 @@ class MainWindow(QMainWindow):
                 cash=float(self.inp_cash.text().strip() or "100000"),
                 commission=float(self.inp_commission.text().strip() or "0.0"),
                 strategy_code=self.code_edit.toPlainText(),
+                engine=self.cmb_engine.currentText(),
             )
         except Exception as exc:
             QMessageBox.critical(self, "Invalid Input", str(exc))
+            return None
+
+        # pre-check: broken code never reaches a worker (cached by source hash)
+        problems = validate_strategy_source(cfg.strategy_code)
+        self._show_validation(problems)
+        if problems:
+            self.txt_log.setPlainText("Strategy check failed:\n" + "\n".join(problems))
+            self.tabs.setCurrentIndex(2)
+            return None
+        return cfg
+
+    def _schedule_validation(self):
+        self.validate_timer.start()
+
+    def _start_validation(self):
+        if self.validate_worker is not None and self.validate_worker.isRunning():
+            # re-check once the current pass finishes
+            self.validate_timer.start()
+            return
+        self.validate_worker = ValidateWorker(self.code_edit.toPlainText())
+        self.validate_worker.checked.connect(self._on_validated)
+        self.validate_worker.start()
+
+    def _on_validated(self, source: str, problems: list):
+        if source == self.code_edit.toPlainText():
+            self._show_validation(problems)
+
+    def _show_validation(self, problems: list):
+        if problems:
+            self.lbl_validation.setStyleSheet("color: #c0392b;")
+            self.lbl_validation.setText("✗ " + problems[0].splitlines()[0])
+            self.lbl_validation.setToolTip("\n".join(problems))
+        else:
+            self.lbl_validation.setStyleSheet("color: #2e7d32;")
+            self.lbl_validation.setText("✓ Strategy code passes the pre-run check")
+            self.lbl_validation.setToolTip("")
+
+    def _browse_batch_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select folder of OHLCV CSVs")
+        if folder:
+            self.batch_folder.setText(folder)
+
+    def _browse_portfolio_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select folder of OHLCV CSVs")
+        if folder:
+            self.pf_folder.setText(folder)
+
+    def _browse_replay_csv(self):
+        fn, _ = QFileDialog.getOpenFileName(self, "Select CSV to follow", "", "CSV Files (*.csv);;All Files (*)")
+        if fn:
+            self.inp_replay_target.setText(fn)
+
+    def _on_run(self):
+        cfg = self._collect_config()
+        if cfg is None:
             return
 
         self._save_state()
         self.txt_log.clear()
-        self.progress.setRange(0, 0)  # indeterminate
 
-        self.worker = RunWorker(cfg)
+        self.last_cfg = cfg
+        self.worker = RunWorker(
+            cfg, self._ensure_pool(), self._ensure_store(), reuse=self.chk_history_reuse.isChecked()
+        )
         self.worker.done.connect(self._on_done)
         self.worker.errored.connect(self._on_error)
-        self.worker.start()
+        self._start_job(self.worker)
 
-    def _on_done(self, metrics_df: pd.DataFrame, trades_df: pd.DataFrame):
+    def _on_done(self, result: RunResult):
         self.progress.setRange(0, 100)
         self.progress.setValue(100)
-        df_to_table(self.tbl_metrics, metrics_df)
-        df_to_table(self.tbl_trades, trades_df)
+        elapsed = time.perf_counter() - self.worker.started_at
+        if self.worker.cached:
+            self.statusBar().showMessage(
+                f"Identical run #{self.worker.history_id} served from history in {elapsed * 1000:.0f} ms"
+            )
+        else:
+            self.statusBar().showMessage(f"Backtest done in {format_duration(elapsed)}")
+        if self.worker.store_error:
+            self.txt_log.appendPlainText(self.worker.store_error)
+        self._show_result(result)
+        label = f"run #{self.worker.history_id}" if self.worker.history_id else "run"
+        self._log_timings(f"{label} {self.worker.cfg.symbol} {self.worker.cfg.timeframe}", result.timings)
+        if self.tabs.currentWidget() is self.tab_history:
+            self._refresh_history()
+
+    def _show_result(self, result: RunResult):
+        t0 = time.perf_counter()
+        self.last_result = result
+        self.plot_path = None
+        self.act_plot.setEnabled(True)
+        self.btn_plot.setEnabled(True)
+        self.metrics_model.set_frame(result.metrics_df)
+        self.trades_model.set_frame(result.trades_df)
+        self.robust_model.clear()
+        self.btn_mc_run.setEnabled(True)
+        for view in (self.tbl_metrics, self.tbl_trades):
+            view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+            view.resizeColumnsToContents()  # header samples at most 1000 rows
+        result.timings["table"] = time.perf_counter() - t0
         self.tabs.setCurrentIndex(0)
 
+    def _on_robustness(self):
+        if self.last_result is None:
+            return
+        from robustness import RobustnessConfig
+
+        rcfg = RobustnessConfig(
+            method=ROBUSTNESS_METHODS[self.cmb_mc_method.currentText()],
+            samples=self.spn_mc_samples.value(),
+            confidence=self.spn_mc_confidence.value() / 100,
+        )
+        self._save_state()
+        self.btn_mc_run.setEnabled(False)
+        self.robust_model.clear()
+        cash = self.last_cfg.cash if self.last_cfg is not None else None
+        self.mc_worker = RobustnessWorker(self.last_result, rcfg, cash)
+        self.mc_worker.done.connect(self._on_robustness_done)
+        self.mc_worker.errored.connect(self._on_error)
+        self._start_job(self.mc_worker)
+
+    def _on_robustness_done(self, out):
+        self.progress.setRange(0, 100)
+        self.progress.setValue(100)
+        self.btn_mc_run.setEnabled(True)
+        self.robust_model.set_frame(out.summary_df)
+        self.tbl_robust.resizeColumnsToContents()
+        self.statusBar().showMessage(
+            f"Monte Carlo: {len(out.samples_df):,} paths of {out.steps:,} steps, "
+            f"{out.loss_probability:.1%} end with a loss"
+        )
+
+    def _on_plot(self):
+        if self.last_result is None:
+            return
+        if self.plot_worker is not None and self.plot_worker.isRunning():
+            return
+        self.btn_plot.setEnabled(False)
+        self.act_plot.setEnabled(False)
+        self.statusBar().showMessage("Rendering chart…")
+        self.plot_worker = PlotWorker(
+            self.last_result, self.cmb_plot_resample.currentText(), self._ensure_pool(), self.last_cfg
+        )
+        self.plot_worker.done.connect(self._on_plot_done)
+        self.plot_worker.errored.connect(self._on_plot_error)
+        self.plot_worker.start()
+
+    def _on_plot_done(self, path: str):
+        worker = self.sender()
+        if isinstance(worker, PlotWorker):
+            # rendered in the worker process: timed here, round trip included
+            seconds = time.perf_counter() - worker.started_at
+            worker.result.timings["plot"] = seconds
+            self._log_timings("chart", {"plot": seconds})
+        self.plot_path = path
+        self.btn_plot.setEnabled(True)
+        self.act_plot.setEnabled(True)
+        self.btn_plot_browser.setEnabled(True)
+        self.statusBar().showMessage(f"Chart written to {path}")
+        if self.chart_view is not None:
+            self.chart_view.load(QUrl.fromLocalFile(path))
+            self.tabs.setCurrentWidget(self.tab_chart)
+        else:
+            self._open_plot_in_browser()
+
+    def _on_plot_error(self, message: str):
+        self.btn_plot.setEnabled(True)
+        self.act_plot.setEnabled(True)
+        self.statusBar().showMessage("Chart failed.")
+        self.txt_log.appendPlainText(message)
+        self.tabs.setCurrentIndex(2)
+
+    # ----- timings -----
+    def _log_timings(self, label: str, timings: dict):
+        """Per-phase seconds into the Logs tab and the export list."""
+        if not timings:
+            return
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        total = sum(timings.values())
+        lines = [f"Timings, {label} ({stamp}):"]
+        for phase, seconds in timings.items():
+            lines.append(f"  {phase:<10}{seconds:>10.3f} s{seconds / total:>8.1%}" if total else f"  {phase}")
+            self.timing_rows.append((stamp, label, phase, round(seconds, 6)))
+        lines.append(f"  {'total':<10}{total:>10.3f} s")
+        self.txt_log.appendPlainText("\n".join(lines))
+
+    def _export_timings(self):
+        if not self.timing_rows:
+            QMessageBox.information(self, "Export Timings", "No timings recorded yet: run a backtest first.")
+            return
+        fn, _ = QFileDialog.getSaveFileName(self, "Export Timings", "timings.csv", "CSV Files (*.csv)")
+        if not fn:
+            return
+        import csv
+
+        with open(fn, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["Time", "Run", "Phase", "Seconds"])
+            writer.writerows(self.timing_rows)
+        self.statusBar().showMessage(f"{len(self.timing_rows)} timings written to {fn}")
+
+    def _open_plot_in_browser(self):
+        if self.plot_path:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(self.plot_path))
+
+    # ----- progress / cancel -----
+    def _start_job(self, worker: JobWorker):
+        self.progress.setRange(0, 0)  # indeterminate until the first report
+        self.statusBar().showMessage(f"{worker.label}: starting…")
+        # bound methods (not lambdas) so the slots run queued on the GUI thread
+        worker.progress.connect(self._on_progress)
+        worker.cancelled.connect(self._on_cancelled)
+        worker.finished.connect(self._on_job_finished)
+        self.jobs.append(worker)
+        self.act_cancel.setEnabled(True)
+        worker.start()
+
+    def _on_progress(self, done: int, total: int, worker: Optional[JobWorker] = None):
+        worker = worker or self.sender()
+        if total > 0:
+            self.progress.setRange(0, total)
+            self.progress.setValue(min(done, total))
+        else:
+            self.progress.setRange(0, 0)
+        self.statusBar().showMessage(worker.status_text(done, total))
+
+    def _on_cancel(self):
+        for worker in self.jobs:
+            worker.cancel()
+        self.statusBar().showMessage("Cancelling…")
+
+    def _on_cancelled(self):
+        worker = self.sender()
+        self.progress.setRange(0, 100)
+        self.progress.setValue(0)
+        self.statusBar().showMessage(
+            f"{worker.label} cancelled after {format_duration(time.perf_counter() - worker.started_at)}"
+        )
+        self.btn_opt_run.setEnabled(True)
+        self.btn_wf_run.setEnabled(True)
+        self.btn_batch_run.setEnabled(True)
+        self.btn_pf_run.setEnabled(True)
+        self.btn_mc_run.setEnabled(self.last_result is not None)
+        self.btn_replay_start.setEnabled(True)
+        self.btn_replay_stop.setEnabled(False)
+
+    def _on_job_finished(self):
+        worker = self.sender()
+        if worker in self.jobs:
+            self.jobs.remove(worker)
+        self.act_cancel.setEnabled(bool(self.jobs))
+
     def _on_error(self, message: str):
         self.progress.setRange(0, 100)
         self.progress.setValue(0)
         self.txt_log.setPlainText(message)
         self.tabs.setCurrentIndex(2)
+        self.btn_opt_run.setEnabled(True)
+        self.btn_wf_run.setEnabled(True)
+        self.btn_batch_run.setEnabled(True)
+        self.btn_pf_run.setEnabled(True)
+        self.btn_mc_run.setEnabled(self.last_result is not None)
+        self.btn_replay_start.setEnabled(True)
+        self.btn_replay_stop.setEnabled(False)
+
+    def _collect_optimize_config(self) -> Optional[OptimizeConfig]:
+        from optimizer import OptimizeConfig, parse_param_ranges
+
+        try:
+            return OptimizeConfig(
+                param_ranges=parse_param_ranges(self.opt_params.toPlainText()),
+                maximize=self.cmb_opt_metric.currentText().strip(),
+                method=self.cmb_opt_method.currentText(),
+                max_tries=self.spn_opt_tries.value() or None,
+                constraint=self.opt_constraint.text().strip() or None,
+                workers=self.spn_opt_workers.value(),
+            )
+        except Exception as exc:
+            QMessageBox.critical(self, "Invalid Parameters", str(exc))
+            return None
+
+    def _on_optimize(self):
+        cfg = self._collect_config()
+        if cfg is None:
+            return
+        opt = self._collect_optimize_config()
+        if opt is None:
+            return
+
+        self._save_state()
+        self.txt_log.clear()
+        self.btn_opt_run.setEnabled(False)
+        self.btn_opt_heatmap.setEnabled(False)
+        self.opt_results = None
+        self.opt_columns = list(opt.param_ranges) + [opt.maximize] + [
+            k for k in METRIC_KEYS if k != opt.maximize
+        ]
+        reset_table(self.tbl_optimize, self.opt_columns)
+        self.tabs.setCurrentWidget(self.tab_optimize)
+
+        self.opt_worker = OptimizeWorker(cfg, opt)
+        self.opt_worker.row.connect(self._on_optimize_row)
+        self.opt_worker.done.connect(self._on_optimize_done)
+        self.opt_worker.errored.connect(self._on_error)
+        self._start_job(self.opt_worker)
+
+    def _on_optimize_row(self, row: dict):
+        append_table_row(self.tbl_optimize, self.opt_columns, row)
+
+    def _on_optimize_done(self, results: pd.DataFrame):
+        self.progress.setRange(0, 100)
+        self.progress.setValue(100)
+        self.btn_opt_run.setEnabled(True)
+        self.opt_results = results
+        self.btn_opt_heatmap.setEnabled(len(results) > 0)
+        self.tbl_optimize.sortItems(len(self.opt_worker.opt.param_ranges), Qt.SortOrder.DescendingOrder)
+        if len(results):
+            best = results.iloc[0]
+            params = ", ".join(f"{k}={best[k]}" for k in self.opt_worker.opt.param_ranges)
+            self.statusBar().showMessage(
+                f"Optimization done: {len(results)} runs, best {params} "
+                f"({self.opt_worker.opt.maximize} = {best[self.opt_worker.opt.maximize]})"
+            )
+
+    def _on_walk_forward(self):
+        cfg = self._collect_config()
+        if cfg is None:
+            return
+        opt = self._collect_optimize_config()
+        if opt is None:
+            return
+        from walkforward import WalkForwardConfig
+
+        wf = WalkForwardConfig(
+            folds=self.spn_wf_folds.value(),
+            train_test_ratio=self.spn_wf_ratio.value(),
+            anchored=self.chk_wf_anchored.isChecked(),
+            workers=self.spn_opt_workers.value(),
+        )
+
+        self._save_state()
+        self.txt_log.clear()
+        self.btn_wf_run.setEnabled(False)
+        self.btn_wf_equity.setEnabled(False)
+        self.wf_result = None
+        self.wf_columns = (
+            ["Fold", "Train Start", "Train End", "Test Start", "Test End"]
+            + list(opt.param_ranges)
+            + [f"IS {opt.maximize}"]
+            + [f"OOS {k}" for k in METRIC_KEYS]
+        )
+        reset_table(self.tbl_wf_folds, self.wf_columns)
+        self.wf_metrics_model.clear()
+        self.tabs.setCurrentWidget(self.tab_walkforward)
+
+        self.wf_worker = WalkForwardWorker(cfg, opt, wf)
+        self.wf_worker.fold.connect(self._on_walk_forward_fold)
+        self.wf_worker.done.connect(self._on_walk_forward_done)
+        self.wf_worker.errored.connect(self._on_error)
+        self._start_job(self.wf_worker)
+
+    def _on_walk_forward_fold(self, row: dict):
+        append_table_row(self.tbl_wf_folds, self.wf_columns, row)
+
+    def _on_walk_forward_done(self, result):
+        self.progress.setRange(0, 100)
+        self.progress.setValue(100)
+        self.btn_wf_run.setEnabled(True)
+        self.wf_result = result
+        self.btn_wf_equity.setEnabled(True)
+        self.tbl_wf_folds.sortItems(0, Qt.SortOrder.AscendingOrder)
+        self.wf_metrics_model.set_frame(result.metrics_df)
+        self.tbl_wf_metrics.resizeColumnsToContents()
+        self.statusBar().showMessage(
+            f"Walk-forward done: {len(result.folds_df)} folds, "
+            f"out-of-sample return {result.stats['Return [%]']:.2f}%"
+        )
+
+    def _on_walk_forward_equity(self):
+        if self.wf_result is not None:
+            self._show_equity_chart(
+                self.wf_result.equity, "Walk-forward out-of-sample equity", self.wf_result.folds_df
+            )
+
+    def _show_equity_chart(self, equity, title: str, folds_df=None):
+        try:
+            from core import equity_chart
+
+            path = equity_chart(equity, folds_df=folds_df, title=title)
+        except Exception as exc:
+            QMessageBox.critical(self, "Equity Chart", f"{type(exc).__name__}: {exc}")
+            return
+        self._on_plot_done(path)
+
+    def _on_batch(self):
+        cfg = self._collect_config()
+        if cfg is None:
+            return
+        from batch import batch_sources, parse_symbols
+
+        try:
+            sources = batch_sources(
+                cfg,
+                parse_symbols(self.batch_symbols.toPlainText()),
+                self.batch_folder.text().strip() or None,
+            )
+        except Exception as exc:
+            QMessageBox.critical(self, "Invalid Batch", str(exc))
+            return
+
+        self._save_state()
+        self.txt_log.clear()
+        self.btn_batch_run.setEnabled(False)
+        self.batch_columns = ["Symbol", "Status", "Seconds"] + METRIC_KEYS + ["Error"]
+        reset_table(self.tbl_batch, self.batch_columns)
+        self.tabs.setCurrentWidget(self.tab_batch)
+
+        self.batch_worker = BatchWorker(
+            sources, self.spn_batch_workers.value(), self.spn_batch_timeout.value() or None
+        )
+        self.batch_worker.row.connect(self._on_batch_row)
+        self.batch_worker.done.connect(self._on_batch_done)
+        self.batch_worker.errored.connect(self._on_error)
+        self._start_job(self.batch_worker)
+        self._on_progress(0, len(sources), self.batch_worker)
+
+    def _on_batch_row(self, row: dict):
+        append_table_row(self.tbl_batch, self.batch_columns, row)
+        self._on_progress(
+            self.tbl_batch.rowCount(), len(self.batch_worker.sources), self.batch_worker
+        )
+
+    def _on_batch_done(self, results: pd.DataFrame):
+        self.btn_batch_run.setEnabled(True)
+        self.progress.setValue(self.progress.maximum())
+        ok = int((results["Status"] == "ok").sum()) if len(results) else 0
+        self.statusBar().showMessage(
+            f"Batch done: {ok}/{len(results)} succeeded"
+        )
+
+    def _on_portfolio(self):
+        cfg = self._collect_config()
+        if cfg is None:
+            return
+        from batch import parse_symbols
+        from portfolio import PortfolioConfig
+
+        pcfg = PortfolioConfig(
+            max_weight=self.spn_pf_max_weight.value() / 100,
+            rebalance=REBALANCE[self.cmb_pf_rebalance.currentText()],
+            long_only=self.chk_pf_long_only.isChecked(),
+        )
+
+        self._save_state()
+        self.txt_log.clear()
+        self.btn_pf_run.setEnabled(False)
+        self.btn_pf_equity.setEnabled(False)
+        self.pf_result = None
+        for model in (self.pf_metrics_model, self.pf_assets_model, self.pf_trades_model):
+            model.clear()
+        self.tabs.setCurrentWidget(self.tab_portfolio)
+
+        self.pf_worker = PortfolioWorker(
+            cfg, parse_symbols(self.pf_symbols.toPlainText()), self.pf_folder.text().strip() or None, pcfg
+        )
+        self.pf_worker.done.connect(self._on_portfolio_done)
+        self.pf_worker.errored.connect(self._on_error)
+        self._start_job(self.pf_worker)
+
+    def _on_portfolio_done(self, result):
+        self.progress.setRange(0, 100)
+        self.progress.setValue(100)
+        self.btn_pf_run.setEnabled(True)
+        self.pf_result = result
+        self.btn_pf_equity.setEnabled(True)
+        self.pf_metrics_model.set_frame(result.metrics_df)
+        self.pf_assets_model.set_frame(result.assets_df)
+        self.pf_trades_model.set_frame(result.trades_df)
+        for view in (self.tbl_pf_metrics, self.tbl_pf_assets, self.tbl_pf_trades):
+            view.resizeColumnsToContents()
+        self.statusBar().showMessage(
+            f"Portfolio done: {len(result.assets_df)} assets, {len(result.trades_df)} trades, "
+            f"return {result.stats['Return [%]']:.2f}%"
+        )
+
+    def _on_portfolio_equity(self):
+        if self.pf_result is not None:
+            self._show_equity_chart(self.pf_result.equity, "Portfolio equity")
+
+    def _on_replay(self):
+        cfg = self._collect_config()
+        if cfg is None:
+            return
+
+        self._save_state()
+        self.txt_log.clear()
+        self.btn_replay_start.setEnabled(False)
+        self.btn_replay_stop.setEnabled(True)
+        self.btn_replay_equity.setEnabled(False)
+        self.replay_result = None
+        self.replay_orders_model.clear()
+        self.replay_metrics_model.clear()
+        reset_table(self.tbl_replay_trades, self.replay_trade_columns)
+        self.lbl_replay.setText("Starting…")
+        self.tabs.setCurrentWidget(self.tab_replay)
+
+        self.replay_worker = ReplayWorker(
+            cfg,
+            REPLAY_SOURCES[self.cmb_replay_source.currentText()],
+            self.inp_replay_target.text().strip() or None,
+            self.spn_replay_history.value(),
+            self.spn_replay_speed.value(),
+        )
+        self.replay_worker.tick.connect(self._on_replay_tick)
+        self.replay_worker.done.connect(self._on_replay_done)
+        self.replay_worker.errored.connect(self._on_error)
+        self._start_job(self.replay_worker)
+
+    def _on_replay_stop(self):
+        if self.replay_worker is not None:
+            self.replay_worker.cancel()
+            self.statusBar().showMessage("Stopping replay…")
+
+    def _on_replay_tick(self, snap: dict):
+        import pandas as pd
+
+        latency = f" · {snap['latency'] * 1e6:,.0f} µs/bar" if snap["latency"] is not None else ""
+        self.lbl_replay.setText(
+            f"Bar {snap['bars']:,} · {snap['time']} · Close {snap['close']:,.2f} · "
+            f"Equity {snap['equity']:,.2f} · Position {snap['position']:,} ({snap['position_pl']:+,.2f})"
+            f" · {snap['closed']:,} trades{latency}"
+        )
+        self.replay_orders_model.set_frame(pd.DataFrame(snap["orders"], columns=self.replay_order_columns))
+        for row in snap["new_trades"]:
+            append_table_row(self.tbl_replay_trades, self.replay_trade_columns, row)
+        if snap["new_trades"]:
+            self.tbl_replay_trades.scrollToBottom()
+
+    def _on_replay_done(self, result):
+        self.progress.setRange(0, 100)
+        self.progress.setValue(100)
+        self.btn_replay_start.setEnabled(True)
+        self.btn_replay_stop.setEnabled(False)
+        self.replay_result = result
+        self.btn_replay_equity.setEnabled(result.bars > 0)
+        self.replay_metrics_model.set_frame(result.metrics_df)
+        self.tbl_replay_metrics.resizeColumnsToContents()
+        if result.latency:
+            self.txt_log.appendPlainText(
+                f"Replay: {result.bars:,} bars; per bar median {result.latency['median'] * 1e6:,.0f} µs, "
+                f"p99 {result.latency['p99'] * 1e6:,.0f} µs, max {result.latency['max'] * 1e6:,.0f} µs"
+            )
+        self.statusBar().showMessage(f"Replay finished: {result.bars:,} bars, {len(result.trades_df)} trades")
+
+    def _on_replay_equity(self):
+        if self.replay_result is not None:
+            self._show_equity_chart(self.replay_result.equity, "Replay equity")
+
+    def _on_tab_changed(self, index: int):
+        if self.tabs.widget(index) is self.tab_history:
+            self._refresh_history()
+
+    def _refresh_history(self):
+        try:
+            self.history_model.set_frame(self._ensure_store().history())
+        except Exception as exc:
+            self.txt_log.appendPlainText(f"History unavailable: {type(exc).__name__}: {exc}")
+            return
+        self.tbl_history.resizeColumnsToContents()
+
+    def _selected_history_ids(self) -> list:
+        rows = sorted(index.row() for index in self.tbl_history.selectionModel().selectedRows())
+        return [int(i) for i in self.history_model.frame()["Id"].iloc[rows]]
+
+    def _on_history_load(self):
+        ids = self._selected_history_ids()
+        if not ids:
+            return
+        cfg, result = self._ensure_store().load(ids[0])
+        self.last_cfg = cfg  # a chart re-runs it
+        self._show_result(result)
+        self.statusBar().showMessage(f"Showing run #{ids[0]} from history")
+
+    def _on_history_compare(self):
+        ids = self._selected_history_ids()
+        if ids:
+            self.compare_model.set_frame(self._ensure_store().compare(ids))
+            self.tbl_compare.resizeColumnsToContents()
+
+    def _on_history_delete(self):
+        ids = self._selected_history_ids()
+        if not ids:
+            return
+        answer = QMessageBox.question(self, "Delete Runs", f"Delete {len(ids)} run(s) from the history?")
+        if answer == QMessageBox.StandardButton.Yes:
+            self._ensure_store().delete(ids)
+            self._refresh_history()
+
+    def _on_heatmap(self):
+        if self.opt_results is None or not len(self.opt_results):
+            return
+        try:
+            from backtesting.lib import plot_heatmaps
+            from optimizer import heatmap_series
+
+            opt = self.opt_worker.opt
+            plot_heatmaps(heatmap_series(self.opt_results, list(opt.param_ranges), opt.maximize))
+        except Exception as exc:
+            QMessageBox.critical(self, "Heatmap", f"{type(exc).__name__}: {exc}")
 
     # ensure settings persist
     def closeEvent(self, event):
+        for worker in self.jobs:
+            worker.cancel()
+            worker.wait(5000)
         try:
             self._save_state()
         finally:
+            if self.pool is not None:
+                self.pool.shutdown()
             super().closeEvent(event)
 
 
-# --------------------------- Defaults ------------------------------- #
-DEFAULT_STRATEGY_CODE = r"""
-# Example Strategy
-# IMPORTANT: Keep the class name exactly `Strategy` and subclass backtesting.Strategy
-
-from backtesting import Strategy
-from backtesting.lib import crossover
-from backtesting.test import SMA
-
-class Strategy(Strategy):
-    def init(self):
-        self.sma_fast = self.I(SMA, self.data.Close, 10)
-        self.sma_slow = self.I(SMA, self.data.Close, 20)
-
-    def next(self):
-        if crossover(self.sma_fast, self.sma_slow):
-            self.position.close()
-            self.buy()
-        elif crossover(self.sma_slow, self.sma_fast):
-            self.position.close()
-            self.sell()
-""".strip()
-
-
 # --------------------------- Entrypoint ----------------------------- #
 def main() -> int:
     app = QApplication(sys.argv)
@@ -0,0 +1,230 @@
+"""
+Backtest throughput benchmark for the PasTick workbench.
+
+Runs reference strategies (the workbench's default SMA cross and `SmaCross`
+from sample.py) over synthetic OHLCV series through `core.run_backtest`, the
+same path as the GUI and headless runner, and reports the per-phase timings,
+throughput in bars per second and peak traced memory. Results are compared
+with a stored baseline; a throughput drop or memory growth beyond the
+tolerance exits with status 1. Timings depend on the machine, so no baseline
+is shipped: record one with --update-baseline first (running without one is
+an error).
+
+    python backtest_bench.py --update-baseline               # record/accept the current numbers
+    python backtest_bench.py                                 # 10k, 100k and 1M bars
+    python backtest_bench.py --sizes 10000 100000 --repeat 5 --engine vectorized
+
+The synthetic series is a geometric random walk of one-minute bars, written as
+a CSV and loaded through datastore.py's cache (kept in a temporary directory),
+so the timings exclude the first CSV parse. The indicator cache is cleared
+before every run.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import warnings
+import statistics
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_BASELINE = HERE / "bench_baseline.json"
+PHASE_COLUMNS = ["load", "run", "metrics", "total"]
+
+
+def make_ohlcv(path: Path, bars: int, seed: int = 0) -> None:
+    """Write `bars` one-minute OHLCV bars of a geometric random walk to `path`."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, bars)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0005, bars)) * close
+    df = pd.DataFrame(
+        {
+            "Date": pd.date_range("2000-01-03", periods=bars, freq="1min"),
+            "Open": open_,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Close": close,
+            "Volume": rng.integers(100, 10_000, bars),
+        }
+    )
+    df.to_csv(path, index=False, float_format="%.6f")
+
+
+def reference_strategies() -> dict:
+    """{name: strategy source} of the reference strategies."""
+    from choices import DEFAULT_STRATEGY_CODE
+
+    sample = (HERE / "sample.py").read_text(encoding="utf-8")
+    return {
+        "sma_cross": DEFAULT_STRATEGY_CODE,
+        # the loader looks for a class named Strategy
+        "SmaCross": sample.replace("class SmaCross(Strategy)", "class Strategy(Strategy)"),
+    }
+
+
+def _quiet_run(cfg):
+    from core import run_backtest
+    from indicators import indicator_cache
+
+    indicator_cache.clear()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # open trades at the end warn
+        return run_backtest(cfg, smoke=False)
+
+
+def run_once(cfg) -> dict:
+    """Phase timings of one run, plus its total and trade count."""
+    t0 = time.perf_counter()
+    result = _quiet_run(cfg)
+    timings = dict(result.timings)
+    timings["total"] = time.perf_counter() - t0
+    timings["trades"] = len(result.trades_df)
+    return timings
+
+
+def peak_memory(cfg) -> float:
+    """Peak traced MB of one run (a separate pass: tracing slows the run down several times)."""
+    tracemalloc.start()
+    try:
+        _quiet_run(cfg)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(runs: list, bars: int) -> dict:
+    row = {
+        phase: statistics.median(r[phase] for r in runs)
+        for phase in PHASE_COLUMNS
+        if all(phase in r for r in runs)
+    }
+    row["min_total"] = min(r["total"] for r in runs)
+    row["bars_per_second"] = bars / row["run"] if row.get("run") else None
+    row["trades"] = runs[0]["trades"]
+    row["peak_mb"] = runs[0].get("peak_mb")
+    return row
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Messages for cases whose throughput fell or memory grew by more than `tolerance`."""
+    regressions = []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if base.get("bars_per_second") and row.get("bars_per_second"):
+            change = row["bars_per_second"] / base["bars_per_second"] - 1
+            row["throughput_change"] = change
+            if change < -tolerance:
+                regressions.append(f"{name}: throughput {change:+.1%} vs baseline")
+        if base.get("peak_mb") and row.get("peak_mb"):
+            change = row["peak_mb"] / base["peak_mb"] - 1
+            row["memory_change"] = change
+            if change > tolerance:
+                regressions.append(f"{name}: peak memory {change:+.1%} vs baseline")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark backtest throughput and memory")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="bars per series")
+    parser.add_argument("--engine", choices=["event", "vectorized"], default="event")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="baseline JSON (default: %(default)s)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--json", help="write the results here as JSON")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    baseline_path = Path(args.baseline)
+    if not args.update_baseline and not baseline_path.exists():
+        parser.error(f"no baseline at {baseline_path}; record one on this machine with --update-baseline")
+
+    sys.path.insert(0, str(HERE))
+    from core import RunConfig, load_data_frame, load_strategy_from_source
+    from vectorized import supports_vectorized
+
+    strategies = reference_strategies()
+    if args.engine == "vectorized":
+        strategies = {
+            name: code
+            for name, code in strategies.items()
+            if supports_vectorized(load_strategy_from_source(code))
+        }
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="backtest_bench_") as tmp:
+        os.environ["PASTICK_CACHE_DIR"] = tmp  # keep the bench data out of the user's cache
+        for bars in args.sizes:
+            csv_path = Path(tmp) / f"synthetic_{bars}.csv"
+            t0 = time.perf_counter()
+            make_ohlcv(csv_path, bars, args.seed)
+            for name, code in strategies.items():
+                cfg = RunConfig(
+                    symbol="SYNTH",
+                    timeframe="Intraday",
+                    csv_path=str(csv_path),
+                    start_date_iso=None,
+                    end_date_iso=None,
+                    cash=1_000_000.0,
+                    commission=0.0005,
+                    strategy_code=code,
+                    engine=args.engine,
+                )
+                if t0 is not None:
+                    load_data_frame(cfg)  # parse the CSV into the datastore cache
+                    print(f"generated {bars:,} bars in {time.perf_counter() - t0:.2f}s")
+                    t0 = None
+                runs = [run_once(cfg) for _ in range(args.repeat)]
+                if not args.no_memory:
+                    runs[0]["peak_mb"] = peak_memory(cfg)
+                results[f"{name}/{bars}/{args.engine}"] = summarize(runs, bars)
+
+    baseline = {}
+    if baseline_path.exists():
+        with open(baseline_path, encoding="utf-8") as fh:
+            baseline = json.load(fh).get("results", {})
+    regressions = compare(results, baseline, args.tolerance)
+
+    print(f"\n{'case':<28}" + "".join(f"{p + ' s':>10}" for p in PHASE_COLUMNS) + f"{'bars/s':>13}{'peak MB':>10}{'vs base':>9}")
+    for name, row in results.items():
+        cells = "".join(f"{row[p]:>10.3f}" if p in row else f"{'-':>10}" for p in PHASE_COLUMNS)
+        rate = f"{row['bars_per_second']:>13,.0f}" if row["bars_per_second"] else f"{'-':>13}"
+        peak = f"{row['peak_mb']:>10.1f}" if row["peak_mb"] is not None else f"{'-':>10}"
+        change = f"{row['throughput_change']:>+9.1%}" if "throughput_change" in row else f"{'new':>9}"
+        print(f"{name:<28}{cells}{rate}{peak}{change}")
+    for msg in regressions:
+        print(f"REGRESSION {msg}")
+
+    report = {
+        "params": vars(args),
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+        "regressions": regressions,
+    }
+    if args.update_baseline:
+        merged = {**baseline, **results}
+        with open(baseline_path, "w", encoding="utf-8") as fh:
+            json.dump({**report, "results": merged}, fh, indent=2)
+        print(f"baseline written to {baseline_path}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 1 if regressions and not args.update_baseline else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
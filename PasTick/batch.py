@@ -0,0 +1,127 @@
+"""
+Multi-symbol batch runs for the PasTick workbench.
+
+The same strategy runs on every symbol (or every OHLCV CSV in a folder) on a
+pool of warm worker processes (see workerpool.py). A run that exceeds the
+per-run timeout (or crashes) only costs its worker, which is replaced; the rest
+of the batch carries on. Per-symbol metrics are combined into one comparison table;
+the workers send back only the metrics, not the trades and equity curves.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+import queue
+import numbers
+import threading
+from pathlib import Path
+from dataclasses import replace
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+
+from core import RunCancelled, RunConfig, RunError, RunResult
+from workerpool import RunTimeout, WorkerPool
+
+
+def parse_symbols(text: str) -> List[str]:
+    """Symbols separated by commas, spaces or new lines."""
+    return list(dict.fromkeys(s for s in re.split(r"[\s,;]+", text.strip()) if s))
+
+
+def batch_sources(cfg: RunConfig, symbols: List[str], folder: Optional[str]) -> List[Tuple[str, RunConfig]]:
+    """
+    One (name, RunConfig) per run.
+    - symbols only: backtesting.test datasets by name
+    - folder only: every *.csv in the folder, named by file stem
+    - both: <folder>/<SYMBOL>.csv for each symbol
+    """
+    if folder:
+        root = Path(folder)
+        if not root.is_dir():
+            raise RunError(f"Folder not found: {folder}")
+        if symbols:
+            files = [(sym, root / f"{sym}.csv") for sym in symbols]
+        else:
+            files = [(f.stem, f) for f in sorted(root.glob("*.csv"))]
+            if not files:
+                raise RunError(f"No CSV files found in {folder}")
+        return [(name, replace(cfg, symbol=name, csv_path=str(f))) for name, f in files]
+    if not symbols:
+        raise RunError("Enter symbols or choose a folder of OHLCV CSVs.")
+    return [(sym, replace(cfg, symbol=sym, csv_path=None)) for sym in symbols]
+
+
+# --------------------------- Batch runner --------------------------- #
+def _result_row(name: str, result: RunResult) -> dict:
+    row = {"Symbol": name, "Status": "ok"}
+    row.update(
+        (k, float(v) if isinstance(v, numbers.Number) else v)
+        for k, v in zip(result.metrics_df["Metric"], result.metrics_df["Value"])
+    )
+    return row
+
+
+def run_batch(
+    sources: List[Tuple[str, RunConfig]],
+    workers: int = max(1, (os.cpu_count() or 2) - 1),
+    timeout: Optional[float] = None,
+    on_result: Optional[Callable[[dict], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> pd.DataFrame:
+    """
+    Run every source on a pool of `workers` warm worker processes.
+    Runs longer than `timeout` seconds are stopped (their worker is replaced) and
+    reported as "timeout". Setting `cancel` stops the runs in flight and raises
+    RunCancelled. Returns one row per source: Symbol, Status, Seconds, metrics (and Error).
+    """
+    if not sources:
+        raise RunError("Nothing to run: the batch has no symbols or CSV files.")
+    pending = queue.Queue()
+    for source in sources:
+        pending.put(source)
+    rows = []
+    lock = threading.Lock()
+    cancelled = []
+
+    def finish(row: dict) -> None:
+        with lock:
+            rows.append(row)
+            if on_result is not None:
+                on_result(row)
+
+    def drain(pool: WorkerPool) -> None:
+        # one thread per worker process keeps that worker busy
+        while not cancelled:
+            try:
+                name, cfg = pending.get_nowait()
+            except queue.Empty:
+                return
+            started = time.perf_counter()
+            try:
+                row = _result_row(name, pool.run(cfg, smoke=False, cancel=cancel, timeout=timeout, frames=False))
+            except RunCancelled:
+                cancelled.append(name)
+                return
+            except RunTimeout:
+                row = {"Symbol": name, "Status": "timeout"}
+            except Exception as exc:
+                row = {"Symbol": name, "Status": "error", "Error": f"{type(exc).__name__}: {exc}"}
+            row["Seconds"] = round(time.perf_counter() - started, 3)
+            finish(row)
+
+    size = max(1, min(workers, len(sources)))
+    with WorkerPool(size) as pool:
+        threads = [threading.Thread(target=drain, args=(pool,), daemon=True) for _ in range(size)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    if cancelled:
+        raise RunCancelled("Batch cancelled.")
+
+    df = pd.DataFrame(rows)
+    lead = [c for c in ("Symbol", "Status", "Seconds") if c in df.columns]
+    return df[lead + [c for c in df.columns if c not in lead]]
@@ -0,0 +1,119 @@
+"""
+Option lists and defaults for the PasTick workbench.
+
+Plain data with no imports, so GUI.py can build its selectors before pandas and
+backtesting.py are loaded, and tools without Qt (the benchmarks) can use the
+default strategy. The modules that use these lists re-export them
+(`from core import METRIC_KEYS` keeps working).
+"""
+
+# Timeframe selector label -> pandas resample rule (None keeps the stored resolution)
+TIMEFRAMES = {
+    "Daily": "1D",
+    "Intraday": None,
+    "5m": "5min",
+    "15m": "15min",
+    "1h": "1h",
+    "4h": "4h",
+}
+
+# Backtest engines (vectorized needs Strategy.signals, see vectorized.py)
+ENGINES = ["event", "vectorized"]
+
+# Metrics shown in the Metrics tab, in display order
+METRIC_KEYS = [
+    "Equity Final [$]",
+    "Equity Peak [$]",
+    "Return [%]",
+    "Buy & Hold Return [%]",
+    "# Trades",
+    "Win Rate [%]",
+    "Best Trade [%]",
+    "Worst Trade [%]",
+    "Avg. Trade [%]",
+    "Max. Drawdown [%]",
+    "Sharpe Ratio",
+    "Sortino Ratio",
+]
+
+# Keys offered as optimisation targets (higher is better for all of them)
+TARGET_METRICS = [
+    "Sharpe Ratio",
+    "Sortino Ratio",
+    "Calmar Ratio",
+    "Return [%]",
+    "Return (Ann.) [%]",
+    "Equity Final [$]",
+    "Win Rate [%]",
+    "Profit Factor",
+    "SQN",
+]
+
+METHODS = ["grid", "random", "sambo"]
+
+# Chart downsampling choices -> Backtest.plot(resample=...):
+# True lets backtesting.py cap the chart at ~10k candles, False plots every bar,
+# a pandas rule aggregates to that period.
+PLOT_RESAMPLE = {
+    "Auto": True,
+    "Off": False,
+    "1h": "1h",
+    "4h": "4h",
+    "1D": "1D",
+    "1W": "1W",
+}
+
+# Portfolio rebalancing choices -> pandas period (None: trade on signal changes only)
+REBALANCE = {
+    "On signal": None,
+    "Daily": "D",
+    "Weekly": "W",
+    "Monthly": "M",
+}
+
+# Replay feeds -> replay.run_replay(source=...)
+REPLAY_SOURCES = {
+    "Loaded data": "frame",
+    "Follow CSV": "csv",
+    "Socket feed": "socket",
+}
+
+# Monte Carlo resampling choices -> robustness.run_robustness (RobustnessConfig.method)
+ROBUSTNESS_METHODS = {
+    "Bootstrap trades": "trades",
+    "Shuffle trade order": "shuffle",
+    "Bootstrap daily returns": "returns",
+}
+
+
+# --------------------------- Defaults ------------------------------- #
+DEFAULT_STRATEGY_CODE = r"""
+# Example Strategy
+# IMPORTANT: Keep the class name exactly `Strategy` and subclass backtesting.Strategy
+
+from backtesting import Strategy
+from backtesting.lib import crossover
+from backtesting.test import SMA
+
+class Strategy(Strategy):
+    # class attributes are strategy parameters (tunable from the Optimize tab)
+    n_fast = 10
+    n_slow = 20
+
+    def init(self):
+        self.sma_fast = self.I(SMA, self.data.Close, self.n_fast)
+        self.sma_slow = self.I(SMA, self.data.Close, self.n_slow)
+
+    def next(self):
+        if crossover(self.sma_fast, self.sma_slow):
+            self.position.close()
+            self.buy()
+        elif crossover(self.sma_slow, self.sma_fast):
+            self.position.close()
+            self.sell()
+
+    # optional: the same rules as a position array, for the vectorized engine
+    # (crossover_positions is provided by the strategy loader)
+    def signals(self):
+        return crossover_positions(self.sma_fast, self.sma_slow)
+""".strip()
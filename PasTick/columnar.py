@@ -0,0 +1,231 @@
+"""
+Compact columnar transfer of result frames between PasTick processes.
+
+A worker packs the frames of a result (trades, equity curve) column by column
+into one buffer: fixed-dtype arrays at aligned offsets, with tz-aware times
+stored as UTC datetime64 and object columns (e.g. trade tags) as int32 codes
+into a list of distinct values. Large buffers go into shared memory and only
+the small layout crosses the pipe; the reader builds the DataFrames as NumPy
+views over the mapping, so the columns are neither pickled nor copied. Buffers
+under SHARED_MIN_BYTES travel inline (a bytearray), where a shared segment
+would cost more than it saves.
+
+Ownership: the writer owns each segment. It keeps its handle open until
+`release_segments()` (the worker pool calls it on its next request, when the
+reader has mapped the reply) and then unlinks the segment. Segments are named
+after the run (`segment_name`), so when a worker is killed before its reply is
+read, the pool unlinks the segment itself (`discard_segment`). The reader's
+mapping outlives the unlink and is closed once the last array over it has been
+garbage collected.
+
+Extension dtypes and categoricals come back as object columns, and a RangeIndex
+as a plain integer index.
+"""
+
+from __future__ import annotations
+
+import weakref
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core import RunResult
+
+ALIGN = 64  # byte alignment of each column
+SHARED_MIN_BYTES = 256 * 1024
+EMPTY_TRADE_COLUMNS = ["EntryTime", "ExitTime", "EntryPrice", "ExitPrice", "PnL"]
+
+_held: List[shared_memory.SharedMemory] = []  # segments this process wrote, see release_segments
+_mapped: List[Tuple[weakref.ref, "_Segment"]] = []  # (array over it, segment) read here
+
+
+class _Segment(shared_memory.SharedMemory):
+    def __del__(self):
+        try:
+            self.close()
+        except (OSError, BufferError):  # arrays over it can outlive the segment at interpreter exit
+            pass
+
+
+@dataclass
+class Column:
+    name: Any  # column label (or index name)
+    dtype: str  # NumPy dtype string of the stored array
+    offset: int
+    length: int
+    kind: Optional[str] = None  # "tz:<zone>" (UTC times) or "codes" (indices into `values`)
+    values: Optional[list] = None
+
+
+@dataclass
+class PackedFrames:
+    """DataFrames laid out in one buffer; each table's first Column is its index."""
+
+    tables: Dict[str, List[Column]]
+    nbytes: int
+    shm_name: Optional[str] = None  # shared memory segment holding the buffer, or
+    data: Optional[bytearray] = None  # the buffer itself
+
+
+@dataclass
+class PackedResult:
+    """A RunResult as a worker sends it: trades and equity packed, the rest as is."""
+
+    metrics_df: pd.DataFrame
+    frames: Optional[PackedFrames] = None  # None: the frames were not requested
+    run_id: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+# --------------------------- Columns -------------------------------- #
+def _encode(values) -> Tuple[np.ndarray, Optional[str], Optional[list]]:
+    """(fixed-dtype array, kind, values) of a column or index."""
+    dtype = values.dtype
+    tz = getattr(dtype, "tz", None)
+    if tz is not None:
+        return pd.DatetimeIndex(values).tz_convert("UTC").tz_localize(None).to_numpy(), f"tz:{tz}", None
+    if isinstance(dtype, np.dtype) and dtype != object:
+        return np.asarray(values), None, None
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))  # missing -> -1
+    return codes.astype(np.int32), "codes", list(uniques)
+
+
+def _decode(array: np.ndarray, col: Column):
+    if col.kind == "codes":
+        lookup = np.empty(len(col.values) + 1, dtype=object)  # the last slot (-1) stays None
+        for i, val in enumerate(col.values):
+            lookup[i] = val
+        return lookup[array]
+    if col.kind and col.kind.startswith("tz:"):
+        return pd.DatetimeIndex(array).tz_localize("UTC").tz_convert(col.kind[3:])
+    return array
+
+
+def _view(buf, col: Column) -> np.ndarray:
+    if col.length == 0:
+        return np.empty(0, dtype=col.dtype)
+    return np.frombuffer(buf, dtype=col.dtype, count=col.length, offset=col.offset)
+
+
+# --------------------------- Segments ------------------------------ #
+def segment_name(run_id: str) -> str:
+    """Shared memory name for the frames of run `run_id` (short enough for macOS)."""
+    return f"pastick_{run_id[:16]}"
+
+
+def discard_segment(name: str) -> None:
+    """Unlink segment `name` if it still exists (its writer died before releasing it)."""
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+# --------------------------- Frames --------------------------------- #
+def pack(
+    frames: Dict[str, pd.DataFrame], shared: Optional[bool] = None, segment: Optional[str] = None
+) -> PackedFrames:
+    """
+    Lay out `frames` in one buffer; `shared` None picks shared memory for large
+    ones, created under the name `segment` if given.
+    """
+    tables, arrays, offset = {}, [], 0
+    for table, df in frames.items():
+        cols = []
+        for name, values in [(df.index.name, df.index)] + list(df.items()):
+            array, kind, uniques = _encode(values)
+            array = np.ascontiguousarray(array)
+            cols.append(Column(name, array.dtype.str, offset, len(array), kind, uniques))
+            arrays.append((offset, array))
+            offset += -(-array.nbytes // ALIGN) * ALIGN
+        tables[table] = cols
+
+    if shared is None:
+        shared = offset >= SHARED_MIN_BYTES
+    if shared:
+        shm = shared_memory.SharedMemory(name=segment, create=True, size=max(offset, 1))
+        _held.append(shm)
+        buf, packed = shm.buf, PackedFrames(tables, offset, shm_name=shm.name)
+    else:
+        buf = bytearray(offset)
+        packed = PackedFrames(tables, offset, data=buf)
+    for off, array in arrays:
+        if len(array):
+            np.frombuffer(buf, dtype=array.dtype, count=len(array), offset=off)[:] = array
+    return packed
+
+
+def _close_unused() -> None:
+    """Close the segments read here whose arrays have all been garbage collected."""
+    for item in list(_mapped):
+        if item[0]() is None:
+            _mapped.remove(item)
+            item[1].close()
+
+
+def _attach(name: str) -> np.ndarray:
+    """Bytes of segment `name`; the segment stays mapped while any array over them is alive."""
+    _close_unused()
+    shm = _Segment(name=name)
+    base = np.frombuffer(shm.buf, dtype=np.uint8)
+    _mapped.append((weakref.ref(base), shm))
+    return base
+
+
+def unpack(packed: PackedFrames) -> Dict[str, pd.DataFrame]:
+    """The packed frames, their columns as views over the buffer (object columns excepted)."""
+    buf = _attach(packed.shm_name) if packed.shm_name else packed.data
+    frames = {}
+    for table, (index_col, *cols) in packed.tables.items():
+        index = pd.Index(_decode(_view(buf, index_col), index_col), name=index_col.name, copy=False)
+        df = pd.DataFrame({i: _decode(_view(buf, c), c) for i, c in enumerate(cols)}, index=index, copy=False)
+        df.columns = [c.name for c in cols]
+        frames[table] = df
+    return frames
+
+
+def release_segments() -> None:
+    """Close and unlink the segments this process wrote (readers keep their mappings)."""
+    while _held:
+        shm = _held.pop()
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# --------------------------- Results -------------------------------- #
+def pack_result(
+    result: RunResult,
+    run_id: Optional[str] = None,
+    frames: bool = True,
+    shared: Optional[bool] = None,
+    segment: Optional[str] = None,
+) -> PackedResult:
+    """
+    `result` for the pipe; `frames=False` drops the trades and equity (metrics-only
+    callers). A shared buffer is created under the name `segment` if given.
+    """
+    packed = None
+    if frames:
+        tables = {"trades": result.trades_df}
+        if result.equity is not None:
+            tables["equity"] = result.equity.to_frame("Equity")
+        packed = pack(tables, shared, segment)
+    return PackedResult(result.metrics_df, packed, run_id=run_id, timings=result.timings)
+
+
+def unpack_result(packed: PackedResult) -> RunResult:
+    if packed.frames is None:
+        trades_df, equity = pd.DataFrame(columns=EMPTY_TRADE_COLUMNS), None
+    else:
+        tables = unpack(packed.frames)
+        trades_df = tables["trades"]
+        equity = tables["equity"]["Equity"] if "equity" in tables else None
+    return RunResult(packed.metrics_df, trades_df, run_id=packed.run_id, equity=equity, timings=packed.timings)
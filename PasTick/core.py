@@ -0,0 +1,483 @@
+"""
+Qt-free backtest core for the PasTick workbench.
+
+Holds the run configuration, the strategy loader, data loading and the
+backtest runner so that worker processes (optimisation sweeps, batch runs)
+can use them without importing PyQt6. GUI.py re-exports these names.
+"""
+
+from __future__ import annotations
+
+import os
+import ast
+import types
+import hashlib
+import linecache
+import time
+import threading
+import warnings
+import tempfile
+import traceback
+import pandas as pd
+from backtesting import Backtest
+from backtesting import Strategy as BTStrategy
+from pathlib import Path
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from choices import METRIC_KEYS, PLOT_RESAMPLE, TIMEFRAMES
+from datastore import DataStoreError, load_ohlcv, resample_frame
+from indicators import with_indicator_cache
+from vectorized import crossover_positions, run_vectorized, supports_vectorized
+
+
+# --------------------------- Config model --------------------------- #
+@dataclass
+class RunConfig:
+    symbol: str
+    timeframe: str
+    csv_path: Optional[str]
+    start_date_iso: str
+    end_date_iso: str
+    cash: float
+    commission: float
+    strategy_code: str
+    smoke_bars: int = 300  # bars of next() exercised before the full run (0 disables)
+    engine: str = "event"  # event | vectorized (needs Strategy.signals, see vectorized.py)
+
+
+# --------------------------- Strategy loader ------------------------ #
+
+
+# TODO add the libraries so that they are imported implicityly and need not be mentioned in the strategy dialogbox
+class RunError(Exception):
+    pass
+
+
+class RunCancelled(RunError):
+    pass
+
+
+STRATEGY_FILENAME = "<strategy>"
+_CODE_CACHE_SIZE = 32
+_code_cache: "OrderedDict[str, types.CodeType]" = OrderedDict()
+_code_cache_lock = threading.Lock()
+
+
+def source_hash(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def _strategy_class_problems(tree: ast.Module) -> List[str]:
+    """Structural checks on the parsed source (no code is executed)."""
+    classes = {n.name: n for n in tree.body if isinstance(n, ast.ClassDef)}
+    node = classes.get("Strategy")
+    if node is None:
+        return [
+            "No class named 'Strategy' found.\n"
+            "Please define: `class Strategy(backtesting.Strategy): ...`"
+        ]
+
+    def base_name(base) -> str:
+        if isinstance(base, ast.Name):
+            return base.id
+        if isinstance(base, ast.Attribute):
+            return base.attr
+        return ""
+
+    # walk Strategy and the base classes declared in the same source
+    methods, seen, todo = set(), set(), [node]
+    external_bases = []
+    while todo:
+        cls = todo.pop()
+        seen.add(cls.name)
+        methods.update(
+            n.name for n in cls.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))
+        )
+        for b in cls.bases:
+            parent = classes.get(base_name(b))
+            # only classes defined earlier are in scope (`class Strategy(Strategy)`)
+            if parent is not None and parent.lineno < cls.lineno:
+                if parent.name not in seen:
+                    todo.append(parent)
+            else:
+                external_bases.append(base_name(b))
+
+    problems = []
+    if not any(name.endswith("Strategy") for name in external_bases):
+        problems.append(f"line {node.lineno}: `Strategy` must subclass backtesting.Strategy.")
+    for name in ("init", "next"):
+        if name not in methods:
+            problems.append(f"line {node.lineno}: `Strategy` does not define `{name}(self)`.")
+    return problems
+
+
+def validate_strategy_source(source: str) -> List[str]:
+    """
+    Pre-run check of the strategy source: syntax, a `Strategy` class that
+    subclasses backtesting.Strategy, and `init`/`next` methods. Returns a list of
+    problems (empty when the code looks runnable). Valid code is compiled into
+    the code cache so the next run skips recompilation.
+    """
+    key = source_hash(source)
+    with _code_cache_lock:
+        if key in _code_cache:
+            return []
+    try:
+        tree = ast.parse(source, filename=STRATEGY_FILENAME)
+    except SyntaxError as exc:
+        return [f"line {exc.lineno}: {exc.msg}" + (f"\n    {exc.text.strip()}" if exc.text else "")]
+    problems = _strategy_class_problems(tree)
+    if not problems:
+        _cache_code(key, compile(tree, STRATEGY_FILENAME, "exec"))
+    return problems
+
+
+def _cache_code(key: str, code: types.CodeType) -> None:
+    with _code_cache_lock:
+        _code_cache[key] = code
+        _code_cache.move_to_end(key)
+        while len(_code_cache) > _CODE_CACHE_SIZE:
+            _code_cache.popitem(last=False)
+
+
+def compile_strategy(source: str) -> types.CodeType:
+    """Compiled strategy code, cached by source hash. Raises RunError on problems."""
+    key = source_hash(source)
+    with _code_cache_lock:
+        code = _code_cache.get(key)
+        if code is not None:
+            _code_cache.move_to_end(key)
+    if code is None:
+        problems = validate_strategy_source(source)
+        if problems:
+            raise RunError("Strategy check failed:\n" + "\n".join(problems))
+        with _code_cache_lock:
+            code = _code_cache[key]
+    # lets tracebacks from user code show the offending source lines
+    linecache.cache[STRATEGY_FILENAME] = (len(source), None, source.splitlines(True), STRATEGY_FILENAME)
+    return code
+
+
+def load_strategy_from_source(source: str):
+    """
+    Execute user-supplied code and return the Strategy class.
+    The code must define: class Strategy(backtesting.Strategy): ...
+    """
+    code = compile_strategy(source)
+    module = types.ModuleType("user_strategy")
+    # helpers strategies may use without importing PasTick's modules
+    module.crossover_positions = crossover_positions
+    try:
+        exec(code, module.__dict__)  # noqa: S102 (intentional: local execution)
+    except Exception as exc:  # bubble error with traceback
+        raise RunError(f"Strategy code error:\n{traceback.format_exc()}") from exc
+
+    Strategy = getattr(module, "Strategy", None)
+    if Strategy is None or not isinstance(Strategy, type):
+        raise RunError(
+            "No class named 'Strategy' found.\n"
+            "Please define: `class Strategy(backtesting.Strategy): ...`"
+        )
+    # Optional: sanity check that it subclasses BTStrategy
+    if not issubclass(Strategy, BTStrategy):
+        raise RunError("`Strategy` must subclass backtesting.Strategy.")
+    # self.I(...) results are reused across runs and sweeps (see indicators.py)
+    return with_indicator_cache(Strategy)
+
+
+# --------------------------- Data loading --------------------------- #
+def load_data_frame(cfg: RunConfig) -> pd.DataFrame:
+    """
+    Load OHLCV dataframe with DateTimeIndex and columns: Open, High, Low, Close, Volume.
+    - If csv_path is provided, read CSV and normalize (cached by datastore.py).
+    - Else, attempt to load from backtesting.test by symbol (uppercased).
+    - Finally, fallback to bt_test.GOOG.
+    Bars are resampled to cfg.timeframe (see choices.TIMEFRAMES).
+    """
+    if cfg.csv_path:
+        # parsed/normalized (and resampled) once per file version; only the date window is read back
+        try:
+            df = load_ohlcv(
+                cfg.csv_path,
+                cfg.start_date_iso,
+                cfg.end_date_iso,
+                rule=TIMEFRAMES.get(cfg.timeframe),
+            )
+        except DataStoreError as exc:
+            raise RunError(str(exc)) from exc
+    else:
+        # Try dynamic dataset from backtesting.test
+        import backtesting.test  # reads the bundled sample CSVs; only needed here
+
+        sym = (cfg.symbol or "GOOG").strip()
+        df = getattr(backtesting.test, sym)
+        df = resample_frame(f"backtesting.test.{sym}", df, TIMEFRAMES.get(cfg.timeframe))
+        return df
+
+    try:
+        # Ensure required columns exist
+        expected_cols = {"Open", "High", "Low", "Close", "Volume"}
+        if expected_cols.issubset(set(df.columns)):
+            return df
+    except Exception:
+        print("Error generating test dataframe")
+    return None
+
+
+# --------------------------- Smoke test ----------------------------- #
+def smoke_test(Strategy, data: pd.DataFrame, cfg: RunConfig) -> int:
+    """
+    Run the strategy on a short head slice so errors in `next()` surface in well
+    under a second instead of after most of a long series. The slice grows until
+    `cfg.smoke_bars` calls of `next()` happen after indicator warm-up, capped at
+    half the data (beyond that the full run is about as quick). Returns the number
+    of bars exercised; raises RunError with the traceback on failure.
+    """
+    bars = cfg.smoke_bars
+    limit = len(data) // 2
+    if bars <= 0 or limit <= bars:
+        return 0
+
+    calls = 0
+
+    class SmokeStrategy(Strategy):
+        def next(self):
+            nonlocal calls
+            calls += 1
+            super().next()
+
+    n = bars
+    while True:
+        calls = 0
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                Backtest(
+                    data.iloc[:n],
+                    SmokeStrategy,
+                    cash=cfg.cash,
+                    commission=cfg.commission,
+                    exclusive_orders=True,
+                ).run()
+        except Exception as exc:
+            raise RunError(
+                f"Smoke test failed on the first {n} bars "
+                f"({calls} calls of next()):\n{traceback.format_exc()}"
+            ) from exc
+        if calls >= bars or n >= limit:
+            return calls
+        # warm-up ate the slice: extend by what is missing, or grow fast if next() never ran
+        n = min(limit, n + (bars - calls) + 1 if calls else n * 4)
+
+
+# --------------------------- Backtest runner ------------------------ #
+PROGRESS_INTERVAL = 0.1  # seconds between progress callbacks
+
+
+def track_progress(
+    Strategy,
+    total: int,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    interval: float = PROGRESS_INTERVAL,
+):
+    """
+    Subclass of `Strategy` whose `next()` reports (bars processed, total bars) to
+    `progress` at most every `interval` seconds and raises RunCancelled once
+    `cancel` is set, which stops `Backtest.run` at the current bar.
+    """
+    last = 0.0
+
+    class Tracked(Strategy):
+        def next(self):
+            nonlocal last
+            if cancel is not None and cancel.is_set():
+                raise RunCancelled("Run cancelled.")
+            if progress is not None:
+                now = time.perf_counter()
+                if now - last >= interval:
+                    last = now
+                    progress(len(self.data), total)
+            super().next()
+
+    # keep the user's name in stats and charts
+    Tracked.__name__ = Tracked.__qualname__ = Strategy.__name__
+    return Tracked
+
+
+# Phases timed by run_backtest (RunResult.timings); the GUI adds "plot" and "table"
+PHASES = ["compile", "load", "smoke", "run", "metrics"]
+
+
+@dataclass
+class RunResult:
+    metrics_df: pd.DataFrame  # 2-col [Metric, Value]
+    trades_df: pd.DataFrame
+    stats: Optional[pd.Series] = None  # full bt.run() output, needed for plotting
+    bt: Optional[Backtest] = None
+    run_id: Optional[str] = None  # set when the run lives in a workerpool process
+    equity: Optional[pd.Series] = None  # equity curve (bar time -> equity)
+    timings: Dict[str, float] = field(default_factory=dict)  # seconds per phase (PHASES)
+
+
+def run_backtest(
+    cfg: RunConfig,
+    smoke: bool = True,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> RunResult:
+    """
+    Run a backtest with Backtesting.py and return as soon as stats are ready;
+    charts are rendered separately with `render_plot`.
+    `smoke=True` first runs `smoke_test` on a short slice to fail fast.
+    `progress(bars_done, total_bars)` is called at a throttled rate from the bar
+    loop; setting `cancel` stops the run with RunCancelled.
+    With `cfg.engine == "vectorized"` the stats come from `run_vectorized` instead
+    of the bar loop (no smoke test or progress: there is no `next()` to watch).
+    Seconds spent per phase are returned in `RunResult.timings`.
+    """
+    timings = {}
+    t0 = time.perf_counter()
+    # Compile strategy
+    Strategy = load_strategy_from_source(cfg.strategy_code)
+    vectorized = cfg.engine == "vectorized"
+    if vectorized and not supports_vectorized(Strategy):
+        raise RunError(
+            "The vectorized engine needs a `signals(self)` method on Strategy\n"
+            "returning the target position per bar (+1 / -1 / 0), e.g.\n"
+            "    return crossover_positions(self.sma_fast, self.sma_slow)"
+        )
+
+    t1 = time.perf_counter()
+    timings["compile"] = t1 - t0
+
+    # Load data
+    data = load_data_frame(cfg)
+    t2 = time.perf_counter()
+    timings["load"] = t2 - t1
+    if data is None or data.empty:
+        raise RunError("No bars to backtest: check the data source and the date range.")
+    if smoke and not vectorized:
+        smoke_test(Strategy, data, cfg)
+    t3 = time.perf_counter()
+    timings["smoke"] = t3 - t2
+    if (progress is not None or cancel is not None) and not vectorized:
+        Strategy = track_progress(Strategy, len(data), progress, cancel)
+    # Backtesting
+    # print(backtesting.test.GOOG)
+    bt = Backtest(
+        data,
+        # backtesting.test.GOOG,
+        Strategy,
+        cash=cfg.cash,
+        commission=cfg.commission,  # e.g., 0.001 means 0.1%
+        exclusive_orders=True,
+        # finalize_trades=True,
+    )
+
+    try:
+        if vectorized:
+            output = run_vectorized(data, Strategy, cash=cfg.cash, commission=cfg.commission)
+        else:
+            output = bt.run()
+    except RunCancelled:
+        raise
+    except Exception as exc:
+        raise RunError(f"Backtest error:\n{traceback.format_exc()}") from exc
+    t4 = time.perf_counter()
+    timings["run"] = t4 - t3
+
+    # Build metrics DataFrame for display
+    metrics_items = []
+    for key in METRIC_KEYS:
+        if key in output:
+            metrics_items.append((key, output[key]))
+    metrics_df = pd.DataFrame(metrics_items, columns=["Metric", "Value"])
+
+    # Trades DataFrame (if present)
+    if hasattr(output, "_trades") and isinstance(output._trades, pd.DataFrame):
+        trades_df = output._trades  # shared with the stats; nothing modifies either
+    else:
+        trades_df = pd.DataFrame(
+            columns=["EntryTime", "ExitTime", "EntryPrice", "ExitPrice", "PnL"]
+        )
+
+    equity = output["_equity_curve"]["Equity"] if "_equity_curve" in output else None
+    timings["metrics"] = time.perf_counter() - t4
+    return RunResult(metrics_df, trades_df, stats=output, bt=bt, equity=equity, timings=timings)
+
+
+def runBackTest(
+    cfg: RunConfig, plot: bool = True, smoke: bool = True
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Run a backtest with Backtesting.py. `plot=True` also opens the chart in a browser.
+    Returns:
+      metrics_df: a 2-col DataFrame [Metric, Value]
+      trades_df:  a DataFrame built from output._trades (if available)
+    """
+    result = run_backtest(cfg, smoke=smoke)
+    if plot:
+        render_plot(result, open_browser=True)
+    return result.metrics_df, result.trades_df
+
+
+# --------------------------- Plotting ------------------------------- #
+def plot_path(prefix: str) -> str:
+    """A fresh HTML file under the temp directory's pastick_plots folder."""
+    out_dir = Path(tempfile.gettempdir()) / "pastick_plots"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fd, filename = tempfile.mkstemp(prefix=prefix, suffix=".html", dir=out_dir)
+    os.close(fd)
+    return filename
+
+
+def render_plot(
+    result: RunResult,
+    resample="Auto",
+    filename: Optional[str] = None,
+    open_browser: bool = False,
+) -> str:
+    """Write the Bokeh chart of a finished run to HTML and return its path (time in `result.timings["plot"]`)."""
+    if result.bt is None or result.stats is None:
+        raise RunError("Nothing to plot: this result carries no backtest.")
+    if filename is None:
+        filename = plot_path("backtest-")
+    t0 = time.perf_counter()
+    result.bt.plot(
+        results=result.stats,
+        filename=filename,
+        resample=PLOT_RESAMPLE.get(resample, resample),
+        open_browser=open_browser,
+    )
+    result.timings["plot"] = time.perf_counter() - t0
+    return filename
+
+
+def equity_chart(
+    equity: pd.Series,
+    filename: Optional[str] = None,
+    folds_df: Optional[pd.DataFrame] = None,
+    title: str = "Equity",
+) -> str:
+    """Bokeh HTML of an equity curve (fold boundaries marked if `folds_df` is given); returns its path."""
+    from bokeh.io import output_file, save
+    from bokeh.models import Span
+    from bokeh.plotting import figure
+
+    if filename is None:
+        filename = plot_path("equity-")
+    fig = figure(
+        title=title,
+        x_axis_type="datetime" if isinstance(equity.index, pd.DatetimeIndex) else "linear",
+        sizing_mode="stretch_both",
+    )
+    fig.line(equity.index, equity.to_numpy(), line_width=1.5)
+    if folds_df is not None:
+        for start in folds_df["Test Start"].iloc[1:]:
+            fig.add_layout(Span(location=start, dimension="height", line_dash="dashed", line_alpha=0.4))
+    output_file(filename, title=title)
+    save(fig)
+    return filename
@@ -0,0 +1,301 @@
+"""
+Cached, pre-normalized OHLCV store for `load_data_frame`.
+
+Each CSV is parsed and normalized once (datetime index, Open/High/Low/Close/Volume
+float columns, sorted by time) and written to a columnar NumPy layout:
+
+    <cache dir>/<csv stem>-<key>/
+        meta.json            source path, mtime, size, tz, row count
+        index.npy            int64 nanoseconds since epoch (UTC if tz-aware)
+        Open.npy ... Volume.npy
+
+The key is derived from the resolved path, mtime and size, so an edited CSV is
+re-normalized automatically. Columns are opened memory-mapped: a start/end range
+is located by binary search on the sorted index and only those bars are read, so
+memory and load time scale with the window, not the whole history. Resampled
+timeframes (5m ... daily) are built once from the base bars and stored next to
+them as `<csv stem>-<key>-<rule>/`. Recently used windows also stay in an
+in-process LRU.
+The cache directory defaults to ~/.pastick/cache (override with PASTICK_CACHE_DIR).
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+RESAMPLE_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+LRU_SIZE = 8
+FORMAT_VERSION = 1
+
+
+class DataStoreError(ValueError):
+    pass
+
+
+def cache_dir() -> Path:
+    return Path(os.environ.get("PASTICK_CACHE_DIR") or Path.home() / ".pastick" / "cache")
+
+
+def source_key(csv_path: str) -> str:
+    """Identity of a CSV on disk: resolved path, mtime and size."""
+    path = Path(csv_path).resolve()
+    st = path.stat()
+    raw = f"{path}|{st.st_mtime_ns}|{st.st_size}|{FORMAT_VERSION}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+# --------------------------- Normalization -------------------------- #
+def normalize_csv(csv_path: str) -> pd.DataFrame:
+    """Read a CSV into a sorted OHLCV frame with a DatetimeIndex."""
+    df = pd.read_csv(csv_path)
+    # Identify datetime column
+    for dt_col in ("Date", "Datetime", "date", "timestamp", "Timestamp"):
+        if dt_col in df.columns:
+            df[dt_col] = pd.to_datetime(df[dt_col])
+            df = df.set_index(dt_col)
+            break
+    if not isinstance(df.index, pd.DatetimeIndex):
+        raise DataStoreError("CSV must include a Date/Datetime column to use as the index.")
+
+    # Normalize columns to expected names
+    colmap_lower = {c.lower(): c for c in df.columns}
+
+    def pick(*names):
+        for n in names:
+            if n in df.columns:
+                return n
+            if n.lower() in colmap_lower:
+                return colmap_lower[n.lower()]
+        return None
+
+    req = {
+        "Open": pick("Open"),
+        "High": pick("High"),
+        "Low": pick("Low"),
+        "Close": pick("Close", "Adj Close", "AdjClose"),
+        "Volume": pick("Volume", "Vol"),
+    }
+    missing = [k for k, v in req.items() if v is None]
+    if missing:
+        raise DataStoreError(f"CSV missing required columns: {', '.join(missing)}")
+
+    df = df[[req[c] for c in OHLCV]].copy()
+    df.columns = OHLCV
+    try:
+        df = df.astype("float64")
+    except (TypeError, ValueError) as exc:
+        raise DataStoreError(f"CSV has non-numeric OHLCV values: {exc}") from exc
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind="stable")
+    return df
+
+
+# --------------------------- On-disk store -------------------------- #
+def _entry_dir(csv_path: str, key: str, rule: Optional[str] = None) -> Path:
+    suffix = f"-{rule}" if rule else ""
+    return cache_dir() / f"{Path(csv_path).stem}-{key}{suffix}"
+
+
+def write_entry(df: pd.DataFrame, csv_path: str, key: str, rule: Optional[str] = None) -> Path:
+    """Write a normalized frame; the directory appears atomically when complete."""
+    target = _entry_dir(csv_path, key, rule)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=target.parent))
+    try:
+        index = df.index
+        tz = str(index.tz) if index.tz is not None else None
+        if tz is not None:
+            index = index.tz_convert("UTC").tz_localize(None)
+        np.save(tmp / "index.npy", index.as_unit("ns").asi8)
+        for col in OHLCV:
+            np.save(tmp / f"{col}.npy", df[col].to_numpy(dtype="float64"))
+        st = Path(csv_path).stat()
+        meta = {
+            "version": FORMAT_VERSION,
+            "source": str(Path(csv_path).resolve()),
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "tz": tz,
+            "rule": rule,
+            "rows": len(df),
+            "index_name": df.index.name,
+        }
+        (tmp / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        try:
+            tmp.rename(target)
+        except OSError:
+            # another process wrote the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    _prune_stale(csv_path, key)
+    return target
+
+
+def _bound_ns(value, tz: Optional[str], is_end: bool) -> Optional[int]:
+    """
+    Bound as int64 ns on the stored (UTC if tz-aware) axis, or None for open-ended.
+    A date-only end ("2024-03-31") covers that whole day, like `df.loc[start:end]`.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        ts = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        return None
+    if is_end and isinstance(value, str) and len(value.strip()) <= 10:
+        ts = ts + pd.Timedelta(days=1)
+    if tz is not None:
+        ts = ts.tz_localize(tz) if ts.tzinfo is None else ts
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    elif ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts.as_unit("ns").value
+
+
+def read_entry(entry: Path, start=None, end=None) -> pd.DataFrame:
+    """Materialize only the bars in [start, end] from the memory-mapped columns."""
+    meta = json.loads((entry / "meta.json").read_text(encoding="utf-8"))
+    tz = meta.get("tz")
+    stamps = np.load(entry / "index.npy", mmap_mode="r")
+
+    lo, hi = 0, len(stamps)
+    start_ns = _bound_ns(start, tz, is_end=False)
+    end_ns = _bound_ns(end, tz, is_end=True)
+    if start_ns is not None:
+        lo = int(np.searchsorted(stamps, start_ns, side="left"))
+    if end_ns is not None:
+        date_only = isinstance(end, str) and len(end.strip()) <= 10
+        hi = int(np.searchsorted(stamps, end_ns, side="left" if date_only else "right"))
+    hi = max(lo, hi)
+
+    # copy the window out so no file handle outlives this call
+    index = pd.DatetimeIndex(np.array(stamps[lo:hi]).view("datetime64[ns]"))
+    if tz:
+        index = index.tz_localize("UTC").tz_convert(tz)
+    index.name = meta.get("index_name")
+    columns = {col: np.array(np.load(entry / f"{col}.npy", mmap_mode="r")[lo:hi]) for col in OHLCV}
+    del stamps
+    return pd.DataFrame(columns, index=index)
+
+
+def _prune_stale(csv_path: str, key: str) -> None:
+    """Drop entries (base and resampled) of older versions of the same CSV."""
+    source = str(Path(csv_path).resolve())
+    for entry in cache_dir().glob(f"{Path(csv_path).stem}-*"):
+        if key in entry.name:
+            continue
+        try:
+            meta = json.loads((entry / "meta.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if meta.get("source") == source:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def clear_cache() -> None:
+    _lru.clear()
+    shutil.rmtree(cache_dir(), ignore_errors=True)
+
+
+# --------------------------- In-process LRU ------------------------- #
+class _LRU:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            df = self._items.get(key)
+            if df is not None:
+                self._items.move_to_end(key)
+            return df
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        with self._lock:
+            self._items[key] = df
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_lru = _LRU(LRU_SIZE)
+
+
+# --------------------------- Resampling ----------------------------- #
+def resample_ohlcv(df: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """Aggregate bars to `rule` (pandas offset alias); empty buckets are dropped."""
+    out = df.resample(rule, label="left", closed="left").agg(RESAMPLE_AGG)
+    return out.dropna(subset=["Open"])[OHLCV]
+
+
+def resample_frame(name: str, df: pd.DataFrame, rule: Optional[str]) -> pd.DataFrame:
+    """In-memory resample cache for frames without a CSV (backtesting.test datasets)."""
+    if not rule:
+        return df
+    lru_key = f"{name}|{rule}"
+    out = _lru.get(lru_key)
+    if out is None:
+        out = resample_ohlcv(df, rule)
+        _lru.put(lru_key, out)
+    return out
+
+
+def _ensure_entry(csv_path: str, key: str, rule: Optional[str]) -> Path:
+    """Store entry for the base bars, or for `rule` bars built once from the base entry."""
+    entry = _entry_dir(csv_path, key, rule)
+    if (entry / "meta.json").exists():
+        return entry
+    if rule is None:
+        df = normalize_csv(csv_path)
+    else:
+        df = resample_ohlcv(read_entry(_ensure_entry(csv_path, key, None)), rule)
+    write_entry(df, csv_path, key, rule)
+    return entry
+
+
+def load_ohlcv(csv_path: str, start=None, end=None, rule: Optional[str] = None) -> pd.DataFrame:
+    """
+    Normalized OHLCV bars of `csv_path` between `start` and `end` (inclusive,
+    either may be None), resampled to `rule` if given: in-process LRU, then the
+    memory-mapped store, then parse (and resample) once and store the result.
+    Treat the returned frame as read-only.
+    """
+    if not Path(csv_path).is_file():
+        raise DataStoreError(f"CSV not found: {csv_path}")
+    key = source_key(csv_path)
+    lru_key = f"{key}|{rule}|{start}|{end}"
+    df = _lru.get(lru_key)
+    if df is not None:
+        return df
+
+    try:
+        df = read_entry(_ensure_entry(csv_path, key, rule), start, end)
+    except OSError as exc:
+        # unwritable cache dir or damaged entry: work from the CSV directly
+        print(f"OHLCV cache unavailable: {exc}")
+        shutil.rmtree(_entry_dir(csv_path, key, rule), ignore_errors=True)
+        df = normalize_csv(csv_path)
+        if rule:
+            df = resample_ohlcv(df, rule)
+        df = df.loc[start:end] if (start or end) else df
+    _lru.put(lru_key, df)
+    return df
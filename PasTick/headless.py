@@ -0,0 +1,189 @@
+"""
+Headless runner for the PasTick workbench.
+
+Runs a backtest from a `RunConfig` or a config file and writes the results to
+disk, without importing PyQt6 or opening a browser, so batch jobs, CI smoke
+tests and servers without a display can use it.
+
+    python headless.py run.json -o results/ --plot
+
+    from headless import load_config, run_headless
+    paths = run_headless(load_config("run.json"), "results/")
+
+Config files are JSON or TOML with RunConfig's fields. The strategy is given
+inline (`strategy_code`) or as a file (`strategy`, relative to the config file):
+
+    {
+      "symbol": "GOOG",
+      "timeframe": "Daily",
+      "csv_path": null,
+      "start_date_iso": "2010-01-01",
+      "end_date_iso": "2013-12-31",
+      "cash": 100000,
+      "commission": 0.0005,
+      "engine": "event",
+      "strategy": "sma_cross.py"
+    }
+
+Outputs in the output directory: metrics.csv, trades.csv and, with `plot`,
+chart.html. Command-line options override the config file.
+"""
+
+from __future__ import annotations
+
+import sys
+import json
+import argparse
+import dataclasses
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from choices import ENGINES, TIMEFRAMES
+from core import RunConfig, RunError, render_plot, run_backtest
+
+CONFIG_DEFAULTS = {
+    "symbol": "GOOG",
+    "timeframe": "Daily",
+    "csv_path": None,
+    "start_date_iso": None,
+    "end_date_iso": None,
+    "cash": 100_000.0,
+    "commission": 0.0,
+}
+
+
+# --------------------------- Config files --------------------------- #
+def _read_config_file(path: Path) -> dict:
+    try:
+        if path.suffix.lower() == ".toml":
+            import tomllib
+
+            with open(path, "rb") as fh:
+                return tomllib.load(fh)
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError as exc:
+        raise RunError(f"Config file not found: {path}") from exc
+    except (ValueError, OSError) as exc:
+        raise RunError(f"Cannot read config file {path}: {exc}") from exc
+
+
+def make_config(values: dict, base_dir: Optional[Path] = None) -> RunConfig:
+    """RunConfig from a dict of its fields; `strategy` names a strategy file instead of `strategy_code`."""
+    values = dict(values)
+    strategy_file = values.pop("strategy", None)
+    if strategy_file and not values.get("strategy_code"):
+        path = Path(strategy_file)
+        if base_dir is not None and not path.is_absolute():
+            path = base_dir / path
+        try:
+            values["strategy_code"] = path.read_text(encoding="utf-8")
+        except OSError as exc:
+            raise RunError(f"Cannot read strategy file {path}: {exc}") from exc
+    if not values.get("strategy_code"):
+        raise RunError("No strategy: set `strategy` (a .py file) or `strategy_code`.")
+
+    fields = {f.name for f in dataclasses.fields(RunConfig)}
+    unknown = sorted(set(values) - fields)
+    if unknown:
+        raise RunError(f"Unknown config keys: {', '.join(unknown)}")
+    cfg = RunConfig(**{**CONFIG_DEFAULTS, **values})
+    if cfg.timeframe not in TIMEFRAMES:
+        raise RunError(f"Unknown timeframe {cfg.timeframe!r}; choose from {', '.join(TIMEFRAMES)}")
+    if cfg.engine not in ENGINES:
+        raise RunError(f"Unknown engine {cfg.engine!r}; choose from {', '.join(ENGINES)}")
+    cfg.cash = float(cfg.cash)
+    cfg.commission = float(cfg.commission)
+    return cfg
+
+
+def load_config(path: str, **overrides) -> RunConfig:
+    """RunConfig from a JSON/TOML file; `overrides` (None values ignored) replace its keys."""
+    path = Path(path)
+    values = _read_config_file(path)
+    if not isinstance(values, dict):
+        raise RunError(f"Config file {path} must hold an object/table of RunConfig fields.")
+    overrides = {k: v for k, v in overrides.items() if v is not None}
+    if "strategy" in overrides:
+        values.pop("strategy_code", None)
+    values.update(overrides)
+    return make_config(values, base_dir=path.parent)
+
+
+# --------------------------- Runner --------------------------------- #
+def run_headless(
+    cfg: RunConfig,
+    out_dir: str,
+    plot: bool = False,
+    resample="Auto",
+    smoke: bool = True,
+) -> Dict[str, str]:
+    """Run `cfg` and write metrics.csv, trades.csv (and chart.html); returns {name: path}."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    result = run_backtest(cfg, smoke=smoke)
+
+    paths = {"metrics": str(out / "metrics.csv"), "trades": str(out / "trades.csv")}
+    result.metrics_df.to_csv(paths["metrics"], index=False)
+    result.trades_df.to_csv(paths["trades"], index=False)
+    if plot:
+        paths["chart"] = render_plot(result, resample=resample, filename=str(out / "chart.html"))
+    return paths
+
+
+# --------------------------- CLI ------------------------------------ #
+def _parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="headless.py", description="Run a PasTick backtest without the GUI and write the results to disk."
+    )
+    p.add_argument("config", nargs="?", help="JSON or TOML file with RunConfig fields")
+    p.add_argument("-o", "--out", default="results", help="output directory (default: %(default)s)")
+    p.add_argument("-s", "--strategy", help="strategy .py file (defines class Strategy)")
+    p.add_argument("--symbol", help="backtesting.test dataset when no CSV is given")
+    p.add_argument("--csv", dest="csv_path", help="OHLCV CSV file")
+    p.add_argument("--timeframe", choices=list(TIMEFRAMES))
+    p.add_argument("--start", dest="start_date_iso", help="first date (YYYY-MM-DD)")
+    p.add_argument("--end", dest="end_date_iso", help="last date (YYYY-MM-DD)")
+    p.add_argument("--cash", type=float)
+    p.add_argument("--commission", type=float, help="fraction per trade side, e.g. 0.001")
+    p.add_argument("--engine", choices=ENGINES)
+    p.add_argument("--plot", action="store_true", help="also write chart.html")
+    p.add_argument("--resample", default="Auto", help="chart downsampling: Auto, Off or a period (default: Auto)")
+    p.add_argument("--no-smoke", action="store_true", help="skip the short pre-run smoke test")
+    return p
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parser().parse_args(argv)
+    overrides = {
+        k: getattr(args, k)
+        for k in (
+            "strategy",
+            "symbol",
+            "csv_path",
+            "timeframe",
+            "start_date_iso",
+            "end_date_iso",
+            "cash",
+            "commission",
+            "engine",
+        )
+    }
+    if args.strategy:
+        overrides["strategy"] = str(Path(args.strategy).resolve())  # relative to the shell, not the config
+    try:
+        if args.config:
+            cfg = load_config(args.config, **overrides)
+        else:
+            cfg = make_config({k: v for k, v in overrides.items() if v is not None})
+        paths = run_headless(cfg, args.out, plot=args.plot, resample=args.resample, smoke=not args.no_smoke)
+    except RunError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    for name, path in paths.items():
+        print(f"{name}: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
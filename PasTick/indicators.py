@@ -0,0 +1,260 @@
+"""
+Indicator cache for the PasTick workbench.
+
+`self.I(SMA, self.data.Close, n)` results are cached per process, keyed by
+(data fingerprint, function identity, arguments), so re-running a strategy
+(other cash or commission, the same window again, a warm worker's next run) or
+revisiting a parameter value during a sweep reuses the computed array instead of
+redoing the rolling-window work. Entries are evicted least-recently-used once the
+cache exceeds its memory budget (PASTICK_INDICATOR_CACHE_MB, default 256; 0
+disables it).
+
+Strategies loaded by core.py get the cache transparently (`with_indicator_cache`
+overrides `Strategy.I`); elsewhere wrap the function: `self.I(cached(SMA), ...)`.
+A function's identity covers its code, closure, defaults and the module globals
+it reads, so editing `N = 10` in a strategy is a new key. Calls with arguments
+(or such globals) that cannot be fingerprinted (arbitrary objects) are simply
+computed as usual.
+"""
+
+from __future__ import annotations
+
+import os
+import types
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+MAX_BYTES = int(float(os.environ.get("PASTICK_INDICATOR_CACHE_MB", 256)) * 1e6)
+_FINGERPRINT_MEMO_SIZE = 16  # each entry pins its source buffer
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+# --------------------------- Keys ----------------------------------- #
+_memo: "OrderedDict[tuple, tuple]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _root(arr: np.ndarray) -> np.ndarray:
+    while isinstance(arr.base, np.ndarray):
+        arr = arr.base
+    return arr
+
+
+def fingerprint(arr: np.ndarray) -> str:
+    """
+    Content hash of an array. Runs view the same memory-mapped/LRU frame over
+    and over, so hashes are memoized by buffer address; the memo keeps the
+    owning buffer alive, so an address cannot be reused by other data meanwhile.
+    """
+    arr = np.asarray(arr)
+    ptr = (arr.__array_interface__["data"][0], arr.shape, arr.strides, arr.dtype.str)
+    with _memo_lock:
+        hit = _memo.get(ptr)
+        if hit is not None:
+            _memo.move_to_end(ptr)
+            return hit[1]
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((arr.shape, arr.dtype.str)).encode())
+    h.update(np.ascontiguousarray(arr).data)
+    digest = h.hexdigest()
+    with _memo_lock:
+        _memo[ptr] = (_root(arr), digest)
+        while len(_memo) > _FINGERPRINT_MEMO_SIZE:
+            _memo.popitem(last=False)
+    return digest
+
+
+def _code_digest(code) -> str:
+    """Bytecode and constants, nested code objects (lambdas, comprehensions) included."""
+    h = hashlib.blake2b(code.co_code, digest_size=16)
+    for const in code.co_consts:
+        h.update(_code_digest(const).encode() if hasattr(const, "co_code") else repr(const).encode())
+    h.update(repr(code.co_names).encode())
+    return h.hexdigest()
+
+
+def _code_names(code) -> set:
+    """Names a code object (and the code nested in it) may look up in globals."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            names |= _code_names(const)
+    return names
+
+
+def _globals_key(func, code, seen: frozenset) -> tuple:
+    """The values `func` reads from its module globals (`N = 10` in `SMA(x, N)`)."""
+    namespace = getattr(func, "__globals__", {})
+    key = []
+    for name in sorted(_code_names(code)):
+        if name not in namespace:  # builtins and attribute names
+            continue
+        value = namespace[name]
+        if isinstance(value, types.ModuleType):
+            key.append((name, "module", value.__name__))
+        elif isinstance(value, type):
+            key.append((name, "type", f"{value.__module__}.{value.__qualname__}"))
+        else:
+            key.append((name, _value_key(value, seen)))
+    return tuple(key)
+
+
+def _func_key(func, seen: frozenset = frozenset()) -> tuple:
+    """Identity of a function that survives re-exec'ing the same strategy source."""
+    if isinstance(func, functools.partial):
+        return ("partial", _func_key(func.func, seen), _args_key(func.args, func.keywords or {}))
+    name = f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+    code = getattr(func, "__code__", None)
+    if code is None:  # builtins, ufuncs, C extensions
+        return (name,)
+    if id(func) in seen:  # recursion: the outer key already covers this function
+        return ("recursive", name)
+    seen = seen | {id(func)}
+    body = _code_digest(code)
+    closure = tuple(_value_key(c.cell_contents, seen) for c in func.__closure__ or ())
+    defaults = _value_key(func.__defaults__ or (), seen)
+    return (name, body, closure, defaults, _globals_key(func, code, seen))
+
+
+def _value_key(value, seen: frozenset = frozenset()):
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes, np.generic)):
+        return (type(value).__name__, value)
+    if isinstance(value, pd.Series):
+        value = value.to_numpy()
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise _Uncacheable
+        return ("array", fingerprint(value))
+    if isinstance(value, (tuple, list)):
+        return (type(value).__name__, tuple(_value_key(v, seen) for v in value))
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((k, _value_key(v, seen)) for k, v in value.items())))
+    if callable(value):
+        return ("func", _func_key(value, seen))
+    raise _Uncacheable
+
+
+def _args_key(args, kwargs) -> tuple:
+    return (_value_key(tuple(args)), _value_key(dict(kwargs)))
+
+
+# --------------------------- LRU ------------------------------------ #
+def _nbytes(value) -> int:
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return int(value.memory_usage(deep=False).sum()) if isinstance(value, pd.DataFrame) else value.nbytes
+    return getattr(value, "nbytes", 64)
+
+
+def _copy(value):
+    """Callers get their own copy so in-place edits cannot poison the cache."""
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value.copy() if hasattr(value, "copy") else value
+
+
+class IndicatorCache:
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._items: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (value, nbytes)
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: tuple, value) -> None:
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._items[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, freed) = self._items.popitem(last=False)
+                self._bytes -= freed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def call(self, func, *args, **kwargs):
+        """`func(*args, **kwargs)`, served from the cache when possible."""
+        if self.max_bytes <= 0:
+            return func(*args, **kwargs)
+        try:
+            key = (_func_key(func), _args_key(args, kwargs))
+        except _Uncacheable:
+            return func(*args, **kwargs)
+        value = self.get(key)
+        if value is None:
+            value = func(*args, **kwargs)
+            self.put(key, _copy(value))
+            return value
+        return _copy(value)
+
+
+indicator_cache = IndicatorCache()
+
+
+# --------------------------- Strategy hooks ------------------------- #
+def cached(func, cache: Optional[IndicatorCache] = None):
+    """Cached version of an indicator function, for `self.I(cached(SMA), ...)`."""
+    cache = cache or indicator_cache
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return cache.call(func, *args, **kwargs)
+
+    wrapper.__wrapped_indicator__ = func
+    return wrapper
+
+
+def with_indicator_cache(Strategy):
+    """Subclass of `Strategy` whose `self.I(...)` goes through the indicator cache."""
+
+    class CachedStrategy(Strategy):
+        def I(self, func, *args, **kwargs):  # noqa: E743 (backtesting.py's name)
+            if not getattr(func, "__wrapped_indicator__", None):
+                func = cached(func)
+            return super().I(func, *args, **kwargs)
+
+    CachedStrategy.__name__ = CachedStrategy.__qualname__ = Strategy.__name__
+    CachedStrategy.__module__ = Strategy.__module__
+    return CachedStrategy
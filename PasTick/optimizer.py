@@ -0,0 +1,327 @@
+"""
+Parameter sweeps for the PasTick workbench.
+
+Grid and random searches evaluate each parameter combination with `Backtest.run`
+(or `run_vectorized` when the vectorized engine is selected) on a process pool; every worker compiles the strategy and loads the data once
+(pool initializer) and results stream back as they finish. SAMBO delegates to
+`Backtest.optimize(method="sambo")` inside a worker process, so it supports the
+event engine only.
+
+User strategies come from `exec`, so their classes cannot be pickled into child
+processes; workers receive the `RunConfig` (source code included) instead.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import signal
+import threading
+import multiprocessing
+import concurrent.futures
+from itertools import product
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from backtesting import Backtest
+
+from choices import METHODS
+from core import (
+    METRIC_KEYS,
+    RunCancelled,
+    RunConfig,
+    RunError,
+    load_data_frame,
+    load_strategy_from_source,
+)
+from vectorized import run_vectorized, supports_vectorized
+
+
+# --------------------------- Config model --------------------------- #
+@dataclass
+class OptimizeConfig:
+    param_ranges: Dict[str, list]
+    maximize: str = "Sharpe Ratio"
+    method: str = "grid"  # grid | random | sambo
+    max_tries: Optional[int] = None  # budget for random/sambo; caps grid if set
+    constraint: Optional[str] = None  # e.g. "n_fast < n_slow"
+    workers: int = max(1, (os.cpu_count() or 2) - 1)
+    random_state: Optional[int] = None
+
+
+def parse_param_ranges(text: str) -> Dict[str, list]:
+    """
+    Parse one `name = values` per line, e.g.
+
+        n_fast = range(5, 30, 5)
+        n_slow = 20, 40, 60
+        stop = linspace(0.01, 0.05, 5)
+
+    `range`, `arange` and `linspace` are available; blank lines and # comments are ignored.
+    """
+    namespace = {"range": range, "arange": np.arange, "linspace": np.linspace}
+    ranges = {}
+    for lineno, line in enumerate(text.splitlines(), 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        name, sep, expr = line.partition("=")
+        name = name.strip()
+        if not sep or not name.isidentifier():
+            raise RunError(f"Parameter line {lineno}: expected `name = values`")
+        try:
+            values = eval(expr, {"__builtins__": {}}, namespace)  # noqa: S307 (local input)
+        except Exception as exc:
+            raise RunError(f"Parameter line {lineno}: {exc}") from exc
+        values = list(values) if isinstance(values, range) else np.atleast_1d(values).tolist()
+        if not values:
+            raise RunError(f"Parameter `{name}` has no values")
+        ranges[name] = values
+    if not ranges:
+        raise RunError("Declare at least one parameter range to optimise.")
+    return ranges
+
+
+def compile_constraint(expr: Optional[str]) -> Optional[Callable[[dict], bool]]:
+    if not expr or not expr.strip():
+        return None
+    code = compile(expr.strip(), "<constraint>", "eval")
+
+    def constraint(params) -> bool:
+        return bool(eval(code, {"__builtins__": {}}, dict(params)))  # noqa: S307
+
+    return constraint
+
+
+def check_params(Strategy, param_ranges: Dict[str, list]) -> None:
+    """backtesting.py only accepts parameters declared as Strategy class attributes."""
+    missing = [name for name in param_ranges if not hasattr(Strategy, name)]
+    if missing:
+        raise RunError(
+            f"Strategy has no class attribute(s): {', '.join(missing)}.\n"
+            "Declare tunable parameters on the class, e.g. `n_fast = 10`."
+        )
+
+
+def candidate_params(opt: OptimizeConfig) -> List[dict]:
+    """All grid combinations, or a random sample of `max_tries` of them."""
+    names = list(opt.param_ranges)
+    values = [opt.param_ranges[n] for n in names]
+    constraint = compile_constraint(opt.constraint)
+    size = int(np.prod([len(v) for v in values]))
+
+    budget = min(opt.max_tries or size, size)
+    sample = opt.method == "random" or budget < size
+    rng = random.Random(opt.random_state)
+
+    if size <= 100_000:
+        combos = [dict(zip(names, combo)) for combo in product(*values)]
+        if constraint is not None:
+            combos = [c for c in combos if constraint(c)]
+        if sample and budget < len(combos):
+            combos = rng.sample(combos, budget)
+    else:
+        # decode sampled flat indices as mixed-radix digits; avoids materialising the grid
+        combos = []
+        for flat in rng.sample(range(size), budget):
+            combo = {}
+            for name, vals in zip(reversed(names), reversed(values)):
+                flat, digit = divmod(flat, len(vals))
+                combo[name] = vals[digit]
+            combos.append({n: combo[n] for n in names})
+        if constraint is not None:
+            combos = [c for c in combos if constraint(c)]
+
+    if not combos:
+        raise RunError("No admissible parameter combinations to test.")
+    return combos
+
+
+# --------------------------- Worker processes ----------------------- #
+_worker_bt: Optional[Backtest] = None
+_worker_cfg: Optional[RunConfig] = None
+
+
+def _init_worker(cfg: RunConfig) -> None:
+    """Compile the strategy and load data once per worker process."""
+    global _worker_bt, _worker_cfg
+    Strategy = load_strategy_from_source(cfg.strategy_code)
+    data = load_data_frame(cfg)
+    _worker_cfg = cfg
+    _worker_bt = Backtest(
+        data, Strategy, cash=cfg.cash, commission=cfg.commission, exclusive_orders=True
+    )
+
+
+def _stats_row(params: dict, stats: pd.Series, maximize: str) -> dict:
+    row = dict(params)
+    for key in [maximize] + [k for k in METRIC_KEYS if k != maximize]:
+        if key in stats:
+            val = stats[key]
+            row[key] = float(val) if isinstance(val, (int, float, np.number)) else val
+    return row
+
+
+def _evaluate(params: dict, maximize: str) -> dict:
+    if _worker_cfg.engine == "vectorized":
+        stats = run_vectorized(
+            _worker_bt._data,
+            _worker_bt._strategy,
+            cash=_worker_cfg.cash,
+            commission=_worker_cfg.commission,
+            **params,
+        )
+    else:
+        stats = _worker_bt.run(**params)
+    return _stats_row(params, stats, maximize)
+
+
+def _sambo_search(
+    param_ranges: Dict[str, list],
+    maximize: str,
+    max_tries: Optional[int],
+    constraint: Optional[str],
+    random_state: Optional[int],
+) -> List[dict]:
+    _, heatmap = _worker_bt.optimize(
+        maximize=maximize,
+        method="sambo",
+        max_tries=max_tries,
+        constraint=compile_constraint(constraint),
+        return_heatmap=True,
+        random_state=random_state,
+        **param_ranges,
+    )
+    names = list(heatmap.index.names)
+    return [
+        {**dict(zip(names, np.atleast_1d(key).tolist())), maximize: float(val)}
+        for key, val in heatmap.items()
+    ]
+
+
+# --------------------------- Sweep runner --------------------------- #
+def _start_worker(pids, initializer: Callable[[RunConfig], None], cfg: RunConfig) -> None:
+    pids.put(os.getpid())  # lets SweepPool.terminate stop this worker mid-task
+    initializer(cfg)
+
+
+class SweepPool:
+    """
+    Process pool for sweeps, a context manager around ProcessPoolExecutor.
+    Leaving it with an error drops the queued tasks instead of running them
+    first; `terminate()` also stops the tasks in progress.
+    """
+
+    def __init__(self, workers: int, cfg: RunConfig, initializer: Optional[Callable[[RunConfig], None]] = None):
+        # spawn keeps the workers clean of the Qt event loop and matches Windows
+        ctx = multiprocessing.get_context("spawn")
+        self._pids = ctx.SimpleQueue()  # pid of each started worker
+        self._terminated = False
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_start_worker,
+            initargs=(self._pids, initializer or _init_worker, cfg),
+        )
+
+    def submit(self, fn, *args, **kwargs) -> concurrent.futures.Future:
+        return self.pool.submit(fn, *args, **kwargs)
+
+    def terminate(self) -> None:
+        self._terminated = True
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        while not self._pids.empty():
+            try:
+                os.kill(self._pids.get(), signal.SIGTERM)
+            except OSError:  # already gone
+                pass
+
+    def __enter__(self) -> "SweepPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if not self._terminated:
+            self.pool.shutdown(wait=True, cancel_futures=exc_type is not None)
+
+
+def as_finished(pool: SweepPool, futures, cancel: Optional[threading.Event]):
+    """Yield futures as they finish; on `cancel`, stop the workers and raise RunCancelled."""
+    pending = set(futures)
+    while pending:
+        finished, pending = concurrent.futures.wait(
+            pending, timeout=0.2, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        yield from finished
+        if cancel is not None and cancel.is_set():
+            # a SAMBO search is one long task; stop the workers instead of waiting for them
+            pool.terminate()
+            raise RunCancelled("Run cancelled.")
+
+
+def run_sweep(
+    cfg: RunConfig,
+    opt: OptimizeConfig,
+    on_result: Optional[Callable[[dict], None]] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> pd.DataFrame:
+    """
+    Run the sweep and return one row per evaluated combination, best first.
+    `on_result` is called with each row as soon as it is available and
+    `progress(evaluated, total)` after each one (total is 0 for SAMBO, whose
+    results arrive together). Setting `cancel` stops the sweep with RunCancelled.
+    """
+    if opt.method not in METHODS:
+        raise RunError(f"Unknown optimisation method: {opt.method}")
+    if opt.method == "sambo" and cfg.engine == "vectorized":
+        # Backtest.optimize always runs the event-driven engine
+        raise RunError("SAMBO runs the event engine only; choose grid or random for the vectorized engine.")
+    Strategy = load_strategy_from_source(cfg.strategy_code)
+    check_params(Strategy, opt.param_ranges)
+    if cfg.engine == "vectorized" and not supports_vectorized(Strategy):
+        raise RunError("The vectorized engine needs a `signals(self)` method on Strategy.")
+
+    rows = []
+    if opt.method == "sambo":
+        if progress is not None:
+            progress(0, 0)
+        with SweepPool(1, cfg) as pool:
+            future = pool.submit(
+                _sambo_search,
+                opt.param_ranges,
+                opt.maximize,
+                opt.max_tries,
+                opt.constraint,
+                opt.random_state,
+            )
+            for fut in as_finished(pool, [future], cancel):
+                rows = fut.result()
+        if on_result is not None:
+            for row in rows:
+                on_result(row)
+    else:
+        combos = candidate_params(opt)
+        workers = max(1, min(opt.workers, len(combos)))
+        if progress is not None:
+            progress(0, len(combos))
+        with SweepPool(workers, cfg) as pool:
+            futures = [pool.submit(_evaluate, params, opt.maximize) for params in combos]
+            for fut in as_finished(pool, futures, cancel):
+                row = fut.result()
+                rows.append(row)
+                if on_result is not None:
+                    on_result(row)
+                if progress is not None:
+                    progress(len(rows), len(combos))
+
+    df = pd.DataFrame(rows)
+    if opt.maximize in df.columns:
+        df = df.sort_values(opt.maximize, ascending=False, na_position="last")
+    return df.reset_index(drop=True)
+
+
+def heatmap_series(results: pd.DataFrame, param_names: List[str], maximize: str) -> pd.Series:
+    """Shape sweep results like `Backtest.optimize(return_heatmap=True)` for plot_heatmaps."""
+    return results.set_index(param_names)[maximize].astype(float)
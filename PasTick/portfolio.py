@@ -0,0 +1,352 @@
+"""
+Portfolio backtests for the PasTick workbench.
+
+One strategy trades several instruments from a shared cash balance. Each asset
+is loaded like a single run (backtesting.test datasets, CSVs through the
+datastore cache; see batch.batch_sources for the symbols / folder rules) and
+the strategy's `signals()` (vectorized.py) gives its target direction per bar.
+
+The frames are aligned on the union of their bar times into (bars x assets)
+NumPy arrays; an asset is tradable only on bars it has, and its close is carried
+forward over gaps for valuation. Target weights are the signal direction
+times an equal share of equity, capped per asset:
+
+    weight = signal * min(max_weight, 1 / number of assets with a signal)
+
+so gross exposure never exceeds the equity. A weight decided at a bar's close
+is filled at the next open in whole units; the portfolio trades when a signal
+changes and, with `rebalance` set to a period ("D", "W", "M"), also resets all
+positions to their target weights at the first bar of every period.
+
+A trade is one holding of one asset in one direction; rebalancing resizes it
+(average entry price, realized PnL of reductions kept) until it is closed or
+reversed. Portfolio metrics come from backtesting.py's `compute_stats`; the
+"Buy & Hold" figure is an equal-weight basket of the assets listed so far,
+rebalanced every bar.
+"""
+
+from __future__ import annotations
+
+import warnings
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from backtesting import Backtest
+from backtesting._stats import compute_stats
+from backtesting._util import _indicator_warmup_nbars
+
+from batch import batch_sources
+from core import METRIC_KEYS, RunCancelled, RunConfig, RunError, load_data_frame, load_strategy_from_source
+from vectorized import SIZE, _init_strategy, _targets, supports_vectorized
+
+TRADE_COLUMNS = [
+    "Asset",
+    "Size",
+    "EntryBar",
+    "ExitBar",
+    "EntryPrice",
+    "ExitPrice",
+    "PnL",
+    "Commission",
+    "ReturnPct",
+    "EntryTime",
+    "ExitTime",
+    "Duration",
+]
+
+
+# --------------------------- Config model --------------------------- #
+@dataclass
+class PortfolioConfig:
+    max_weight: float = 0.25  # cap per asset, fraction of equity
+    rebalance: Optional[str] = None  # pandas period ("D", "W", "M"); None trades on signal changes only
+    long_only: bool = False  # short signals close the position instead
+
+
+@dataclass
+class Panel:
+    """Assets aligned on one bar index; arrays are (bars, assets)."""
+
+    names: List[str]
+    index: pd.Index
+    open: np.ndarray
+    close: np.ndarray  # carried forward over gaps, NaN before an asset's first bar
+    listed: np.ndarray  # bool: the asset has this bar
+
+
+@dataclass
+class PortfolioResult:
+    metrics_df: pd.DataFrame  # 2-col [Metric, Value] of the portfolio
+    trades_df: pd.DataFrame  # closed trades of all assets (Asset column)
+    equity: pd.Series
+    assets_df: pd.DataFrame  # one row per asset: trades, PnL, contribution, weight
+    stats: Optional[pd.Series] = None
+
+
+def align(frames: Dict[str, pd.DataFrame]) -> Panel:
+    """Stack the Open/Close columns of `frames` on the union of their indexes."""
+    if not frames:
+        raise RunError("A portfolio needs at least one asset.")
+    index = frames[next(iter(frames))].index
+    for df in list(frames.values())[1:]:
+        index = index.union(df.index)
+    n, m = len(index), len(frames)
+    open_ = np.full((n, m), np.nan)
+    close = np.full((n, m), np.nan)
+    listed = np.zeros((n, m), dtype=bool)
+    for k, df in enumerate(frames.values()):
+        rows = index.get_indexer(df.index)
+        open_[rows, k] = df["Open"].to_numpy(float)
+        close[rows, k] = df["Close"].to_numpy(float)
+        listed[rows, k] = True
+    return Panel(list(frames), index, open_, _carry_forward(close, listed), listed)
+
+
+def _carry_forward(values: np.ndarray, listed: np.ndarray) -> np.ndarray:
+    """Each column's last listed value on every bar (rows before the first stay as they are)."""
+    last = np.where(listed, np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(last, axis=0, out=last)
+    return values[last, np.arange(values.shape[1])]
+
+
+# --------------------------- Signals -------------------------------- #
+def asset_targets(data: pd.DataFrame, Strategy, params: Optional[dict] = None) -> np.ndarray:
+    """The strategy's target direction (+1 / -1 / 0) per bar of one asset."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # cash/price warnings do not apply: only init() runs
+        bt = Backtest(data, Strategy, exclusive_orders=True)
+    strategy = _init_strategy(bt, params or {})
+    return _targets(strategy, len(data), 1 + _indicator_warmup_nbars(strategy))
+
+
+def target_weights(targets: np.ndarray, pcfg: PortfolioConfig) -> np.ndarray:
+    """(bars, assets) weights from (bars, assets) target directions."""
+    if pcfg.long_only:
+        targets = np.clip(targets, 0, None)
+    active = np.count_nonzero(targets, axis=1)
+    share = np.minimum(pcfg.max_weight, 1 / np.maximum(active, 1))
+    return targets * share[:, None]
+
+
+def fill_bars(weights: np.ndarray, index: pd.Index, rebalance: Optional[str]) -> np.ndarray:
+    """Bars whose open trades: after a weight change and, with `rebalance`, the first bar of each period."""
+    changed = np.any(weights[1:] != weights[:-1], axis=1)
+    fills = np.flatnonzero(changed[:-1]) + 2  # decided at bar t's close, filled at t + 1
+    if rebalance and isinstance(index, pd.DatetimeIndex) and len(index) > 1:
+        periods = index.to_period(rebalance).asi8
+        fills = np.union1d(fills, np.flatnonzero(periods[1:] != periods[:-1]) + 1)
+    return fills
+
+
+# --------------------------- Simulation ----------------------------- #
+def simulate_portfolio(
+    panel: Panel, weights: np.ndarray, fills: np.ndarray, cash: float, commission: float
+) -> Tuple[np.ndarray, dict, dict]:
+    """
+    Fill `weights[j - 1]` at the open of each bar j in `fills`, in whole units.
+    Returns (equity per bar, closed trades as dict of arrays, per-asset totals).
+    One Python step per fill; the assets are handled as arrays.
+    """
+    n, m = panel.close.shape
+    close = np.nan_to_num(panel.close)
+    equity = np.empty(n)
+    units = np.zeros(m)
+    basis = np.zeros(m)  # average entry price of the open holding
+    realized = np.zeros(m)  # PnL of reductions of the open holding
+    paid = np.zeros(m)  # commissions of the open holding
+    entry_bar = np.zeros(m, dtype=int)
+    exposure = np.zeros(m)  # sum over bars of |position value| / equity
+    closed = []
+    prev = 0
+
+    for j in list(fills) + [n]:
+        # value the holdings bar by bar up to this fill
+        held = close[prev:j] @ units + cash
+        equity[prev:j] = held
+        if np.any(held <= 0):
+            # like the broker: once equity is gone the run stops
+            k = prev + int(np.flatnonzero(held <= 0)[0])
+            equity[k:] = 0
+            break
+        exposure += (np.abs(units) * close[prev:j] / held[:, None]).sum(axis=0)
+        prev = j
+        if j == n:
+            break
+
+        price = np.where(panel.listed[j], panel.open[j], close[j - 1])
+        value = cash + np.nan_to_num(price) @ units
+        with np.errstate(invalid="ignore", divide="ignore"):
+            want = np.trunc(weights[j - 1] * value * SIZE / (price * (1 + commission)))
+        tradable = panel.listed[j] & (price > 0)
+        new = np.where(tradable, np.nan_to_num(want), units)
+        delta = new - units
+        if not delta.any():
+            continue
+
+        old_sign, new_sign = np.sign(units), np.sign(new)
+        closing = (units != 0) & (new_sign != old_sign)
+        resizing = (delta != 0) & (units != 0) & ~closing
+        opening = (new != 0) & (new_sign != old_sign)
+        exit_comm = np.abs(units) * price * commission
+        entry_comm = np.abs(new) * price * commission
+        resize_comm = np.abs(delta) * price * commission
+
+        if closing.any():
+            k = np.flatnonzero(closing)
+            pnl = realized[k] + units[k] * (price[k] - basis[k]) - paid[k] - exit_comm[k]
+            closed.append(
+                (k, units[k], entry_bar[k], np.full(len(k), j), basis[k], price[k], pnl, paid[k] + exit_comm[k])
+            )
+
+        reducing = resizing & (np.abs(new) < np.abs(units))
+        realized[reducing] += (units[reducing] - new[reducing]) * (price[reducing] - basis[reducing])
+        adding = resizing & ~reducing
+        basis[adding] = (units[adding] * basis[adding] + delta[adding] * price[adding]) / new[adding]
+        paid[resizing] += resize_comm[resizing]
+
+        basis[opening] = price[opening]
+        entry_bar[opening] = j
+        realized[opening] = 0
+        paid[opening] = entry_comm[opening]
+
+        cash -= np.nan_to_num(delta * price).sum() + np.nan_to_num(
+            np.where(closing, exit_comm, 0) + np.where(opening, entry_comm, 0) + np.where(resizing, resize_comm, 0)
+        ).sum()
+        units = new
+
+    keys = ("Asset", "Size", "EntryBar", "ExitBar", "EntryPrice", "ExitPrice", "PnL", "Commission")
+    trades = {key: np.concatenate([c[i] for c in closed]) if closed else np.array([]) for i, key in enumerate(keys)}
+    unrealized = realized + units * (close[-1] - basis) - paid
+    totals = {"open_pnl": np.where(units != 0, unrealized, 0), "exposure": exposure / n}
+    return equity, trades, totals
+
+
+# --------------------------- Runner --------------------------------- #
+def load_assets(
+    sources: List[Tuple[str, RunConfig]],
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Dict[str, pd.DataFrame]:
+    frames = {}
+    for i, (name, cfg) in enumerate(sources):
+        if cancel is not None and cancel.is_set():
+            raise RunCancelled("Portfolio run cancelled.")
+        df = load_data_frame(cfg)
+        if df is None or not len(df):
+            raise RunError(f"No data for {name}.")
+        frames[name] = df
+        if progress is not None:
+            progress(i + 1, 2 * len(sources))
+    return frames
+
+
+def run_portfolio(
+    cfg: RunConfig,
+    symbols: List[str],
+    folder: Optional[str] = None,
+    pcfg: Optional[PortfolioConfig] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> PortfolioResult:
+    """
+    Run `cfg.strategy_code` on the assets named by `symbols` / `folder` with
+    shared cash `cfg.cash`. `progress(done, total)` counts assets loaded, then
+    assets signalled.
+    """
+    pcfg = pcfg or PortfolioConfig()
+    if not 0 < pcfg.max_weight <= 1:
+        raise RunError("The maximum weight per asset must be between 0 and 1.")
+    Strategy = load_strategy_from_source(cfg.strategy_code)
+    if not supports_vectorized(Strategy):
+        raise RunError(
+            "Portfolio runs need a `signals(self)` method on Strategy returning the\n"
+            "target position per bar (+1 / -1 / 0), as for the vectorized engine."
+        )
+    sources = batch_sources(cfg, symbols, folder)
+    frames = load_assets(sources, progress, cancel)
+    panel = align(frames)
+
+    targets = np.zeros(panel.close.shape)
+    for k, (name, df) in enumerate(frames.items()):
+        if cancel is not None and cancel.is_set():
+            raise RunCancelled("Portfolio run cancelled.")
+        rows = panel.index.get_indexer(df.index)
+        column = np.full(len(panel.index), np.nan)
+        column[rows] = asset_targets(df, Strategy)
+        column[: rows[0]] = 0
+        targets[:, k] = pd.Series(column).ffill().to_numpy()  # hold the target over gaps
+        if progress is not None:
+            progress(len(frames) + k + 1, 2 * len(frames))
+
+    weights = target_weights(targets, pcfg)
+    fills = fill_bars(weights, panel.index, pcfg.rebalance)
+    equity, t, totals = simulate_portfolio(panel, weights, fills, cfg.cash, cfg.commission)
+
+    trades_df = _trades_frame(t, panel)
+    basket = pd.DataFrame({"Close": _basket(panel)}, index=panel.index)
+    stats = compute_stats(trades_df, equity, basket, None)
+    if len(trades_df):
+        stats.loc["Commissions [$]"] = trades_df["Commission"].sum()
+    metrics_df = pd.DataFrame(
+        [(k, stats[k]) for k in METRIC_KEYS if k in stats], columns=["Metric", "Value"]
+    )
+    assets_df = _asset_rows(panel, trades_df, totals, cfg.cash)
+    return PortfolioResult(metrics_df, trades_df, pd.Series(equity, index=panel.index, name="Equity"), assets_df, stats)
+
+
+def _trades_frame(t: dict, panel: Panel) -> pd.DataFrame:
+    asset = t["Asset"].astype(int)
+    trades = pd.DataFrame(
+        {
+            "Asset": np.asarray(panel.names, dtype=object)[asset],
+            "Size": t["Size"].astype(int),
+            "EntryBar": t["EntryBar"].astype(int),
+            "ExitBar": t["ExitBar"].astype(int),
+            "EntryPrice": t["EntryPrice"].astype(float),
+            "ExitPrice": t["ExitPrice"].astype(float),
+            "PnL": t["PnL"].astype(float),
+            "Commission": t["Commission"].astype(float),
+        }
+    )
+    trades["ReturnPct"] = trades["PnL"] / (trades["Size"].abs() * trades["EntryPrice"])
+    trades["EntryTime"] = panel.index[trades["EntryBar"].to_numpy()]
+    trades["ExitTime"] = panel.index[trades["ExitBar"].to_numpy()]
+    trades["Duration"] = trades["ExitTime"] - trades["EntryTime"]
+    return trades.sort_values(["ExitBar", "Asset"], kind="stable").reset_index(drop=True)[TRADE_COLUMNS]
+
+
+def _basket(panel: Panel) -> np.ndarray:
+    """Equal-weight buy & hold index, rebalanced every bar over the assets listed so far."""
+    close = panel.close
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = close[1:] / close[:-1] - 1
+    returns = np.where(np.isfinite(returns), returns, np.nan)
+    listed = np.isfinite(returns).any(axis=1)
+    step = np.zeros(len(returns))
+    step[listed] = np.nanmean(returns[listed], axis=1)
+    return np.concatenate([[1.0], np.cumprod(1 + step)])
+
+
+def _asset_rows(panel: Panel, trades_df: pd.DataFrame, totals: dict, cash: float) -> pd.DataFrame:
+    by_asset = trades_df.groupby("Asset")["PnL"]
+    count, closed_pnl = by_asset.size(), by_asset.sum()
+    wins = trades_df[trades_df["PnL"] > 0].groupby("Asset").size()
+    rows = []
+    for k, name in enumerate(panel.names):
+        trades = int(count.get(name, 0))
+        pnl = float(closed_pnl.get(name, 0.0)) + float(totals["open_pnl"][k])
+        rows.append(
+            {
+                "Asset": name,
+                "Bars": int(panel.listed[:, k].sum()),
+                "# Trades": trades,
+                "Win Rate [%]": 100 * wins.get(name, 0) / trades if trades else np.nan,
+                "PnL [$]": pnl,
+                "Contribution [%]": 100 * pnl / cash,
+                "Avg. Weight [%]": 100 * float(totals["exposure"][k]),
+            }
+        )
+    return pd.DataFrame(rows)
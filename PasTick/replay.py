@@ -0,0 +1,542 @@
+"""
+Live replay (paper trading) for the PasTick workbench.
+
+Bars are fed one at a time into the user's `Strategy`, which sees them exactly
+as in a backtest: `init()` runs once on the bars available at the start (the
+history), then every new bar runs the broker (fills at the open, like
+`Backtest.run`) and `next()`. Nothing is recomputed over the full history, so
+the time per bar stays constant however long the session runs:
+
+- OHLCV and indicator values live in preallocated arrays that double in size
+  when full, and `self.data` / the indicator attributes are views of them.
+- Indicators from `self.I(...)` are updated per bar. Known functions
+  (backtesting.test's SMA; see `register_incremental`) keep a running state;
+  any other function is recomputed over the last `window` bars only, which is
+  exact for indicators that look back less than `window` bars.
+
+Feeds (`source`):
+- "frame": the configured data (symbol or CSV); the first `history_bars` bars
+  are the history and the rest are fed at `speed` bars per second (0: at once),
+  a stand-in for a live feed
+- "csv": a CSV that another process appends rows to; the rows present at the
+  start are the history, each appended row is a new bar
+- "socket": `host:port` of a local TCP feed sending CSV lines (a header line
+  first); the configured data is the history
+
+Bars must be newer than the last one seen; older ones are skipped. Times are
+tz-naive (tz-aware data is converted to UTC). Trading starts with the first fed
+bar; the history only warms the indicators up.
+"""
+
+from __future__ import annotations
+
+import io
+import csv
+import time
+import socket
+import warnings
+import threading
+import statistics
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from backtesting import Backtest
+from backtesting._stats import compute_stats
+from backtesting._util import _Array, _Data, _Indicator, _indicator_warmup_nbars, _strategy_indicators
+from backtesting.backtesting import _OutOfMoneyError
+from backtesting.test import SMA
+
+from core import METRIC_KEYS, RunConfig, RunError, load_data_frame, load_strategy_from_source
+from datastore import OHLCV, normalize_csv
+
+WINDOW = 500  # bars an indicator without an incremental form is recomputed over
+DATE_COLUMNS = ("Date", "Datetime", "date", "timestamp", "Timestamp")
+COLUMN_ALIASES = {
+    "Open": ("Open",),
+    "High": ("High",),
+    "Low": ("Low",),
+    "Close": ("Close", "Adj Close", "AdjClose"),
+    "Volume": ("Volume", "Vol"),
+}
+TRADE_COLUMNS = ["EntryBar", "ExitBar", "EntryTime", "ExitTime", "Size", "EntryPrice", "ExitPrice", "PnL", "ReturnPct"]
+Bar = Tuple[pd.Timestamp, Dict[str, float]]
+
+
+# --------------------------- Incremental indicators ----------------- #
+class RollingMean:
+    """Mean of the last `n` values (NaN until there are `n`, or while one is NaN), like SMA."""
+
+    def __init__(self, n: int, history: np.ndarray):
+        self.n = int(n)
+        self.values = deque(maxlen=self.n)
+        self.total = 0.0
+        self.nans = 0
+        self.steps = 0
+        for x in history[-self.n:]:
+            self.update(x)
+
+    def update(self, x: float) -> float:
+        if len(self.values) == self.n:
+            old = self.values[0]
+            if np.isnan(old):
+                self.nans -= 1
+            else:
+                self.total -= old
+        self.values.append(x)
+        if np.isnan(x):
+            self.nans += 1
+        else:
+            self.total += x
+        self.steps += 1
+        if self.steps % self.n == 0:  # resync, so rounding errors do not pile up
+            self.total = float(np.nansum(self.values))
+        if len(self.values) < self.n or self.nans:
+            return np.nan
+        return self.total / self.n
+
+
+# func -> factory(args, kwargs, history of the source) -> object with update(x)
+INCREMENTAL: Dict[Callable, Callable] = {
+    SMA: lambda args, kwargs, history: RollingMean(args[1] if len(args) > 1 else kwargs["n"], history),
+}
+
+
+def register_incremental(func: Callable, factory: Callable) -> None:
+    """
+    Update `self.I(func, source, ...)` with `factory(args, kwargs, source history)`
+    instead of recomputing it; the factory's object has `update(x) -> value`.
+    """
+    INCREMENTAL[func] = factory
+
+
+@dataclass
+class _Spec:
+    """How one indicator is updated: its arguments and, if any, its incremental state."""
+
+    func: Callable
+    args: tuple
+    kwargs: dict
+    state: object = None
+    live: Optional[np.ndarray] = None
+
+
+def _recording(Strategy):
+    """`Strategy` whose `self.I(...)` calls are recorded for the replay."""
+
+    class Recorded(Strategy):
+        def I(self, func, *args, **kwargs):  # noqa: E743 (backtesting.py's name)
+            value = super().I(func, *args, **kwargs)
+            self._replay_specs.append((value, func, args, kwargs))
+            return value
+
+    Recorded._replay_specs = None
+    Recorded.__name__ = Recorded.__qualname__ = Strategy.__name__
+    return Recorded
+
+
+# --------------------------- Session -------------------------------- #
+class ReplaySession:
+    """One strategy, fed bar by bar with `push` after `init()` on the history."""
+
+    def __init__(
+        self,
+        Strategy,
+        history: pd.DataFrame,
+        cash: float = 10_000,
+        commission: float = 0.0,
+        window: int = WINDOW,
+        **params,
+    ):
+        if not len(history):
+            raise RunError("Replay needs at least one bar of history.")
+        history = history[OHLCV].astype(float)
+        if isinstance(history.index, pd.DatetimeIndex) and history.index.tz is not None:
+            history = history.tz_convert(None)
+        self.window = window
+        self.n = len(history)
+        self.start = self.n  # first bar fed (and traded)
+        self.out_of_money = False
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # e.g. prices above cash: the backtest would say the same
+            bt = Backtest(history, _recording(Strategy), cash=cash, commission=commission, exclusive_orders=True)
+        self.cash = cash
+        self._times = pd.DatetimeIndex(history.index).to_numpy("datetime64[ns]")
+        self.data = _Data(history.copy())
+        self.broker = bt._broker(data=self.data)
+        self.broker._equity = np.full(self.n, float(cash))
+        self.strategy = bt._strategy(self.broker, self.data, params)
+        self.strategy._replay_specs = []
+        self.strategy.init()
+        self.warmup = 1 + _indicator_warmup_nbars(self.strategy)  # as Backtest.run skips them
+
+        self.specs: List[_Spec] = []
+        by_id = {}
+        for value, func, args, kwargs in self.strategy._replay_specs:
+            spec = _Spec(getattr(func, "__wrapped_indicator__", func), (), {}, live=np.asarray(value))
+            spec.args = tuple(self._arg_ref(a, by_id) for a in args)
+            spec.kwargs = {k: self._arg_ref(v, by_id) for k, v in kwargs.items()}
+            factory = INCREMENTAL.get(spec.func)
+            if factory is not None and spec.args and spec.args[0][0] != "const" and value.ndim == 1:
+                spec.state = factory(args, kwargs, np.asarray(args[0], dtype=float))
+            by_id[id(value)] = len(self.specs)
+            self.specs.append(spec)
+        self.attrs = [(attr, by_id[id(ind)]) for attr, ind in _strategy_indicators(self.strategy)]
+        self._allocate(max(2 * self.n, self.n + 1024))
+
+    # ----- buffers -----
+    def _allocate(self, capacity: int):
+        """Move data, equity and indicators into buffers of `capacity` bars (views are re-pointed)."""
+        n = self.n
+        times = np.full(capacity, np.datetime64("NaT"), dtype="datetime64[ns]")
+        times[:n] = self._times[:n]
+        self._times = times
+        index = pd.DatetimeIndex(times, copy=False)  # new times show up without rebuilding the index
+        frame = pd.DataFrame(np.nan, index=index, columns=OHLCV)
+        frame.iloc[:n] = np.column_stack([self.data._Data__arrays[col][:n] for col in OHLCV])
+        self.data._Data__df = frame
+        self.data._update()
+        arrays = self.data._Data__arrays
+        arrays["__index"] = index
+        self._columns = {col: arrays[col] for col in OHLCV}
+        self.data._set_length(n)
+
+        equity = np.full(capacity, np.nan)
+        equity[:n] = self.broker._equity[:n]
+        self.broker._equity = equity
+
+        for spec in self.specs:
+            old = spec.live
+            live = np.full(old.shape[:-1] + (capacity,), np.nan)
+            live[..., :n] = old[..., :n]
+            spec.live = live
+        self._views = []
+        for attr, k in self.attrs:
+            ind = getattr(self.strategy, attr)
+            self._views.append((attr, _Indicator(self.specs[k].live, name=ind.name, **{**ind._opts, "index": index})))
+        self._slice_indicators()
+
+    def _arg_ref(self, arg, by_id: dict) -> tuple:
+        if isinstance(arg, _Indicator):
+            if id(arg) not in by_id:
+                raise RunError(f"Indicator argument {arg.name!r} is not a self.I(...) result; replay cannot extend it.")
+            return ("ind", by_id[id(arg)])
+        if isinstance(arg, _Array) and arg.name in OHLCV:
+            return ("col", arg.name)
+        if isinstance(arg, pd.Series) and arg.name in OHLCV and len(arg) == self.n:
+            return ("series", arg.name)
+        if isinstance(arg, (np.ndarray, pd.Series, pd.DataFrame)) and np.ndim(arg) and len(arg) == self.n:
+            raise RunError(
+                "An indicator argument is an array replay cannot extend bar by bar;\n"
+                "pass self.data.<column> or another self.I(...) result."
+            )
+        return ("const", arg)
+
+    def _resolve(self, ref: tuple, lo: int, hi: int):
+        kind, key = ref
+        if kind == "col":
+            return self._columns[key][lo:hi]
+        if kind == "series":
+            return pd.Series(self._columns[key][lo:hi], index=self.data._Data__arrays["__index"][lo:hi], name=key)
+        if kind == "ind":
+            return self.specs[key].live[..., lo:hi]
+        return key
+
+    def _slice_indicators(self):
+        for attr, view in self._views:
+            setattr(self.strategy, attr, view[..., : self.n])
+
+    def _update_indicators(self, i: int):
+        lo = max(0, i + 1 - self.window)
+        for spec in self.specs:
+            if spec.state is not None:
+                spec.live[i] = spec.state.update(float(self._resolve(spec.args[0], i, i + 1)[-1]))
+                continue
+            args = [self._resolve(a, lo, i + 1) for a in spec.args]
+            kwargs = {k: self._resolve(v, lo, i + 1) for k, v in spec.kwargs.items()}
+            value = spec.func(*args, **kwargs)
+            if isinstance(value, pd.DataFrame):
+                value = value.values.T
+            value = np.asarray(value, dtype=float)
+            if value.ndim == 2 and value.shape[0] == i + 1 - lo and value.shape[1] != i + 1 - lo:
+                value = value.T  # a `df.values`-shaped result, flipped as Strategy.I does
+            spec.live[..., i] = value[..., -1]
+
+    # ----- feeding -----
+    @property
+    def last_time(self) -> pd.Timestamp:
+        return pd.Timestamp(self._times[self.n - 1])
+
+    def push(self, when, bar: Dict[str, float]) -> bool:
+        """Feed one bar; returns False if it was skipped (not newer than the last bar, or out of money)."""
+        when = pd.Timestamp(when)
+        if when.tzinfo is not None:
+            when = when.tz_convert(None)
+        if self.out_of_money or when <= self.last_time:
+            return False
+        i = self.n
+        if i == len(self._times):
+            self._allocate(2 * len(self._times))
+        self._times[i] = when.to_datetime64()
+        for col in OHLCV:
+            self._columns[col][i] = bar.get(col, np.nan)
+        self.n = i + 1
+        self.data._set_length(self.n)
+        self._update_indicators(i)
+        self._slice_indicators()
+        if i < self.warmup:
+            self.broker._equity[i] = self.broker.equity
+            return True
+        with np.errstate(invalid="ignore"):
+            try:
+                self.broker.next()
+            except _OutOfMoneyError:
+                self.out_of_money = True
+                return True
+            self.strategy.next()
+        return True
+
+    # ----- state -----
+    def orders(self) -> List[dict]:
+        return [
+            {"Size": o.size, "Limit": o.limit, "Stop": o.stop, "SL": o.sl, "TP": o.tp, "Tag": o.tag}
+            for o in self.broker.orders
+        ]
+
+    def trade_rows(self, since: int = 0) -> List[dict]:
+        """Closed trades from position `since` on."""
+        return [
+            {
+                "EntryTime": t.entry_time,
+                "ExitTime": t.exit_time,
+                "Size": t.size,
+                "EntryPrice": t.entry_price,
+                "ExitPrice": t.exit_price,
+                "PnL": t.pl,
+                "ReturnPct": t.pl_pct,
+            }
+            for t in self.broker.closed_trades[since:]
+        ]
+
+    def snapshot(self) -> dict:
+        position = self.broker.position
+        return {
+            "bars": self.n - self.start,
+            "time": self.last_time,
+            "close": float(self._columns["Close"][self.n - 1]),
+            "equity": float(self.broker._equity[self.n - 1]),
+            "position": position.size,
+            "position_pl": position.pl,
+            "orders": self.orders(),
+            "closed": len(self.broker.closed_trades),
+        }
+
+    def equity(self) -> pd.Series:
+        """Equity per fed bar, starting from the last history bar."""
+        first = self.start - 1
+        return pd.Series(
+            self.broker._equity[first:self.n], index=pd.DatetimeIndex(self._times[first:self.n]), name="Equity"
+        )
+
+    def stats(self) -> pd.Series:
+        """backtesting.py stats of the fed bars (open trades not counted, as in a backtest)."""
+        first = self.start - 1
+        equity = self.equity()
+        ohlc = pd.DataFrame({col: self._columns[col][first:self.n] for col in OHLCV}, index=equity.index)
+        trades = pd.DataFrame(self.trade_rows(), columns=TRADE_COLUMNS[2:])
+        closed = self.broker.closed_trades
+        trades.insert(0, "EntryBar", [t.entry_bar - first for t in closed])
+        trades.insert(1, "ExitBar", [t.exit_bar - first for t in closed])
+        trades["SL"] = [t.sl for t in closed]
+        trades["TP"] = [t.tp for t in closed]
+        trades["Commission"] = [t._commissions for t in closed]
+        trades["Duration"] = trades["ExitTime"] - trades["EntryTime"]
+        trades["Tag"] = [t.tag for t in closed]
+        return compute_stats(trades, equity.to_numpy(), ohlc, None)
+
+
+# --------------------------- Feeds ---------------------------------- #
+class _LineParser:
+    """CSV lines -> (time, bar), columns found as datastore.normalize_csv finds them."""
+
+    def __init__(self, header: str):
+        names = next(csv.reader([header]))
+        lower = {n.strip().lower(): i for i, n in enumerate(names)}
+        self.date = next((lower[c.lower()] for c in DATE_COLUMNS if c.lower() in lower), None)
+        if self.date is None:
+            raise RunError("The feed's header must include a Date/Datetime column.")
+        self.columns = {}
+        for col, aliases in COLUMN_ALIASES.items():
+            pos = next((lower[a.lower()] for a in aliases if a.lower() in lower), None)
+            if pos is None and col != "Volume":
+                raise RunError(f"The feed's header has no {col} column.")
+            self.columns[col] = pos
+
+    def parse(self, line: str) -> Optional[Bar]:
+        if not line.strip():
+            return None
+        values = next(csv.reader([line]))
+        try:
+            bar = {col: float(values[pos]) if pos is not None else np.nan for col, pos in self.columns.items()}
+            return pd.Timestamp(values[self.date]), bar
+        except (ValueError, IndexError):
+            return None  # a malformed line is skipped, as a feed glitch
+
+
+def frame_feed(df: pd.DataFrame, speed: float = 0, cancel: Optional[threading.Event] = None) -> Iterator[Bar]:
+    """The rows of `df`, `speed` per second (0: as fast as they are consumed)."""
+    columns = [c for c in OHLCV if c in df.columns]
+    values = df[columns].to_numpy(float)
+    for when, row in zip(df.index, values):
+        if cancel is not None and cancel.wait(1 / speed if speed else 0):
+            return
+        yield when, dict(zip(columns, row))
+
+
+def read_csv_history(path: str) -> Tuple[pd.DataFrame, int]:
+    """The complete rows of `path` as an OHLCV frame, and the byte offset after them."""
+    try:
+        raw = Path(path).read_bytes()
+    except OSError as exc:
+        raise RunError(f"Cannot read {path}: {exc}") from exc
+    end = raw.rfind(b"\n") + 1  # a half-written last line is left for the feed
+    try:
+        df = normalize_csv(io.StringIO(raw[:end].decode("utf-8")))
+    except Exception as exc:
+        raise RunError(f"Cannot parse {path}: {exc}") from exc
+    return df, end
+
+
+def follow_csv(
+    path: str, offset: int, poll: float = 0.5, cancel: Optional[threading.Event] = None
+) -> Iterator[Bar]:
+    """Rows appended to `path` after byte `offset`, as they arrive (until cancelled)."""
+    with open(path, "rb") as fh:
+        parser = _LineParser(fh.readline().decode("utf-8"))
+        fh.seek(offset)
+        pending = b""
+        while cancel is None or not cancel.is_set():
+            chunk = fh.read()
+            if not chunk:
+                if cancel is not None:
+                    cancel.wait(poll)
+                else:
+                    time.sleep(poll)
+                continue
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                bar = parser.parse(line.decode("utf-8"))
+                if bar is not None:
+                    yield bar
+
+
+def socket_feed(address: str, cancel: Optional[threading.Event] = None) -> Iterator[Bar]:
+    """CSV lines (a header first) from a TCP feed at `host:port`, until it closes or is cancelled."""
+    host, _, port = address.rpartition(":")
+    try:
+        conn = socket.create_connection((host or "127.0.0.1", int(port)), timeout=5)
+    except (OSError, ValueError) as exc:
+        raise RunError(f"Cannot connect to the feed at {address}: {exc}") from exc
+    conn.settimeout(0.5)  # wake up to check `cancel`
+    with conn:
+        parser, pending = None, b""
+        while cancel is None or not cancel.is_set():
+            try:
+                chunk = conn.recv(65536)
+            except socket.timeout:
+                continue
+            if not chunk:
+                return
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                text = line.decode("utf-8").strip()
+                if parser is None:
+                    parser = _LineParser(text)
+                    continue
+                bar = parser.parse(text)
+                if bar is not None:
+                    yield bar
+
+
+# --------------------------- Runner --------------------------------- #
+@dataclass
+class ReplayResult:
+    metrics_df: pd.DataFrame  # 2-col [Metric, Value] of the fed bars
+    trades_df: pd.DataFrame
+    equity: pd.Series
+    bars: int  # bars fed
+    latency: Dict[str, float] = field(default_factory=dict)  # seconds per bar: median, p99, max
+    stats: Optional[pd.Series] = None
+
+
+def latency_summary(seconds: List[float]) -> Dict[str, float]:
+    if not seconds:
+        return {}
+    return {
+        "median": statistics.median(seconds),
+        "p99": float(np.percentile(seconds, 99)),
+        "max": max(seconds),
+    }
+
+
+def run_replay(
+    cfg: RunConfig,
+    source: str = "frame",
+    target: Optional[str] = None,
+    history_bars: int = 200,
+    speed: float = 0,
+    window: int = WINDOW,
+    on_bar: Optional[Callable[[ReplaySession, float], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> ReplayResult:
+    """
+    Feed bars from `source` ("frame", "csv" or "socket"; `target` is the CSV path
+    or host:port) into `cfg.strategy_code`. `on_bar(session, seconds)` runs after
+    every bar with the time the bar took. Ends when the feed ends or `cancel` is
+    set; either way the result covers the bars fed so far.
+    """
+    Strategy = load_strategy_from_source(cfg.strategy_code)
+    if source == "frame":
+        data = load_data_frame(cfg)
+        if history_bars < 1 or history_bars >= len(data):
+            raise RunError(f"History bars must be between 1 and {len(data) - 1} for this data.")
+        history = data.iloc[:history_bars]
+        feed = frame_feed(data.iloc[history_bars:], speed, cancel)
+    elif source == "csv":
+        path = target or cfg.csv_path
+        if not path:
+            raise RunError("Choose the CSV to follow.")
+        history, offset = read_csv_history(path)
+        feed = follow_csv(path, offset, cancel=cancel)
+    elif source == "socket":
+        if not target:
+            raise RunError("Enter the feed address as host:port.")
+        history = load_data_frame(cfg)
+        feed = socket_feed(target, cancel)
+    else:
+        raise RunError(f"Unknown replay source {source!r}.")
+
+    session = ReplaySession(Strategy, history, cash=cfg.cash, commission=cfg.commission, window=window)
+    latencies = []
+    for when, bar in feed:
+        t0 = time.perf_counter()
+        if not session.push(when, bar):
+            continue
+        latencies.append(time.perf_counter() - t0)
+        if on_bar is not None:
+            on_bar(session, latencies[-1])
+        if session.out_of_money:
+            break
+
+    stats = session.stats()
+    metrics_df = pd.DataFrame([(k, stats[k]) for k in METRIC_KEYS if k in stats], columns=["Metric", "Value"])
+    trades_df = pd.DataFrame(session.trade_rows())
+    return ReplayResult(
+        metrics_df, trades_df, session.equity(), session.n - session.start, latency_summary(latencies), stats
+    )
@@ -0,0 +1,208 @@
+"""
+Monte Carlo robustness analysis for the PasTick workbench.
+
+A backtest is one path through the market; its Sharpe and drawdown are point
+estimates. This resamples the finished run, without re-running the strategy,
+into thousands of alternative paths and reports confidence intervals for the
+total return, the maximum drawdown and the Sharpe ratio:
+
+- "trades": bootstrap the closed trades (drawn with replacement); each trade
+  is its PnL as a return on the equity before it, and the draws compound
+- "shuffle": permute the order of the closed trades; the return and Sharpe
+  stay the same, the drawdown shows how much of it was luck of the ordering
+- "returns": moving-block bootstrap of the daily equity returns (blocks of
+  `block` days keep short-range autocorrelation), which also covers open
+  positions and time spent flat
+
+The "Observed" column applies the same formulas to the actual run. They are
+not backtesting.py's statistics, so the rows are named for what they measure
+(ROBUST_LABELS) rather than after the Metrics tab's rows: the trade methods
+compound closed trades only (a trade still open at the end is left out) and
+annualise the Sharpe per trade; the returns method works on day-end equity and
+a simple daily Sharpe (backtesting.py uses geometric means).
+
+Samples are generated in chunks, each a 2-D NumPy array (samples x steps), on a
+thread pool: NumPy releases the GIL for the array work, and nothing is copied
+to other processes. Each chunk has its own seed derived from `seed`, so the
+result does not depend on the number of workers.
+"""
+
+from __future__ import annotations
+
+import os
+import warnings
+import threading
+import concurrent.futures
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from choices import ROBUSTNESS_METHODS
+from core import RunCancelled, RunError
+
+# row labels per method (return, max. drawdown, Sharpe of each path)
+_TRADE_LABELS = ["Closed-trade Return [%]", "Closed-trade Max. Drawdown [%]", "Sharpe (per trade)"]
+ROBUST_LABELS = {
+    "trades": _TRADE_LABELS,
+    "shuffle": _TRADE_LABELS,
+    "returns": ["Return [%]", "Day-end Max. Drawdown [%]", "Sharpe (simple daily)"],
+}
+CHUNK_CELLS = 4_000_000  # samples x steps per chunk (~32 MB of float64)
+
+
+@dataclass
+class RobustnessConfig:
+    method: str = "trades"  # one of ROBUSTNESS_METHODS' values
+    samples: int = 5000
+    confidence: float = 0.95  # two-sided interval
+    block: int = 5  # days per block ("returns")
+    seed: Optional[int] = None
+    workers: Optional[int] = None  # default: all cores
+
+
+@dataclass
+class RobustnessResult:
+    summary_df: pd.DataFrame  # Metric, Observed, Median, Low, High
+    samples_df: pd.DataFrame  # one row per sample, one column per ROBUST_LABELS entry
+    loss_probability: float  # share of samples with a negative return
+    steps: int  # trades or days per path
+
+
+# --------------------------- Path metrics --------------------------- #
+def path_metrics(returns: np.ndarray, periods_per_year: float) -> np.ndarray:
+    """(samples, 3) array of return %, max drawdown % and Sharpe of each row of per-step returns."""
+    equity = np.cumprod(1 + returns, axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)  # the start (1.0) is a peak too
+    drawdown = (equity / peak - 1).min(axis=1)
+    std = returns.std(axis=1, ddof=1) if returns.shape[1] > 1 else np.zeros(len(returns))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, returns.mean(axis=1) / std * np.sqrt(periods_per_year), np.nan)
+    return np.column_stack([(equity[:, -1] - 1) * 100, np.minimum(drawdown, 0) * 100, sharpe])
+
+
+def trade_returns(pnl: np.ndarray, cash: float) -> np.ndarray:
+    """Each trade's PnL as a return on the equity before it, starting from `cash`."""
+    before = cash + np.concatenate([[0.0], np.cumsum(pnl)[:-1]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.where(before > 0, pnl / before, 0.0)
+    return np.maximum(returns, -1.0)
+
+
+def daily_returns(equity: pd.Series) -> pd.Series:
+    """Day-end equity returns (the bars' own returns if the index has no dates)."""
+    if isinstance(equity.index, pd.DatetimeIndex):
+        equity = equity.resample("D").last().dropna()
+    return equity.pct_change().dropna()
+
+
+def _years(index: pd.Index, fallback: float) -> float:
+    if isinstance(index, pd.DatetimeIndex) and len(index) > 1:
+        return max((index[-1] - index[0]).days / 365.25, 1 / 365.25)
+    return fallback
+
+
+# --------------------------- Resampling ----------------------------- #
+def _draw(method: str, base: np.ndarray, size: int, block: int, rng: np.random.Generator) -> np.ndarray:
+    """`size` resampled rows of `base` (trade or daily returns)."""
+    n = len(base)
+    if method == "shuffle":
+        return base[rng.permuted(np.broadcast_to(np.arange(n), (size, n)), axis=1)]
+    if method == "trades":
+        return base[rng.integers(0, n, (size, n))]
+    block = max(1, min(block, n))
+    n_blocks = -(-n // block)
+    starts = rng.integers(0, n - block + 1, (size, n_blocks))
+    index = (starts[:, :, None] + np.arange(block)).reshape(size, -1)[:, :n]
+    return base[index]
+
+
+def run_robustness(
+    equity: Optional[pd.Series],
+    trades_df: pd.DataFrame,
+    rcfg: RobustnessConfig,
+    cash: Optional[float] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> RobustnessResult:
+    """
+    Resample a finished run (its equity curve and trades) `rcfg.samples` times.
+    `cash` defaults to the first equity value. `progress(done, total)` counts
+    samples; setting `cancel` stops with RunCancelled.
+    """
+    if rcfg.method not in ROBUSTNESS_METHODS.values():
+        raise RunError(f"Unknown resampling method {rcfg.method!r}.")
+    if rcfg.samples < 1:
+        raise RunError("Monte Carlo needs at least one sample.")
+    if not 0 < rcfg.confidence < 1:
+        raise RunError("Confidence must be between 0 and 1 (e.g. 0.95).")
+    if cash is None:
+        if equity is None or equity.empty:
+            raise RunError("This result has no equity curve; pass the starting cash.")
+        cash = float(equity.iloc[0])
+
+    if rcfg.method == "returns":
+        if equity is None:
+            raise RunError("This result has no equity curve to resample.")
+        returns = daily_returns(equity)
+        base = returns.to_numpy(dtype=float)
+        if len(base) < 2:
+            raise RunError("Resampling returns needs at least two days of equity.")
+        weekends = isinstance(returns.index, pd.DatetimeIndex) and (returns.index.dayofweek >= 5).any()
+        periods_per_year = 365 if weekends else 252
+    else:
+        if "PnL" not in trades_df or len(trades_df) < 2:
+            raise RunError("Resampling trades needs at least two closed trades.")
+        base = trade_returns(trades_df["PnL"].to_numpy(dtype=float), cash)
+        index = pd.DatetimeIndex(trades_df["ExitTime"]) if "ExitTime" in trades_df else None
+        fallback = len(equity) / 252 if equity is not None else 1.0
+        periods_per_year = len(base) / _years(index if index is not None else pd.Index([]), fallback)
+    observed = path_metrics(base[None, :], periods_per_year)[0]
+
+    chunk = max(1, min(1000, CHUNK_CELLS // len(base)))
+    sizes = [min(chunk, rcfg.samples - start) for start in range(0, rcfg.samples, chunk)]
+    seeds = np.random.SeedSequence(rcfg.seed).spawn(len(sizes))
+
+    def work(size, seed):
+        if cancel is not None and cancel.is_set():
+            raise RunCancelled("Monte Carlo cancelled.")
+        drawn = _draw(rcfg.method, base, size, rcfg.block, np.random.default_rng(seed))
+        return path_metrics(drawn, periods_per_year)
+
+    workers = rcfg.workers or os.cpu_count() or 1
+    done = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(work, size, seed) for size, seed in zip(sizes, seeds)]
+        try:
+            for fut in concurrent.futures.as_completed(futures):
+                done += len(fut.result())
+                if progress is not None:
+                    progress(done, rcfg.samples)
+        except BaseException:
+            for fut in futures:
+                fut.cancel()
+            raise
+    # chunk order, not completion order, so a seed always gives the same samples
+    samples = np.concatenate([fut.result() for fut in futures])
+
+    tail = (1 - rcfg.confidence) / 2 * 100
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN Sharpe when no path varies
+        low, median, high = np.nanpercentile(samples, [tail, 50, 100 - tail], axis=0)
+    pct = f"{rcfg.confidence:.0%}"
+    summary_df = pd.DataFrame(
+        {
+            "Metric": ROBUST_LABELS[rcfg.method],
+            "Observed": observed,
+            "Median": median,
+            f"Low ({pct})": low,
+            f"High ({pct})": high,
+        }
+    )
+    return RobustnessResult(
+        summary_df,
+        pd.DataFrame(samples, columns=ROBUST_LABELS[rcfg.method]),
+        loss_probability=float((samples[:, 0] < 0).mean()),
+        steps=len(base),
+    )
@@ -0,0 +1,266 @@
+"""
+Persistent run history for the PasTick workbench.
+
+Every finished backtest is recorded in a local SQLite database: the config and
+its key, the timing, the metrics and, as columnar NumPy blobs (.npz, one array
+per column), the trades and the equity curve.
+
+The key covers everything that decides a result: the RunConfig fields, the
+strategy source, the identity of the CSV on disk (path, mtime, size) and the
+backtesting.py version. A run whose key is already stored is served from the
+store (`lookup`) instead of being recomputed; editing the strategy or the CSV
+changes the key.
+
+Equity curves are the bulk of the database (one value per bar), so only the
+latest KEEP_EQUITY runs keep theirs (PASTICK_RUNSTORE_KEEP, default 200). Older
+runs keep their config, metrics and trades for the history and comparisons, but
+are no longer reused by `lookup`. SQLite reuses the freed pages for new runs, so
+the file stops growing once the cap is reached.
+
+The database lives at ~/.pastick/runs.sqlite (override with PASTICK_RUNSTORE).
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import json
+import time
+import sqlite3
+import contextlib
+import hashlib
+import numbers
+from pathlib import Path
+from dataclasses import asdict
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import backtesting
+
+from core import RunConfig, RunResult, source_hash
+from datastore import source_key
+
+STORE_VERSION = 1  # bump when the stored layout or the meaning of a key changes
+KEY_FIELDS = [  # RunConfig fields that change the result (smoke_bars does not)
+    "symbol",
+    "timeframe",
+    "start_date_iso",
+    "end_date_iso",
+    "cash",
+    "commission",
+    "engine",
+]
+KEEP_EQUITY = int(os.environ.get("PASTICK_RUNSTORE_KEEP", 200))  # runs that keep their equity blob
+HISTORY_METRICS = ["Return [%]", "Sharpe Ratio", "Max. Drawdown [%]", "# Trades", "Win Rate [%]"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    created REAL NOT NULL,
+    seconds REAL,
+    strategy TEXT,
+    config TEXT NOT NULL,
+    metrics TEXT NOT NULL,
+    trades BLOB,
+    equity BLOB
+);
+CREATE INDEX IF NOT EXISTS runs_key ON runs (key);
+"""
+
+
+def store_path() -> Path:
+    return Path(os.environ.get("PASTICK_RUNSTORE") or Path.home() / ".pastick" / "runs.sqlite")
+
+
+def run_key(cfg: RunConfig) -> str:
+    """Hash of everything that determines the result of `cfg`."""
+    fields = {k: getattr(cfg, k) for k in KEY_FIELDS}
+    if cfg.csv_path:
+        fields["symbol"] = None  # the file decides the data, not the symbol box
+        try:
+            fields["data"] = source_key(cfg.csv_path)
+        except OSError:
+            fields["data"] = str(cfg.csv_path)  # missing file: the run will fail anyway
+    fields["strategy"] = source_hash(cfg.strategy_code)
+    fields["versions"] = (STORE_VERSION, backtesting.__version__)
+    raw = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _strategy_label(source: str) -> str:
+    """First comment line of the strategy (e.g. "# SMA cross") plus a short source hash."""
+    for line in source.splitlines():
+        line = line.strip()
+        if line.startswith("#") and line.strip("# "):
+            return f"{line.strip('# ')[:40]} [{source_hash(source)[:8]}]"
+    return source_hash(source)[:8]
+
+
+# --------------------------- Columnar blobs ------------------------- #
+def _pack(values) -> Tuple[np.ndarray, Optional[str]]:
+    """(array, kind): tz-aware times as UTC datetime64 ("tz:<zone>"), objects as text ("text")."""
+    tz = getattr(values.dtype, "tz", None)
+    if tz is not None:
+        return pd.DatetimeIndex(values).tz_convert("UTC").tz_localize(None).to_numpy(), f"tz:{tz}"
+    values = np.asarray(values)
+    if values.dtype == object:
+        return np.array(["" if v is None or (np.ndim(v) == 0 and pd.isna(v)) else str(v) for v in values]), "text"
+    return values, None
+
+
+def _unpack(values: np.ndarray, kind: Optional[str]):
+    if kind == "text":
+        return np.array([v or None for v in values.tolist()], dtype=object)
+    if kind and kind.startswith("tz:"):
+        return pd.DatetimeIndex(values).tz_localize("UTC").tz_convert(kind[3:])
+    return values
+
+
+def _frame_to_blob(df: pd.DataFrame) -> bytes:
+    """One .npz array per column, plus the index."""
+    arrays, kinds = {}, {}
+    for i, col in enumerate(df.columns):
+        arrays[f"c{i}"], kinds[f"c{i}"] = _pack(df[col])
+    arrays["index"], kinds["index"] = _pack(df.index)
+    meta = {"columns": [str(c) for c in df.columns], "kinds": kinds, "index": df.index.name}
+    buf = io.BytesIO()
+    np.savez(buf, meta=np.array(json.dumps(meta)), **arrays)
+    return buf.getvalue()
+
+
+def _blob_to_frame(blob: bytes) -> pd.DataFrame:
+    with np.load(io.BytesIO(blob), allow_pickle=False) as npz:
+        meta = json.loads(str(npz["meta"]))
+        kinds = meta["kinds"]
+        data = {col: _unpack(npz[f"c{i}"], kinds[f"c{i}"]) for i, col in enumerate(meta["columns"])}
+        index = pd.Index(_unpack(npz["index"], kinds["index"]), name=meta["index"])
+    return pd.DataFrame(data, index=index, columns=meta["columns"])
+
+
+def _json_value(val):
+    if isinstance(val, (bool, np.bool_)):
+        return bool(val)
+    if isinstance(val, numbers.Integral):
+        return int(val)
+    if isinstance(val, numbers.Real):
+        return None if np.isnan(val) else float(val)
+    return None if val is None else str(val)
+
+
+# --------------------------- Store ---------------------------------- #
+class RunStore:
+    """SQLite run history. Safe to use from several threads (one connection per call)."""
+
+    def __init__(self, path: Optional[str] = None, keep_equity: int = KEEP_EQUITY):
+        self.path = Path(path) if path else store_path()
+        self.keep_equity = keep_equity
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        con = sqlite3.connect(self.path, timeout=10)
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            with con:  # commits, or rolls back on error
+                yield con
+        finally:
+            con.close()
+
+    def record(self, cfg: RunConfig, result: RunResult, seconds: Optional[float] = None) -> int:
+        """Store a finished run; returns its history id."""
+        metrics = [
+            (str(k), _json_value(v)) for k, v in zip(result.metrics_df["Metric"], result.metrics_df["Value"])
+        ]
+        equity = result.equity.to_frame("Equity") if result.equity is not None else None
+        row = (
+            run_key(cfg),
+            time.time(),
+            seconds,
+            _strategy_label(cfg.strategy_code),
+            json.dumps(asdict(cfg)),
+            json.dumps(metrics),
+            _frame_to_blob(result.trades_df),
+            _frame_to_blob(equity) if equity is not None else None,
+        )
+        with self._connect() as con:
+            cur = con.execute(
+                "INSERT INTO runs (key, created, seconds, strategy, config, metrics, trades, equity)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                row,
+            )
+            # cap the history's size: older runs drop their equity curve
+            con.execute(
+                "UPDATE runs SET equity = NULL WHERE equity IS NOT NULL"
+                " AND id NOT IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)",
+                (max(0, self.keep_equity),),
+            )
+            return cur.lastrowid
+
+    def lookup(self, cfg: RunConfig) -> Optional[Tuple[int, RunResult]]:
+        """(history id, result) of the latest stored run with the same key as `cfg` that still has its equity."""
+        with self._connect() as con:
+            hit = con.execute(
+                "SELECT id FROM runs WHERE key = ? AND equity IS NOT NULL ORDER BY id DESC LIMIT 1",
+                (run_key(cfg),),
+            ).fetchone()
+        if hit is None:
+            return None
+        return hit[0], self.load(hit[0])[1]
+
+    def load(self, run_id: int) -> Tuple[RunConfig, RunResult]:
+        with self._connect() as con:
+            row = con.execute(
+                "SELECT config, metrics, trades, equity FROM runs WHERE id = ?", (run_id,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(run_id)
+        config, metrics, trades, equity = row
+        metrics_df = pd.DataFrame(json.loads(metrics), columns=["Metric", "Value"])
+        trades_df = _blob_to_frame(trades) if trades is not None else pd.DataFrame()
+        equity = _blob_to_frame(equity)["Equity"] if equity is not None else None
+        return RunConfig(**json.loads(config)), RunResult(metrics_df, trades_df, equity=equity)
+
+    def history(self, limit: int = 500) -> pd.DataFrame:
+        """Latest runs first: id, time, config summary, seconds and headline metrics."""
+        with self._connect() as con:
+            rows = con.execute(
+                "SELECT id, created, seconds, strategy, config, metrics FROM runs ORDER BY id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        records = []
+        for run_id, created, seconds, strategy, config, metrics in rows:
+            cfg = json.loads(config)
+            rec = {
+                "Id": run_id,
+                "Time": pd.Timestamp.fromtimestamp(created).floor("s"),
+                "Symbol": Path(cfg["csv_path"]).stem if cfg.get("csv_path") else cfg["symbol"],
+                "Timeframe": cfg["timeframe"],
+                "Start": cfg["start_date_iso"],
+                "End": cfg["end_date_iso"],
+                "Engine": cfg.get("engine", "event"),
+                "Strategy": strategy,
+                "Seconds": seconds,
+            }
+            values = dict(json.loads(metrics))
+            rec.update((k, values.get(k)) for k in HISTORY_METRICS)
+            records.append(rec)
+        return pd.DataFrame(records, columns=list(records[0]) if records else ["Id", "Time", "Symbol"])
+
+    def compare(self, run_ids: Iterable[int]) -> pd.DataFrame:
+        """Metric rows side by side, one column per run ("#<id> <symbol>")."""
+        columns = {}
+        for run_id in run_ids:
+            cfg, result = self.load(run_id)
+            name = Path(cfg.csv_path).stem if cfg.csv_path else cfg.symbol
+            columns[f"#{run_id} {name}"] = result.metrics_df.set_index("Metric")["Value"]
+        df = pd.DataFrame(columns)
+        df.index.name = "Metric"
+        return df.reset_index()
+
+    def delete(self, run_ids: List[int]) -> None:
+        with self._connect() as con:
+            con.executemany("DELETE FROM runs WHERE id = ?", [(int(i),) for i in run_ids])
@@ -17,7 +17,8 @@ class SmaCross(Strategy):
             self.sell()
 
 
-bt = Backtest(BTCUSD, SmaCross, commission=0.002, exclusive_orders=True)
-stats = bt.run()
-print(stats)
-bt.plot()
+if __name__ == "__main__":
+    bt = Backtest(BTCUSD, SmaCross, commission=0.002, exclusive_orders=True)
+    stats = bt.run()
+    print(stats)
+    bt.plot()
@@ -0,0 +1,143 @@
+"""
+Cold-start benchmark for the PasTick workbench.
+
+Launches fresh interpreters that open the main window and times each stage
+from process launch: `import GUI`, window built, first paint, background
+warm-up done. Heavy modules already loaded at first paint are listed, since
+they are what makes the window slow to appear. Exits with status 1 when the
+median time to first paint exceeds the budget.
+
+    python startup_bench.py --repeat 5 --budget 1.0
+    python startup_bench.py --importtime 15     # slowest imports before first paint
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+HEAVY_MODULES = ["numpy", "pandas", "backtesting", "backtesting.test", "bokeh", "core", "PyQt6.QtWebEngineWidgets"]
+STAGES = ["import", "window", "paint", "warm"]
+
+# Runs in the child interpreter; times are seconds since the epoch (the parent subtracts launch time)
+CHILD = r"""
+import sys, time, json
+sys.path.insert(0, {here!r})
+marks = {{}}
+import GUI
+marks["import"] = time.time()
+from PyQt6.QtCore import QEvent, QObject, QTimer
+from PyQt6.QtWidgets import QApplication
+
+app = QApplication(sys.argv)
+win = GUI.MainWindow()
+marks["window"] = time.time()
+loaded = []
+
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and "paint" not in marks:
+            marks["paint"] = time.time()
+            loaded.extend(m for m in {heavy!r} if m in sys.modules)
+        return False
+
+
+def warmed():
+    marks["warm"] = time.time()
+    QTimer.singleShot(0, app.quit)
+
+
+watcher = FirstPaint()
+win.installEventFilter(watcher)
+win.show()  # its showEvent queues the warm-up first, so it exists when this runs
+QTimer.singleShot(0, lambda: win.warmup.finished.connect(warmed))
+QTimer.singleShot(60000, app.quit)
+app.exec()
+win.close()
+print(json.dumps({{"marks": marks, "loaded_at_paint": loaded}}))
+"""
+
+
+def run_once(env: dict) -> dict:
+    code = CHILD.format(here=str(HERE), heavy=HEAVY_MODULES)
+    launched = time.time()
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=HERE, check=True
+    ).stdout
+    report = json.loads(out.strip().splitlines()[-1])
+    report["marks"] = {k: v - launched for k, v in report["marks"].items()}
+    return report
+
+
+def import_profile(env: dict, top: int) -> list:
+    """(module, cumulative seconds) of the slowest imports in `import GUI` (python -X importtime)."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import GUI"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=HERE,
+        check=True,
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(cumulative) / 1e6))
+    return sorted(rows, key=lambda r: -r[1])[:top]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the workbench's cold start")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=1.0, help="max median seconds to first paint")
+    parser.add_argument("--importtime", type=int, metavar="N", help="also list the N slowest imports of GUI")
+    parser.add_argument("--json", help="write the results here as JSON")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")  # no display needed
+    runs = [run_once(env) for _ in range(args.repeat)]
+
+    result = {
+        "params": vars(args),
+        "stages": {
+            stage: {
+                "median": statistics.median(r["marks"][stage] for r in runs),
+                "min": min(r["marks"][stage] for r in runs),
+            }
+            for stage in STAGES
+            if all(stage in r["marks"] for r in runs)
+        },
+        "loaded_at_paint": runs[0]["loaded_at_paint"],
+    }
+    paint = result["stages"].get("paint", {}).get("median")
+    result["within_budget"] = paint is not None and paint <= args.budget
+
+    print(f"{'stage':<8}{'median s':>12}{'min s':>12}   (since process launch)")
+    for stage, t in result["stages"].items():
+        print(f"{stage:<8}{t['median']:>12.3f}{t['min']:>12.3f}")
+    print(f"heavy modules loaded at first paint: {', '.join(result['loaded_at_paint']) or 'none'}")
+    verdict = "within" if result["within_budget"] else "OVER"
+    print(f"first paint {verdict} the {args.budget:g} s budget")
+
+    if args.importtime:
+        result["slowest_imports"] = import_profile(env, args.importtime)
+        print(f"\n{'module':<48}{'cumulative s':>14}")
+        for name, secs in result["slowest_imports"]:
+            print(f"{name:<48}{secs:>14.3f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+    return 0 if result["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,39 @@
+"""Retention of equity blobs in runstore.RunStore (run with pytest from PasTick/)."""
+
+import numpy as np
+import pandas as pd
+
+from core import RunConfig, RunResult
+from runstore import RunStore
+
+
+def _config(cash: float) -> RunConfig:
+    return RunConfig("TEST", "Daily", None, "2020-01-01", "2020-12-31", cash, 0.0, "# test\n")
+
+
+def _result() -> RunResult:
+    index = pd.date_range("2020-01-01", periods=50, freq="D")
+    metrics_df = pd.DataFrame([("Return [%]", 1.5), ("# Trades", 1)], columns=["Metric", "Value"])
+    trades_df = pd.DataFrame({"EntryTime": index[:1], "ExitTime": index[1:2], "PnL": [15.0]})
+    equity = pd.Series(np.linspace(1000, 1015, len(index)), index=index, name="Equity")
+    return RunResult(metrics_df, trades_df, equity=equity)
+
+
+def test_only_latest_runs_keep_equity(tmp_path):
+    store = RunStore(str(tmp_path / "runs.sqlite"), keep_equity=2)
+    ids = [store.record(_config(1000 + i), _result()) for i in range(4)]
+
+    with_equity = [run_id for run_id in ids if store.load(run_id)[1].equity is not None]
+    assert with_equity == ids[-2:]
+
+    # pruned runs stay in the history with their metrics and trades
+    assert list(store.history()["Id"]) == ids[::-1]
+    _, old = store.load(ids[0])
+    assert len(old.trades_df) == 1
+    assert old.metrics_df["Value"].tolist() == [1.5, 1]
+
+    # and are not served as cached results any more
+    assert store.lookup(_config(1000)) is None
+    hit = store.lookup(_config(1003))
+    assert hit is not None and hit[0] == ids[-1]
+    pd.testing.assert_series_equal(hit[1].equity, _result().equity, check_freq=False)
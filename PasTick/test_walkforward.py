@@ -0,0 +1,30 @@
+"""Out-of-sample fold metrics of walkforward.py (run with pytest from PasTick/)."""
+
+import pytest
+from backtesting.test import GOOG
+
+import walkforward
+from choices import DEFAULT_STRATEGY_CODE
+from core import RunConfig
+from walkforward import WalkForwardConfig, _init_worker, _run_fold, make_folds
+
+
+@pytest.fixture
+def goog_cfg(tmp_path, monkeypatch):
+    monkeypatch.setenv("PASTICK_CACHE_DIR", str(tmp_path / "cache"))
+    csv_path = tmp_path / "GOOG.csv"
+    GOOG.rename_axis("Date").to_csv(csv_path)
+    return RunConfig("GOOG", "Daily", str(csv_path), None, None, 10_000.0, 0.002, DEFAULT_STRATEGY_CODE)
+
+
+def test_fold_buy_and_hold_covers_test_bars_only(goog_cfg):
+    _init_worker(goog_cfg)
+    data = walkforward._wf_data
+    fold = make_folds(len(data), WalkForwardConfig(folds=3))[0]
+
+    result = _run_fold(fold, [{"n_fast": 10, "n_slow": 20}], "Sharpe Ratio")
+
+    close = data["Close"].iloc[fold.test[0]:fold.test[1]]
+    expected = (close.iloc[-1] / close.iloc[0] - 1) * 100
+    assert result["metrics"]["Buy & Hold Return [%]"] == pytest.approx(expected)
+    assert len(result["equity"]) == fold.test[1] - fold.test[0]
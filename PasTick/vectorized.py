@@ -0,0 +1,193 @@
+"""
+Vectorized signal engine for the PasTick workbench.
+
+Strategies that can express their decisions as a target-position array may
+define `signals(self)` next to `init`/`next`. It runs once after `init()` and
+returns one value per bar: +1 long, -1 short, 0 flat, NaN keeps the previous
+target. A target set at a bar's close is filled at the next bar's open, like a
+`position.close(); buy()/sell()` in `next()` with `exclusive_orders=True`.
+Strategy code loaded by core.py can call `crossover_positions` without
+importing it:
+
+    def signals(self):
+        return crossover_positions(self.sma_fast, self.sma_slow)
+
+Fills, commissions and the equity curve are computed with NumPy (one Python
+step per position change, not per bar). Metrics come from backtesting.py's own
+`compute_stats`, so they are defined exactly as in `Backtest.run`; use
+`compare_engines` to check a strategy against the event-driven result.
+"""
+
+from __future__ import annotations
+
+import sys
+
+import numpy as np
+import pandas as pd
+from backtesting import Backtest
+from backtesting._stats import compute_stats
+from backtesting._util import _Data, _indicator_warmup_nbars
+
+SIZE = 1 - sys.float_info.epsilon  # default `buy()`/`sell()` size: all available equity
+
+
+class SignalError(ValueError):
+    pass
+
+
+def supports_vectorized(Strategy) -> bool:
+    return callable(getattr(Strategy, "signals", None))
+
+
+def crossover_positions(fast, slow) -> np.ndarray:
+    """
+    +1 from the bar `fast` crosses above `slow`, -1 from the bar it crosses
+    below, 0 before the first cross: the position the usual `crossover()` pair in
+    `next()` holds.
+    """
+    a = np.asarray(fast, dtype=float)
+    b = np.asarray(slow, dtype=float)
+    target = np.full(len(a), np.nan)
+    with np.errstate(invalid="ignore"):
+        up = (a[:-1] < b[:-1]) & (a[1:] > b[1:])
+        down = (a[:-1] > b[:-1]) & (a[1:] < b[1:])
+    target[1:][up] = 1
+    target[1:][down] = -1
+    return target
+
+
+def _init_strategy(bt: Backtest, params: dict):
+    """Strategy instance after `init()`, prepared the way `Backtest.run` prepares it."""
+    data = _Data(bt._data.copy(deep=False))
+    strategy = bt._strategy(bt._broker(data=data), data, params)
+    strategy.init()
+    data._update()
+    return strategy
+
+
+def _targets(strategy, n: int, start: int) -> np.ndarray:
+    raw = strategy.signals()
+    target = np.asarray(raw, dtype=float).reshape(-1)
+    if len(target) != n:
+        raise SignalError(f"signals() returned {len(target)} values for {n} bars")
+    target = np.sign(target)
+    target[:start] = 0  # no orders while indicators warm up (as in Backtest.run)
+    return pd.Series(target).ffill().fillna(0).to_numpy()
+
+
+def simulate(
+    open_: np.ndarray,
+    close: np.ndarray,
+    target: np.ndarray,
+    cash: float,
+    commission: float,
+):
+    """
+    Fill `target` positions at the next open with whole units sized from equity.
+    Returns (equity per bar, trades as dict of arrays; open trades are not included).
+    """
+    n = len(close)
+    orders = np.flatnonzero(target[1:] != target[:-1]) + 1  # bars whose close changes the target
+    fills = orders[orders < n - 1] + 1
+
+    seg_cash = [cash]
+    seg_size = [0]
+    seg_entry = [0.0]
+    trades = {k: [] for k in ("Size", "EntryBar", "ExitBar", "EntryPrice", "ExitPrice", "Commission")}
+    size, entry, entry_bar, entry_comm = 0, 0.0, 0, 0.0
+    for j in fills:
+        price = open_[j]
+        if size:
+            exit_comm = abs(size) * price * commission
+            cash += size * (price - entry) - exit_comm
+            for key, val in zip(trades, (size, entry_bar, j, entry, price, entry_comm + exit_comm)):
+                trades[key].append(val)
+            size = 0
+        direction = int(target[j - 1])
+        if direction:
+            units = int(cash * SIZE // (price + price * commission))  # as the broker rounds it
+            if units:  # else the broker cancels the order for lack of margin
+                size, entry, entry_bar = direction * units, price, j
+                entry_comm = units * price * commission
+                cash -= entry_comm
+        seg_cash.append(cash)
+        seg_size.append(size)
+        seg_entry.append(entry)
+
+    seg = np.searchsorted(fills, np.arange(n), side="right")
+    equity = np.asarray(seg_cash)[seg] + np.asarray(seg_size)[seg] * (close - np.asarray(seg_entry)[seg])
+    trades = {k: np.asarray(v) for k, v in trades.items()}
+    broke = np.flatnonzero(equity <= 0)
+    if len(broke):
+        # like the broker: once equity is gone, the open trade is closed at that
+        # bar's close and the run stops
+        k = broke[0]
+        equity[k:] = 0
+        keep = trades["ExitBar"] <= k
+        trades = {key: val[keep] for key, val in trades.items()}
+        size, entry = seg_size[seg[k]], seg_entry[seg[k]]
+        if size:
+            entry_bar = fills[seg[k] - 1]
+            comm = abs(size) * (entry + close[k]) * commission
+            last = (size, entry_bar, k, entry, close[k], comm)
+            trades = {key: np.append(val, v) for (key, val), v in zip(trades.items(), last)}
+    return equity, trades
+
+
+def run_vectorized(
+    data: pd.DataFrame, Strategy, cash: float = 10_000, commission: float = 0.0, **params
+) -> pd.Series:
+    """Like `Backtest(data, Strategy, ..., exclusive_orders=True).run(**params)`, via `signals()`."""
+    if not supports_vectorized(Strategy):
+        raise SignalError("Strategy does not define signals(); use the event-driven engine.")
+    bt = Backtest(data, Strategy, cash=cash, commission=commission, exclusive_orders=True)
+    strategy = _init_strategy(bt, params)
+    n = len(data)
+    start = 1 + _indicator_warmup_nbars(strategy)
+    target = _targets(strategy, n, start)
+
+    ohlc = bt._data
+    equity, t = simulate(ohlc.Open.to_numpy(float), ohlc.Close.to_numpy(float), target, cash, commission)
+
+    index = ohlc.index
+    trades = pd.DataFrame(
+        {
+            "Size": t["Size"].astype(int),
+            "EntryBar": t["EntryBar"].astype(int),
+            "ExitBar": t["ExitBar"].astype(int),
+            "EntryPrice": t["EntryPrice"].astype(float),
+            "ExitPrice": t["ExitPrice"].astype(float),
+            "SL": np.nan,
+            "TP": np.nan,
+        }
+    )
+    gross = trades["Size"] * (trades["ExitPrice"] - trades["EntryPrice"])
+    trades["PnL"] = gross - t["Commission"]
+    trades["Commission"] = t["Commission"].astype(float)
+    trades["ReturnPct"] = np.sign(trades["Size"]) * (trades["ExitPrice"] / trades["EntryPrice"] - 1) - (
+        trades["Commission"] / (trades["Size"].abs() * trades["EntryPrice"])
+    )
+    trades["EntryTime"] = index[trades["EntryBar"].to_numpy()]
+    trades["ExitTime"] = index[trades["ExitBar"].to_numpy()]
+    trades["Duration"] = trades["ExitTime"] - trades["EntryTime"]
+    trades["Tag"] = None
+
+    stats = compute_stats(trades, equity, ohlc, strategy)
+    if len(trades):
+        stats.loc["Commissions [$]"] = trades["Commission"].sum()
+    return stats
+
+
+def compare_engines(
+    data: pd.DataFrame, Strategy, cash: float = 10_000, commission: float = 0.0, keys=None, **params
+) -> pd.DataFrame:
+    """Metric-by-metric comparison of the event-driven and vectorized results."""
+    event = Backtest(data, Strategy, cash=cash, commission=commission, exclusive_orders=True).run(**params)
+    vector = run_vectorized(data, Strategy, cash=cash, commission=commission, **params)
+    keys = keys or [k for k in event.index if not k.startswith("_")]
+    rows = []
+    for key in keys:
+        a, b = event.get(key), vector.get(key)
+        diff = b - a if isinstance(a, (int, float, np.number)) and isinstance(b, (int, float, np.number)) else None
+        rows.append((key, a, b, diff))
+    return pd.DataFrame(rows, columns=["Metric", "Event", "Vectorized", "Diff"])
@@ -0,0 +1,262 @@
+"""
+Walk-forward analysis for the PasTick workbench.
+
+The loaded bars are split into folds: each fold optimises the strategy
+parameters on a training window (grid or random search, as on the Optimize tab)
+and then trades the best combination on the following out-of-sample window.
+Windows roll forward by one test window; with `anchored=True` the training
+window grows from the first bar instead.
+
+    |---- train ----|-- test --|
+              |---- train ----|-- test --|
+                        |---- train ----|-- test --|
+
+Folds run in parallel worker processes. Each worker loads the data and compiles
+the strategy once and keeps its indicator cache (indicators.py) across the
+folds and combinations it evaluates.
+
+The out-of-sample run of a fold sees the training bars as indicator history but
+only trades inside the test window, starting from `cfg.cash`. Fold equity curves
+are chained into one stitched out-of-sample curve, and its metrics come from
+backtesting.py's `compute_stats`. A trade still open at the end of a fold counts
+in that fold's equity but not in the trade list.
+"""
+
+from __future__ import annotations
+
+import os
+import warnings
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from backtesting import Backtest
+from backtesting._stats import compute_stats
+
+from core import METRIC_KEYS, RunConfig, RunError, load_data_frame, load_strategy_from_source
+from optimizer import OptimizeConfig, SweepPool, as_finished, candidate_params, check_params
+from vectorized import run_vectorized, supports_vectorized
+
+TRADE_COLUMNS = [
+    "Size",
+    "EntryBar",
+    "ExitBar",
+    "EntryPrice",
+    "ExitPrice",
+    "SL",
+    "TP",
+    "PnL",
+    "ReturnPct",
+    "EntryTime",
+    "ExitTime",
+    "Duration",
+    "Tag",
+]
+
+
+# --------------------------- Config model --------------------------- #
+@dataclass
+class WalkForwardConfig:
+    folds: int = 5
+    train_test_ratio: float = 3.0  # training window length / test window length
+    anchored: bool = False  # training window always starts at the first bar
+    workers: int = max(1, (os.cpu_count() or 2) - 1)
+
+
+@dataclass
+class Fold:
+    number: int
+    train: Tuple[int, int]  # [start, stop) bar positions
+    test: Tuple[int, int]
+
+
+@dataclass
+class WalkForwardResult:
+    folds_df: pd.DataFrame  # one row per fold: windows, best params, IS score, OOS metrics
+    metrics_df: pd.DataFrame  # 2-col [Metric, Value] of the stitched out-of-sample run
+    equity: pd.Series  # stitched out-of-sample equity
+    trades_df: pd.DataFrame  # out-of-sample trades of all folds
+    stats: Optional[pd.Series] = None
+
+
+def make_folds(n_bars: int, wf: WalkForwardConfig) -> List[Fold]:
+    """Split `n_bars` into `wf.folds` train/test windows (n = train + folds * test)."""
+    if wf.folds < 1:
+        raise RunError("Walk-forward needs at least one fold.")
+    test = int(n_bars // (wf.train_test_ratio + wf.folds))
+    train = n_bars - wf.folds * test
+    if test < 2 or train < 2:
+        raise RunError(f"{n_bars} bars are too few for {wf.folds} folds at ratio {wf.train_test_ratio:g}.")
+    folds = []
+    for k in range(wf.folds):
+        test_start = train + k * test
+        train_start = 0 if wf.anchored else k * test
+        folds.append(Fold(k + 1, (train_start, test_start), (test_start, test_start + test)))
+    return folds
+
+
+# --------------------------- Worker processes ----------------------- #
+_wf_cfg: Optional[RunConfig] = None
+_wf_data: Optional[pd.DataFrame] = None
+_wf_strategy = None
+
+
+def _init_worker(cfg: RunConfig) -> None:
+    """Compile the strategy and load data once per worker process."""
+    global _wf_cfg, _wf_data, _wf_strategy
+    _wf_cfg = cfg
+    _wf_data = load_data_frame(cfg)
+    _wf_strategy = load_strategy_from_source(cfg.strategy_code)
+
+
+def _trade_after(Strategy, first_bar: int):
+    """`Strategy` that only trades from bar position `first_bar` on (earlier bars are history)."""
+
+    class OutOfSample(Strategy):
+        def next(self):
+            if len(self.data) > first_bar:
+                super().next()
+
+        if supports_vectorized(Strategy):
+
+            def signals(self):
+                target = np.asarray(super().signals(), dtype=float).copy()
+                target[:first_bar] = 0
+                return target
+
+    OutOfSample.__name__ = OutOfSample.__qualname__ = Strategy.__name__
+    return OutOfSample
+
+
+def _backtest(data: pd.DataFrame, Strategy, params: dict) -> pd.Series:
+    if _wf_cfg.engine == "vectorized":
+        return run_vectorized(data, Strategy, cash=_wf_cfg.cash, commission=_wf_cfg.commission, **params)
+    bt = Backtest(data, Strategy, cash=_wf_cfg.cash, commission=_wf_cfg.commission, exclusive_orders=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # trades open at a window's end are expected
+        return bt.run(**params)
+
+
+def _score(stats: pd.Series, maximize: str) -> float:
+    val = stats.get(maximize, np.nan)
+    val = float(val) if isinstance(val, (int, float, np.number)) else np.nan
+    return -np.inf if np.isnan(val) else val
+
+
+def _run_fold(fold: Fold, combos: List[dict], maximize: str) -> dict:
+    train = _wf_data.iloc[fold.train[0]:fold.train[1]]
+    best, best_score = None, -np.inf
+    for params in combos:
+        score = _score(_backtest(train, _wf_strategy, params), maximize)
+        if best is None or score > best_score:
+            best, best_score = params, score
+
+    # the training bars double as indicator history for the out-of-sample run
+    window = _wf_data.iloc[fold.train[0]:fold.test[1]]
+    first = fold.test[0] - fold.train[0]
+    stats = _backtest(window, _trade_after(_wf_strategy, first), best)
+
+    equity = stats["_equity_curve"]["Equity"].to_numpy()[first:]
+    trades = stats["_trades"]
+    trades = trades[[c for c in TRADE_COLUMNS if c in trades.columns]].copy()
+    trades["EntryBar"] -= first
+    trades["ExitBar"] -= first
+    # out-of-sample metrics cover the test bars only (not Buy & Hold or Sharpe over the training bars)
+    test = compute_stats(trades, equity, _wf_data.iloc[fold.test[0]:fold.test[1]], None)
+    return {
+        "fold": fold,
+        "params": best,
+        "train_score": best_score,
+        "equity": equity,
+        "trades": trades,
+        "metrics": {k: test[k] for k in METRIC_KEYS if k in test},
+    }
+
+
+# --------------------------- Runner --------------------------------- #
+def stitch(results: List[dict], data: pd.DataFrame, cash: float) -> Tuple[pd.Series, pd.DataFrame, pd.Series]:
+    """Chain the fold equity curves and trades into one out-of-sample run."""
+    results = sorted(results, key=lambda r: r["fold"].number)
+    level, curves, trades, offset = cash, [], [], 0
+    for r in results:
+        scale = level / cash  # each fold starts from `cash`; carry the previous folds' result
+        curve = r["equity"] * scale
+        curves.append(curve)
+        if len(r["trades"]):
+            t = r["trades"].copy()
+            t["EntryBar"] += offset
+            t["ExitBar"] += offset
+            t["PnL"] *= scale
+            trades.append(t)
+        level = curve[-1] if len(curve) else level
+        offset += len(curve)
+    first, last = results[0]["fold"].test[0], results[-1]["fold"].test[1]
+    ohlc = data.iloc[first:last]
+    equity = np.concatenate(curves)
+    trades_df = pd.concat(trades, ignore_index=True) if trades else pd.DataFrame(columns=TRADE_COLUMNS)
+    stats = compute_stats(trades_df, equity, ohlc, None)
+    return pd.Series(equity, index=ohlc.index, name="Equity"), trades_df, stats
+
+
+def run_walk_forward(
+    cfg: RunConfig,
+    opt: OptimizeConfig,
+    wf: WalkForwardConfig,
+    on_fold: Optional[Callable[[dict], None]] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> WalkForwardResult:
+    """
+    Optimise on each training window and trade the winner out of sample.
+    `on_fold` receives each fold's summary row as it finishes.
+    """
+    if opt.method not in ("grid", "random"):
+        raise RunError("Walk-forward supports the grid and random methods.")
+    Strategy = load_strategy_from_source(cfg.strategy_code)
+    check_params(Strategy, opt.param_ranges)
+    if cfg.engine == "vectorized" and not supports_vectorized(Strategy):
+        raise RunError("The vectorized engine needs a `signals(self)` method on Strategy.")
+    data = load_data_frame(cfg)
+    folds = make_folds(len(data), wf)
+    combos = candidate_params(opt)
+
+    results, rows = [], []
+    if progress is not None:
+        progress(0, len(folds))
+    workers = max(1, min(wf.workers, len(folds)))
+    with SweepPool(workers, cfg, initializer=_init_worker) as pool:
+        futures = [pool.submit(_run_fold, fold, combos, opt.maximize) for fold in folds]
+        for fut in as_finished(pool, futures, cancel):
+            r = fut.result()
+            results.append(r)
+            row = _fold_row(r, data, opt.maximize)
+            rows.append(row)
+            if on_fold is not None:
+                on_fold(row)
+            if progress is not None:
+                progress(len(results), len(folds))
+
+    equity, trades_df, stats = stitch(results, data, cfg.cash)
+    metrics_df = pd.DataFrame(
+        [(k, stats[k]) for k in METRIC_KEYS if k in stats], columns=["Metric", "Value"]
+    )
+    folds_df = pd.DataFrame(rows).sort_values("Fold").reset_index(drop=True)
+    return WalkForwardResult(folds_df, metrics_df, equity, trades_df, stats)
+
+
+def _fold_row(r: dict, data: pd.DataFrame, maximize: str) -> dict:
+    fold = r["fold"]
+    index = data.index
+    row = {
+        "Fold": fold.number,
+        "Train Start": index[fold.train[0]],
+        "Train End": index[fold.train[1] - 1],
+        "Test Start": index[fold.test[0]],
+        "Test End": index[fold.test[1] - 1],
+    }
+    row.update(r["params"])
+    row[f"IS {maximize}"] = r["train_score"]
+    row.update((f"OOS {k}", v) for k, v in r["metrics"].items())
+    return row
@@ -0,0 +1,258 @@
+"""
+Warm, process-isolated backtest workers for the PasTick workbench.
+
+Backtests run in long-lived worker processes instead of a thread of the GUI
+process: the strategy's `next()` loop no longer competes with Qt for the GIL,
+and user code that crashes or hangs only takes down its worker, which is
+respawned. Workers import pandas/NumPy/backtesting once at start-up and keep
+their datastore LRU between runs, so every run after the first skips
+interpreter start-up, imports and data loading.
+
+Only the metrics, trades and equity curve cross the pipe, the frames in the compact
+columnar layout of columnar.py (large ones in shared memory, read as zero-copy views).
+The Backtest object and full stats of the last few runs stay in the worker that
+produced them, and charts are rendered there (`WorkerPool.plot`).
+"""
+
+from __future__ import annotations
+
+import time
+import uuid
+import threading
+import traceback
+import multiprocessing
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from columnar import discard_segment, pack_result, release_segments, segment_name, unpack_result
+from core import RunCancelled, RunConfig, RunError, RunResult, render_plot, run_backtest
+
+KEEP_RUNS = 4  # finished runs each worker keeps for plotting
+CANCEL_GRACE = 3.0  # seconds a cancelled run gets to stop before its worker is killed
+SHUTDOWN_GRACE = 1.0  # seconds an idle worker gets to exit when the pool shuts down
+POLL_INTERVAL = 0.1
+
+
+class RunTimeout(RunError):
+    pass
+
+
+# --------------------------- Worker process ------------------------- #
+def _worker_main(conn, cancel) -> None:
+    """Serve ("run" | "plot", job_id, args) requests until the pipe closes."""
+    runs: "OrderedDict[str, RunResult]" = OrderedDict()
+    conn.send(("ready", None))
+    while True:
+        try:
+            kind, job_id, args = conn.recv()
+        except (EOFError, OSError):
+            release_segments()
+            break
+        release_segments()  # the parent has mapped the previous reply's frames by now
+        try:
+            if kind == "run":
+                cfg, smoke, frames = args
+                result = run_backtest(
+                    cfg,
+                    smoke=smoke,
+                    progress=lambda done, total: conn.send(("progress", (done, total))),
+                    cancel=cancel,
+                )
+                runs[job_id] = result
+                while len(runs) > KEEP_RUNS:
+                    runs.popitem(last=False)
+                reply = pack_result(result, run_id=job_id, frames=frames, segment=segment_name(job_id))
+            elif kind == "plot":
+                run_id, resample, filename = args
+                result = runs.get(run_id)
+                if result is None:
+                    raise RunError("This run is no longer held by a worker; run it again to plot.")
+                reply = render_plot(result, resample=resample, filename=filename)
+            else:
+                raise RunError(f"Unknown worker request: {kind}")
+            conn.send(("done", reply))
+        except RunCancelled:
+            conn.send(("cancelled", None))
+        except RunError as exc:
+            conn.send(("error", str(exc)))
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.cancel = ctx.Event()
+        self.proc = ctx.Process(target=_worker_main, args=(child, self.cancel), daemon=True)
+        self.proc.start()
+        child.close()
+        self.ready = False
+        self.busy = False
+        self.runs = []  # job ids held for plotting, oldest first
+
+    def kill(self, grace: float = 0.0) -> None:
+        """Stop the worker; with `grace`, first let it exit on its own (and unlink its segments)."""
+        if grace:
+            self.conn.close()
+            self.proc.join(timeout=grace)
+        if self.proc.is_alive():
+            self.proc.terminate()
+        self.proc.join(timeout=5)
+        self.conn.close()
+
+
+# --------------------------- Pool ----------------------------------- #
+class WorkerPool:
+    """
+    `size` warm worker processes. Calls block the calling thread (use it from a
+    QThread or plain thread); each call holds one worker for its duration.
+    """
+
+    def __init__(self, size: int = 1):
+        # spawn keeps the workers clean of the Qt event loop and matches Windows
+        self._ctx = multiprocessing.get_context("spawn")
+        self._cond = threading.Condition()
+        self._closed = False
+        self._workers = [_Worker(self._ctx) for _ in range(max(1, size))]
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            workers, self._workers = self._workers, []
+            self._cond.notify_all()
+        for w in workers:
+            w.kill(grace=SHUTDOWN_GRACE)
+
+    # ----- public calls -----
+    def run(
+        self,
+        cfg: RunConfig,
+        smoke: bool = True,
+        progress: Optional[Callable[[int, int], None]] = None,
+        cancel: Optional[threading.Event] = None,
+        timeout: Optional[float] = None,
+        frames: bool = True,
+    ) -> RunResult:
+        """
+        `run_backtest` in a worker. The result carries metrics, trades and equity
+        (only the metrics with `frames=False`) plus a `run_id` for `plot`. Raises
+        RunCancelled, RunTimeout (the worker is replaced) or RunError.
+        """
+        job_id = uuid.uuid4().hex
+        worker = self._acquire()
+        try:
+            try:
+                packed = self._call(worker, ("run", job_id, (cfg, smoke, frames)), progress, cancel, timeout)
+            except RunError:
+                # a worker killed after packing its reply cannot release the frames' segment
+                discard_segment(segment_name(job_id))
+                raise
+            worker.runs = (worker.runs + [job_id])[-KEEP_RUNS:]
+            return unpack_result(packed)
+        finally:
+            self._release(worker)
+
+    def plot(self, run_id: str, resample="Auto", filename: Optional[str] = None) -> str:
+        """Render the chart of a finished run in the worker that holds it; returns the HTML path."""
+        worker = self._acquire(run_id)
+        try:
+            return self._call(worker, ("plot", None, (run_id, resample, filename)))
+        finally:
+            self._release(worker)
+
+    # ----- scheduling -----
+    def _acquire(self, run_id: Optional[str] = None) -> _Worker:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RunError("Worker pool is shut down.")
+                if run_id is not None:
+                    owners = [w for w in self._workers if run_id in w.runs]
+                    if not owners:
+                        raise RunError("This run is no longer held by a worker; run it again to plot.")
+                    candidates = owners
+                else:
+                    candidates = self._workers
+                idle = [w for w in candidates if not w.busy]
+                if idle:
+                    # prefer workers that finished importing
+                    worker = max(idle, key=lambda w: w.ready)
+                    worker.busy = True
+                    return worker
+                self._cond.wait()
+
+    def _release(self, worker: _Worker) -> None:
+        with self._cond:
+            worker.busy = False
+            self._cond.notify_all()
+
+    def _respawn(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        fresh = _Worker(self._ctx)
+        with self._cond:
+            if worker in self._workers:
+                self._workers[self._workers.index(worker)] = fresh
+            self._cond.notify_all()
+        return fresh
+
+    def _recv(self, worker: _Worker):
+        """Next message, or None if nothing arrived within POLL_INTERVAL."""
+        try:
+            if worker.conn.poll(POLL_INTERVAL):
+                return worker.conn.recv()
+        except (EOFError, OSError):
+            pass
+        if not worker.proc.is_alive():
+            code = worker.proc.exitcode
+            self._respawn(worker)
+            raise RunError(f"Backtest worker exited with code {code}; it has been restarted.")
+        return None
+
+    def _call(self, worker, request, progress=None, cancel=None, timeout=None):
+        def stopped() -> bool:
+            return cancel is not None and cancel.is_set()
+
+        # a freshly spawned worker is still importing; that does not count toward the timeout
+        while not worker.ready:
+            if stopped():
+                raise RunCancelled("Run cancelled.")
+            msg = self._recv(worker)
+            worker.ready = msg is not None and msg[0] == "ready"
+
+        worker.cancel.clear()
+        worker.conn.send(request)
+        started = time.perf_counter()
+        cancelled_at = None
+        while True:
+            msg = self._recv(worker)
+            now = time.perf_counter()
+            if msg is None:
+                if stopped() and cancelled_at is None:
+                    worker.cancel.set()
+                    cancelled_at = now
+                if cancelled_at is not None and now - cancelled_at > CANCEL_GRACE:
+                    self._respawn(worker)  # user code is not reaching next()
+                    raise RunCancelled("Run cancelled; the worker was restarted.")
+                if timeout and now - started > timeout:
+                    self._respawn(worker)
+                    raise RunTimeout(f"Run exceeded {timeout:g} s; the worker was restarted.")
+                continue
+            kind, payload = msg
+            if kind == "progress":
+                if progress is not None:
+                    progress(*payload)
+                if stopped() and cancelled_at is None:
+                    worker.cancel.set()
+                    cancelled_at = now
+            elif kind == "done":
+                return payload
+            elif kind == "cancelled":
+                raise RunCancelled("Run cancelled.")
+            elif kind == "error":
+                raise RunError(payload)
@@ -1,7 +1,13 @@
 import os
+import sys
+import csv
+import json
+import time
+import argparse
+import concurrent.futures
 import datetime as dt
+from fnmatch import fnmatch
 from pathlib import Path
-from tkinter import Tk, Button, Label, filedialog, messagebox
 from openpyxl import load_workbook
 
 replaceDict = {
@@ -15,11 +21,13 @@ def timestamp() -> str:
     return dt.datetime.now().strftime("%Y%m%d-%H%M%S")
 
 
-def process_xlsx_xlsm(path: Path, rep_dict: dict) -> dict:
-    """Process .xlsx or .xlsm ."""
+def process_xlsx_xlsm(path: Path, rep_dict: dict, timings: dict = None) -> dict:
+    """Process .xlsx or .xlsm . Per-phase seconds go into `timings` if given."""
+    t0 = time.perf_counter()
     keep_vba = path.suffix.lower() == ".xlsm"
     wb = load_workbook(filename=str(path), keep_vba=keep_vba, data_only=False)
     counter = {k: 0 for k in rep_dict.keys()}
+    t1 = time.perf_counter()
 
     for ws in wb.worksheets:
         for row in ws.iter_rows():
@@ -28,12 +36,17 @@ def process_xlsx_xlsm(path: Path, rep_dict: dict) -> dict:
                 if val in rep_dict.keys():
                     cell.value = rep_dict[val]
                     counter[val] += 1
+    t2 = time.perf_counter()
 
     wb.save(str(path))
+    if timings is not None:
+        timings["load"] = t1 - t0
+        timings["scan"] = t2 - t1
+        timings["save"] = time.perf_counter() - t2
     return counter
 
 
-def process_workbook(file_path: str, rep_dict: dict) -> dict:
+def process_workbook(file_path: str, rep_dict: dict, timings: dict = None) -> dict:
     """Detect extension and route to appropriate processor. Returns replaceCountDict."""
     path = Path(file_path)
     if not path.exists():
@@ -41,15 +54,126 @@ def process_workbook(file_path: str, rep_dict: dict) -> dict:
 
     ext = path.suffix.lower()
     if ext in SUPPORTED_EXTS:
-        return process_xlsx_xlsm(path, rep_dict)
+        return process_xlsx_xlsm(path, rep_dict, timings)
     else:
         raise ValueError("Unsupported file type. Use .xlsx, .xlsm")
 
 
-def process_path(path_like, rep_dict: dict, recursive: bool = True):
+def is_supported_excel(f: Path) -> bool:
+    # Skip Excel temp/lock files
+    if f.name.startswith("~$"):
+        return False
+    return f.suffix.lower() in SUPPORTED_EXTS
+
+
+def matches_patterns(f: Path, include=None, exclude=None) -> bool:
+    """Glob filters are checked against both the file name and the full path."""
+    names = (f.name, f.as_posix())
+    if include and not any(fnmatch(n, pat) for pat in include for n in names):
+        return False
+    if exclude and any(fnmatch(n, pat) for pat in exclude for n in names):
+        return False
+    return True
+
+
+def collect_excel_files(
+    folder: Path, recursive: bool = True, include=None, exclude=None
+) -> list:
+    files = folder.rglob("*") if recursive else folder.glob("*")
+    return sorted(
+        f
+        for f in files
+        if f.is_file() and is_supported_excel(f) and matches_patterns(f, include, exclude)
+    )
+
+
+def _timed_process_workbook(file_path: str, rep_dict: dict):
+    """Worker entry point: returns (counts, seconds). Top-level so it pickles."""
+    started = time.perf_counter()
+    counts = process_workbook(file_path, rep_dict)
+    return counts, time.perf_counter() - started
+
+
+def process_files(files, rep_dict: dict, workers: int = 1):
+    """
+    Run `process_workbook` over `files`, sequentially or on a process pool.
+    Returns (per_file_counts, failures, timings) keyed by str(file).
+    """
+    per_file_counts = {}
+    failures = []
+    timings = {}
+
+    def record(f, result=None, exc=None):
+        if exc is not None:
+            failures.append((str(f), f"{type(exc).__name__}: {exc}"))
+            return
+        counts, seconds = result
+        per_file_counts[str(f)] = counts
+        timings[str(f)] = round(seconds, 4)
+
+    if workers <= 1 or len(files) <= 1:
+        for f in files:
+            try:
+                record(f, _timed_process_workbook(str(f), rep_dict))
+            except Exception as e:
+                record(f, exc=e)
+        return per_file_counts, failures, timings
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_timed_process_workbook, str(f), rep_dict): f for f in files}
+        for fut in concurrent.futures.as_completed(futures):
+            f = futures[fut]
+            try:
+                record(f, fut.result())
+            except Exception as e:
+                record(f, exc=e)
+    # keep output deterministic regardless of completion order
+    failures.sort()
+    per_file_counts = dict(sorted(per_file_counts.items()))
+    timings = dict(sorted(timings.items()))
+    return per_file_counts, failures, timings
+
+
+def summarize(
+    mode: str,
+    files_processed: int,
+    per_file_counts: dict,
+    failures: list,
+    timings: dict,
+    rep_dict: dict,
+    started: float,
+) -> dict:
+    """The summary dict of `process_path` (and the CLI) from `process_files` output."""
+    total_counts = {k: 0 for k in rep_dict.keys()}
+    for counts in per_file_counts.values():
+        for k, v in counts.items():
+            total_counts[k] += v
+    return {
+        "mode": mode,
+        "files_processed": files_processed,
+        "files_succeeded": len(per_file_counts),
+        "files_failed": len(failures),
+        "total_counts": total_counts,
+        "per_file_counts": per_file_counts,
+        "failures": failures,
+        "timings": timings,
+        "elapsed_seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def process_path(
+    path_like,
+    rep_dict: dict,
+    recursive: bool = True,
+    include=None,
+    exclude=None,
+    workers: int = 1,
+):
     """
     Process a single Excel file or every supported Excel file in a folder.
     `process_workbook(file_path: str, rep_dict: dict)` and `SUPPORTED_EXTS`.
+    `include`/`exclude` are optional glob lists applied in folder mode and
+    `workers` > 1 spreads the files over a process pool.
 
     Returns a summary dict:
     {
@@ -58,63 +182,148 @@ def process_path(path_like, rep_dict: dict, recursive: bool = True):
       "files_succeeded": int,
       "files_failed": int,
       "total_counts": {key: int, ...},
-      "per_file_counts": { "file.xlsx": {key: int, ...}, ... },
-      "failures": [("file.xlsb", "ErrorMessage"), ...]
+      "per_file_counts": { "dir/file.xlsx": {key: int, ...}, ... },
+      "failures": [("dir/file.xlsm", "ErrorMessage"), ...],
+      "timings": { "dir/file.xlsx": seconds, ... },
+      "elapsed_seconds": float
     }
     """
+    started = time.perf_counter()
     p = Path(path_like)
     if not p.exists():
         raise FileNotFoundError(f"Path not found: {p}")
 
-    def is_supported_excel(f: Path) -> bool:
-        # Skip Excel temp/lock files
-        if f.name.startswith("~$"):
-            return False
-        return f.suffix.lower() in SUPPORTED_EXTS
+    if p.is_file():
+        mode, targets = "file", [p]
+    else:
+        mode, targets = "folder", collect_excel_files(p, recursive, include, exclude)
+    per_file_counts, failures, timings = process_files(targets, rep_dict, workers)
+    return summarize(mode, len(targets), per_file_counts, failures, timings, rep_dict, started)
+
 
-    total_counts = {k: 0 for k in rep_dict.keys()}
-    per_file_counts = {}
-    failures = []
+def collect_targets(targets, recursive: bool = True, include=None, exclude=None):
+    """
+    Files of the CLI targets (files and/or folders), each workbook once even when
+    targets overlap (e.g. `.` and `a/x.xlsx`). Returns (files, failures), where
+    failures lists the targets that do not exist.
+    """
+    files, seen, failures = [], set(), []
+    for target in targets:
+        p = Path(target)
+        if not p.exists():
+            failures.append((str(target), f"FileNotFoundError: Path not found: {p}"))
+            continue
+        found = [p] if p.is_file() else collect_excel_files(p, recursive, include, exclude)
+        for f in found:
+            key = f.resolve()
+            if key not in seen:
+                seen.add(key)
+                files.append(f)
+    return files, failures
 
-    if p.is_file():
-        counts = process_workbook(str(p), rep_dict)
-        per_file_counts[p.name] = counts
-        for k, v in counts.items():
-            total_counts[k] += v
-        return {
-            "mode": "file",
-            "files_processed": 1,
-            "files_succeeded": 1,
-            "files_failed": 0,
-            "total_counts": total_counts,
-            "per_file_counts": per_file_counts,
-            "failures": failures,
-        }
-
-    # Folder mode
-    files = p.rglob("*") if recursive else p.glob("*")
-    targets = [f for f in files if f.is_file() and is_supported_excel(f)]
-
-    succeeded = 0
-    for f in sorted(targets):
-        try:
-            counts = process_workbook(str(f), rep_dict)
-            per_file_counts[str(f)] = counts
-            for k, v in counts.items():
-                total_counts[k] += v
-            succeeded += 1
-        except Exception as e:
-            failures.append((str(f), f"{type(e).__name__}: {e}"))
 
-    return {
-        "mode": "folder",
-        "files_processed": len(targets),
-        "files_succeeded": succeeded,
-        "files_failed": len(failures),
-        "total_counts": total_counts,
-        "per_file_counts": per_file_counts,
-        "failures": failures,
-    }
+# ------------------ Headless CLI ------------------
+
+
+def load_replacements(map_path: str) -> dict:
+    """
+    Load the replacement map from .csv (two columns: find, replace; an optional
+    header row is skipped), .json (an object) or .yaml/.yml (a mapping).
+    """
+    path = Path(map_path)
+    ext = path.suffix.lower()
+    if ext == ".csv":
+        rep_dict = {}
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            for i, row in enumerate(csv.reader(fh)):
+                if not row or not row[0].strip():
+                    continue
+                if len(row) < 2:
+                    raise ValueError(f"{path.name} line {i + 1}: expected 'find,replace'")
+                if i == 0 and row[0].strip().lower() in ("find", "old", "from", "key"):
+                    continue
+                rep_dict[row[0]] = row[1]
+        return rep_dict
+    if ext == ".json":
+        with open(path, encoding="utf-8") as fh:
+            rep_dict = json.load(fh)
+    elif ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("PyYAML is required for YAML replacement maps") from None
+        with open(path, encoding="utf-8") as fh:
+            rep_dict = yaml.safe_load(fh) or {}
+    else:
+        raise ValueError("Unsupported replacement map. Use .csv, .json, .yaml")
+    if not isinstance(rep_dict, dict):
+        raise ValueError(f"{path.name} must contain a mapping of find -> replace")
+    return rep_dict
+
+
+def write_summary_csv(summary: dict, fh) -> None:
+    """One row per file: status, seconds, error, total and one column per key."""
+    keys = list(summary["total_counts"].keys())
+    writer = csv.writer(fh)
+    writer.writerow(["file", "status", "seconds", "error", "total"] + [str(k) for k in keys])
+    for fpath, counts in summary["per_file_counts"].items():
+        writer.writerow(
+            [fpath, "ok", summary["timings"].get(fpath, ""), "", sum(counts.values())]
+            + [counts.get(k, 0) for k in keys]
+        )
+    for fpath, err in summary["failures"]:
+        writer.writerow([fpath, "failed", "", err, ""] + ["" for _ in keys])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Replace exact cell values across .xlsx/.xlsm workbooks without the GUI."
+    )
+    parser.add_argument("targets", nargs="+", help="Excel files and/or folders to process")
+    parser.add_argument(
+        "-m", "--map", required=True, help="replacement map (.csv, .json, .yaml)"
+    )
+    parser.add_argument(
+        "--include", action="append", help="glob a file must match (repeatable)"
+    )
+    parser.add_argument(
+        "--exclude", action="append", help="glob that skips a file (repeatable)"
+    )
+    parser.add_argument(
+        "--no-recursive", action="store_true", help="do not descend into sub-folders"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=1, help="number of worker processes"
+    )
+    parser.add_argument("-f", "--format", choices=["json", "csv"], default="json")
+    parser.add_argument("-o", "--output", help="summary file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    rep_dict = load_replacements(args.map)
+    started = time.perf_counter()
+    files, missing = collect_targets(
+        args.targets, recursive=not args.no_recursive, include=args.include, exclude=args.exclude
+    )
+    per_file_counts, failures, timings = process_files(files, rep_dict, args.workers)
+    if len(args.targets) > 1:
+        mode = "batch"
+    else:
+        mode = "file" if Path(args.targets[0]).is_file() else "folder"
+    summary = summarize(
+        mode, len(files) + len(missing), per_file_counts, sorted(failures + missing), timings, rep_dict, started
+    )
+
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump(summary, out, indent=2, default=str)
+            out.write("\n")
+        else:
+            write_summary_csv(summary, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if summary["files_failed"] else 0
 
 
 # ------------------ Tkinter GUI ------------------
@@ -225,6 +434,11 @@ class App:  # Tested on Windows Only
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        raise SystemExit(main())
+    # imported here so that the CLI also runs where Tk is not installed
+    from tkinter import Tk, Button, Label, filedialog, messagebox
+
     root = Tk()
     App(root)
     root.mainloop()
@@ -0,0 +1,145 @@
+"""
+Throughput benchmark for rename.py.
+
+Generates synthetic .xlsx/.xlsm workbooks and times `process_workbook` phase
+by phase (load / scan / save). Optionally captures cProfile and tracemalloc
+output so a speed-up of the replacement engine can be judged against a baseline.
+
+    python rename_bench.py --sheets 3 --rows 20000 --cols 8 --cardinality 500 --density 0.05
+    python rename_bench.py --ext .xlsm --repeat 5 --profile bench.prof --tracemalloc
+"""
+
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import cProfile
+import pstats
+import tempfile
+import statistics
+import tracemalloc
+from pathlib import Path
+from openpyxl import Workbook
+
+from rename import process_workbook
+
+
+def make_workbook(
+    path: Path,
+    sheets: int,
+    rows: int,
+    cols: int,
+    cardinality: int,
+    density: float,
+    keys: int,
+    seed: int = 0,
+) -> dict:
+    """
+    Write a workbook of random strings and return the replacement map to use.
+    `density` is the fraction of cells holding one of the first `keys` strings
+    of a pool of `cardinality` distinct strings.
+    """
+    rng = random.Random(seed)
+    pool = [f"VAL-{i:06d}" for i in range(max(cardinality, keys + 1))]
+    hits, misses = pool[:keys], pool[keys:]
+
+    wb = Workbook(write_only=True)
+    for s in range(sheets):
+        ws = wb.create_sheet(f"Sheet{s + 1}")
+        for _ in range(rows):
+            ws.append(
+                [rng.choice(hits) if rng.random() < density else rng.choice(misses) for _ in range(cols)]
+            )
+    wb.save(str(path))
+    return {k: f"NEW-{k}" for k in hits}
+
+
+def run_once(src: Path, work: Path, rep_dict: dict, profiler=None) -> dict:
+    shutil.copyfile(src, work)  # process_workbook edits in place
+    timings = {}
+    t0 = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    counts = process_workbook(str(work), rep_dict, timings)
+    if profiler is not None:
+        profiler.disable()
+    timings["total"] = time.perf_counter() - t0
+    timings["replaced"] = sum(counts.values())
+    return timings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark rename.process_workbook")
+    parser.add_argument("--ext", choices=[".xlsx", ".xlsm"], default=".xlsx")
+    parser.add_argument("--sheets", type=int, default=2)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--cols", type=int, default=8)
+    parser.add_argument("--cardinality", type=int, default=1000, help="distinct strings")
+    parser.add_argument("--density", type=float, default=0.05, help="fraction of matching cells")
+    parser.add_argument("--keys", type=int, default=50, help="size of the replacement map")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", help="write cProfile stats here and print the top entries")
+    parser.add_argument("--tracemalloc", action="store_true", help="report peak Python memory")
+    parser.add_argument("--json", help="write the results here as JSON")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    with tempfile.TemporaryDirectory(prefix="rename_bench_") as tmp:
+        src = Path(tmp) / f"source{args.ext}"
+        work = Path(tmp) / f"work{args.ext}"
+        t0 = time.perf_counter()
+        rep_dict = make_workbook(
+            src, args.sheets, args.rows, args.cols, args.cardinality, args.density, args.keys, args.seed
+        )
+        print(
+            f"generated {src.name}: {args.sheets} x {args.rows} x {args.cols} cells, "
+            f"{src.stat().st_size / 1e6:.1f} MB in {time.perf_counter() - t0:.2f}s"
+        )
+
+        profiler = cProfile.Profile() if args.profile else None
+        if args.tracemalloc:
+            tracemalloc.start()
+        runs = [run_once(src, work, rep_dict, profiler) for _ in range(args.repeat)]
+        peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+        if args.tracemalloc:
+            tracemalloc.stop()
+
+    cells = args.sheets * args.rows * args.cols
+    result = {
+        "params": vars(args),
+        "cells": cells,
+        "replaced": runs[0]["replaced"],
+        "phases": {
+            phase: {
+                "median": statistics.median(r[phase] for r in runs),
+                "min": min(r[phase] for r in runs),
+            }
+            for phase in ("load", "scan", "save", "total")
+        },
+        "cells_per_second": cells / statistics.median(r["total"] for r in runs),
+        "peak_memory_mb": peak / 1e6 if peak is not None else None,
+    }
+
+    print(f"{'phase':<8}{'median s':>12}{'min s':>12}{'share':>9}")
+    total = result["phases"]["total"]["median"]
+    for phase, t in result["phases"].items():
+        print(f"{phase:<8}{t['median']:>12.4f}{t['min']:>12.4f}{t['median'] / total:>9.1%}")
+    print(f"cells/s: {result['cells_per_second']:,.0f}   replaced: {result['replaced']}")
+    if peak is not None:
+        print(f"peak traced memory: {result['peak_memory_mb']:.1f} MB")
+
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(20)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())